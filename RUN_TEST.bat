@@ -13,7 +13,7 @@ if errorlevel 1 (
     exit /b 1
 )
 
-echo [1/4] Installing dependencies...
+echo [1/5] Installing dependencies...
 pip install -r requirements.txt --quiet
 if errorlevel 1 (
     echo [ERROR] Failed to install dependencies
@@ -23,7 +23,7 @@ if errorlevel 1 (
 echo [OK] Dependencies installed
 echo.
 
-echo [2/4] Running comprehensive tests...
+echo [2/5] Running comprehensive tests...
 python test_bot.py
 if errorlevel 1 (
     echo [ERROR] Tests failed
@@ -32,15 +32,24 @@ if errorlevel 1 (
 )
 echo.
 
-echo [3/4] Checking database...
+echo [3/5] Checking pipeline throughput against benchmarks\pipeline_baseline.json...
+python benchmarks\bench_pipeline.py
+if errorlevel 1 (
+    echo [ERROR] Pipeline throughput regressed
+    pause
+    exit /b 1
+)
+echo.
+
+echo [4/5] Checking database...
 if exist vinted_bot.db (
     echo [OK] Database created: vinted_bot.db
 ) else (
-    echo [WARNING] Database not created yet
+    echo [OK] No database yet: the tests use a temporary one, the bot creates vinted_bot.db on its first run
 )
 echo.
 
-echo [4/4] Bot is ready!
+echo [5/5] Bot is ready!
 echo.
 echo ============================================================
 echo  Next steps:
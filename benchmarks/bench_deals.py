@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+DEAL SCORING BENCHMARK
+Streams synthetic approved prices through PriceStats and reports the cost
+of one update, the P² quartile error against exact quartiles per key,
+memory for a full key set, and restart time from the price_stats table
+versus replaying the items
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import PriceStats
+
+SIZES = ["XS", "S", "M", "L", "XL"]
+
+def generate(rows: int):
+    teams = sorted(vinted_bot.APPROVED_TEAMS)
+    brands = sorted(vinted_bot.APPROVED_BRANDS)
+    random.seed(5)
+    market = {team: random.uniform(3000, 9000) for team in teams}
+    for _ in range(rows):
+        team = random.choice(teams)
+        yield round(random.lognormvariate(0, 0.35) * market[team]), "EUR", team, random.choice(brands), random.choice(SIZES)
+
+def exact_quartiles(values):
+    values = sorted(values)
+    return [values[int(q * len(values))] for q in PriceStats.QUANTILES]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-keys", type=int, default=5000)
+    args = parser.parse_args()
+
+    rows = list(generate(args.rows))
+    stats = PriceStats(max_keys=args.max_keys)
+    started = time.perf_counter()
+    for row in rows:
+        stats.add(*row)
+    elapsed = time.perf_counter() - started
+    print(f"{args.rows:,} prices into {len(stats)} keys: {elapsed / args.rows * 1e6:.1f} us per listing")
+
+    by_key = {}
+    for cents, currency, team, brand, size in rows:
+        for key in PriceStats.keys(currency, team, brand, size):
+            by_key.setdefault(key, []).append(cents)
+    errors = []
+    for row in stats.query():
+        key = (row["currency"], row["team"], row["brand"], row["size"])
+        if row["count"] >= 100:
+            for estimate, exact in zip((row["p25"], row["p50"], row["p75"]), exact_quartiles(by_key[key])):
+                errors.append(abs(estimate - exact) / exact)
+    errors.sort()
+    print(f"Quartile error over {len(errors) // 3} keys with 100+ prices: "
+          f"median {errors[len(errors) // 2]:.2%}, worst {errors[-1]:.2%}")
+
+    tracemalloc.start()
+    traced = PriceStats(max_keys=args.max_keys)
+    for row in rows[:50_000]:
+        traced.add(*row)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Memory: {current / 2**20:.1f} MiB for {len(traced)} keys ({current / len(traced):.0f} bytes per key)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "deals.db"))
+        vinted_bot.init_schema(conn)
+        with conn:
+            conn.executemany(
+                "INSERT INTO items (item_id, title, status, price_cents, currency, team, brand, size) "
+                "VALUES (?, 't', 'approved', ?, ?, ?, ?, ?)",
+                ((str(i),) + row for i, row in enumerate(rows)),
+            )
+        started = time.perf_counter()
+        PriceStats(max_keys=args.max_keys).load(conn, limit=vinted_bot.CONFIG["DEAL_WARMUP_ROWS"])
+        replay = time.perf_counter() - started
+        started = time.perf_counter()
+        PriceStats(max_keys=args.max_keys).load(conn)
+        restore = time.perf_counter() - started
+        conn.close()
+    print(f"Start-up: first run replays {vinted_bot.CONFIG['DEAL_WARMUP_ROWS']:,} rows in {replay * 1000:.0f} ms, "
+          f"later runs restore the saved keys in {restore * 1000:.1f} ms")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+IMPORT TIME BENCHMARK
+Cold-starts a fresh interpreter that imports vinted_bot, as the hourly
+GitHub Actions job and test_bot.py do, and checks the import stays under
+a time budget without pulling in Selenium, webdriver-manager or requests
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("selenium", "webdriver_manager", "requests")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import vinted_bot
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY_MODULES,)
+
+def measure_import(python: str = sys.executable, cwd: str = None) -> dict:
+    """Import vinted_bot in a new interpreter; return its time and heavy modules loaded"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    output = subprocess.run([python, "-c", PROBE], env=env, cwd=cwd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="median import time allowed")
+    args = parser.parse_args()
+    
+    measure_import()  # warm-up: writes the bytecode cache
+    runs = [measure_import() for _ in range(args.runs)]
+    times = sorted(run["seconds"] * 1000 for run in runs)
+    median = statistics.median(times)
+    loaded = sorted({module for run in runs for module in run["modules"]})
+    
+    print(f"import vinted_bot: median {median:.1f} ms | min {times[0]:.1f} ms | max {times[-1]:.1f} ms over {args.runs} runs")
+    print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+    
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"import pulled in {', '.join(loaded)}")
+    for message in failures:
+        print(f"❌ {message}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+KEYWORD MATCHER BENCHMARK
+Compares the compiled single-pass matcher with the old per-list linear scans
+as the keyword lists grow
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import KeywordMatcher
+
+TITLES = 20000
+
+def linear_verdict(title, rules):
+    """The pre-matcher validation: one lowercase + linear scan per list"""
+    text = title.lower()
+    if any(k in text for k in rules["forbidden"]) or any(k in text for k in rules["age"]):
+        return False
+    if not any(k in text for k in rules["combos"]):
+        if not (any(k in text for k in rules["jacket"]) and any(k in text for k in rules["pants"])):
+            return False
+    return any(k in text for k in rules["teams"])
+
+def linear_hits(title, rules):
+    """Linear scan collecting every category hit, like the matcher does"""
+    text = title.lower()
+    return {category: [k for k in words if k in text] for category, words in rules.items()}
+
+def grow(words, extra, prefix):
+    return set(words) | {f"{prefix}{i:04d}" for i in range(extra)}
+
+def run(extra: int):
+    rules = {
+        "forbidden": grow(vinted_bot.FORBIDDEN_KEYWORDS, extra, "vietato"),
+        "age": grow(vinted_bot.FORBIDDEN_AGE_KEYWORDS, extra // 4, "eta"),
+        "teams": grow(vinted_bot.APPROVED_TEAMS, extra, "squadra"),
+        "brands": grow(vinted_bot.APPROVED_BRANDS, extra // 4, "marca"),
+        "combos": set(vinted_bot.APPROVED_COMBINATIONS),
+        "jacket": set(vinted_bot.JACKET_KEYWORDS),
+        "pants": set(vinted_bot.PANTS_KEYWORDS),
+    }
+    vocabulary = sorted(set().union(*rules.values())) + ["nuova", "taglia", "xl", "originale", "2023"]
+    random.seed(42)
+    titles = [" ".join(random.choice(vocabulary) for _ in range(random.randint(3, 9))) for _ in range(TITLES)]
+    
+    started = time.perf_counter()
+    matcher = KeywordMatcher(rules)
+    compile_ms = (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    for title in titles:
+        linear_verdict(title, rules)
+    linear = TITLES / (time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    for title in titles:
+        linear_hits(title, rules)
+    linear_all = TITLES / (time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    for title in titles:
+        matcher.match(title).is_valid
+    compiled = TITLES / (time.perf_counter() - started)
+    
+    keywords = sum(len(words) for words in rules.values())
+    print(
+        f"{keywords:6d} keywords | compile {compile_ms:6.1f} ms | "
+        f"linear short-circuit {linear:9,.0f}/s | linear all hits {linear_all:9,.0f}/s | "
+        f"compiled {compiled:9,.0f}/s"
+    )
+
+if __name__ == "__main__":
+    for extra in (0, 100, 300, 1000):
+        run(extra)
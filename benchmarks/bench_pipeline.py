@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+PIPELINE REPLAY BENCHMARK
+Replays recorded catalog fixtures through extraction, validation, dedup
+and storage with a fake browser (or a local HTTP stub), reports items/sec,
+p50/p99 latency per stage and peak memory, and exits non-zero when
+throughput falls more than --max-regression below pipeline_baseline.json
+or under the --min-throughput floor. Runs fully offline; run_test.sh runs it.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay import CatalogStubServer, ReplayDriver, load_fixture, parse_catalog_html, synthetic_pages
+from vinted_bot import BrowserPool, HttpFetcher, ItemStore, SeleniumFetcher, SeenCache, validate_item
+
+STAGES = ("extract", "dedup", "validate", "save")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def _replay(fetcher, pages: int, store: ItemStore, timings=None):
+    """Push every page through the pipeline; return the number of items extracted"""
+    total = 0
+    for page in range(1, pages + 1):
+        marks = [time.perf_counter()]
+        items = fetcher.fetch("tuta calcio", "www.vinted.it", page)
+        marks.append(time.perf_counter())
+        by_id = {item["id"]: item for item in items}
+        unseen = store.filter_unseen(list(by_id))
+        marks.append(time.perf_counter())
+        rows = []
+        for item_id in unseen:
+            item = by_id[item_id]
+            verdict, reason = validate_item(item)
+            item.team, item.brand = verdict.team, verdict.brand or item.brand
+            rows.append(item.to_row("approved") if reason == "Valid" else item.to_row("rejected", reason))
+        marks.append(time.perf_counter())
+        store.save_items_batch(rows)
+        marks.append(time.perf_counter())
+        total += len(items)
+        if timings is not None:
+            for stage, start, end in zip(STAGES, marks, marks[1:]):
+                timings[stage].append(end - start)
+    return total
+
+def _with_fetcher(backend: str, pages: list, func):
+    if backend == "selenium":
+        fetcher = SeleniumFetcher(BrowserPool(factory=lambda: ReplayDriver(pages), size=1))
+        try:
+            return func(fetcher)
+        finally:
+            fetcher.close()
+    with CatalogStubServer(pages) as server:
+        fetcher = HttpFetcher(base_url=server.url)
+        try:
+            return func(fetcher)
+        finally:
+            fetcher.close()
+
+def run_benchmark(backend: str = "selenium", pages: int = 200, per_page: int = 30):
+    """Replay ``pages`` synthetic newest-first pages and return the measurements"""
+    if backend == "selenium":
+        template = parse_catalog_html(load_fixture("vinted_catalog_page1.html"))
+    else:
+        template = json.loads(load_fixture("vinted_catalog_page1.json"))["items"]
+    replay_pages = synthetic_pages(template, pages, per_page)
+    
+    # Keep one-off costs such as the lazy Selenium import out of the timings
+    _with_fetcher(backend, replay_pages, lambda f: f.fetch("tuta calcio", "www.vinted.it", 1))
+    
+    timings = {stage: [] for stage in STAGES}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ItemStore(os.path.join(tmp, "timed.db"), seen=SeenCache(100_000))
+        started = time.perf_counter()
+        total = _with_fetcher(backend, replay_pages, lambda f: _replay(f, pages, store, timings))
+        elapsed = time.perf_counter() - started
+        stored = store.count()
+        store.close()
+        
+        # Separate pass for memory: tracemalloc would skew the timings
+        store = ItemStore(os.path.join(tmp, "traced.db"), seen=SeenCache(100_000))
+        tracemalloc.start()
+        _with_fetcher(backend, replay_pages, lambda f: _replay(f, pages, store))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        store.close()
+    
+    return {
+        "backend": backend,
+        "pages": pages,
+        "items": total,
+        "stored": stored,
+        "items_per_sec": total / elapsed,
+        "peak_mib": peak / (1024 * 1024),
+        "stages": {
+            stage: {"p50_ms": percentile(values, 0.50) * 1000, "p99_ms": percentile(values, 0.99) * 1000}
+            for stage, values in timings.items()
+        },
+    }
+
+def check_regression(result, baseline=None, max_regression: float = 0.3, min_throughput: float = 500.0):
+    """Return a list of failure messages (empty when the run is acceptable)"""
+    failures = []
+    if result["items_per_sec"] < min_throughput:
+        failures.append(f"{result['backend']}: {result['items_per_sec']:.0f} items/s below floor {min_throughput:.0f}")
+    reference = (baseline or {}).get(result["backend"])
+    if reference:
+        floor = reference["items_per_sec"] * (1 - max_regression)
+        if result["items_per_sec"] < floor:
+            failures.append(
+                f"{result['backend']}: {result['items_per_sec']:.0f} items/s is more than "
+                f"{max_regression:.0%} below baseline {reference['items_per_sec']:.0f}"
+            )
+    return failures
+
+def print_result(result):
+    print(f"\n{result['backend']}: {result['items']} items over {result['pages']} pages, {result['stored']} stored")
+    print(f"  throughput {result['items_per_sec']:,.0f} items/s | peak memory {result['peak_mib']:.1f} MiB")
+    for stage, entry in result["stages"].items():
+        print(f"  {stage:9s} p50 {entry['p50_ms']:8.3f} ms | p99 {entry['p99_ms']:8.3f} ms (per page)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=("selenium", "http", "both"), default="both")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=30)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--max-regression", type=float, default=0.3, help="allowed throughput drop vs baseline")
+    parser.add_argument("--min-throughput", type=float, default=500.0, help="absolute items/s floor")
+    parser.add_argument("--runs", type=int, default=3, help="runs per backend; the fastest counts, as noise only slows a run down")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    
+    logging.getLogger("vinted_bot").setLevel(logging.WARNING)
+    backends = ("selenium", "http") if args.backend == "both" else (args.backend,)
+    results = [
+        max((run_benchmark(backend, args.pages, args.per_page) for _ in range(args.runs)), key=lambda r: r["items_per_sec"])
+        for backend in backends
+    ]
+    for result in results:
+        print_result(result)
+    
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({r["backend"]: {"items_per_sec": r["items_per_sec"]} for r in results}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        sys.exit(0)
+    
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = [msg for r in results for msg in check_regression(r, baseline, args.max_regression, args.min_throughput)]
+    for message in failures:
+        print(f"❌ {message}")
+    sys.exit(1 if failures else 0)
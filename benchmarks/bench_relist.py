@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+RELIST INDEX BENCHMARK
+Fills a relist index with synthetic approved listings and times lookups
+(p50/p99) and the memory held by the index
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import Item, RelistIndex
+
+WORDS = ["completa", "felpa", "pantalone", "originale", "vintage", "nuova", "usata", "ufficiale", "training",
+         "allenamento", "stagione", "zip", "bambino", "uomo", "retro", "home", "away"]
+
+def listing(rng: random.Random, i: int) -> Item:
+    team = rng.choice(sorted(vinted_bot.APPROVED_TEAMS))
+    brand = rng.choice(sorted(vinted_bot.APPROVED_BRANDS))
+    extra = " ".join(rng.sample(WORDS, 3))
+    title = f"Tuta calcio {team} {brand} {extra} {rng.randint(1990, 2025)}"
+    return Item.parse(str(i), title, f"{rng.randint(10, 150)},00 €", "u",
+                      size=rng.choice(["S", "M", "L", "XL"]), seller=f"seller{rng.randint(0, 20000)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=5_000)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p99 lookup budget")
+    args = parser.parse_args()
+    
+    rng = random.Random(7)
+    items = [listing(rng, i) for i in range(args.entries)]
+    index = RelistIndex(window=7 * 86400, max_entries=args.entries + args.lookups)
+    started = time.perf_counter()
+    for item in items:
+        index.check(item, now=0)
+    print(f"Indexed {len(index):,} listings in {time.perf_counter() - started:.1f}s")
+    tracemalloc.start()
+    index = RelistIndex(window=7 * 86400, max_entries=args.entries + args.lookups)
+    for item in items:
+        index.check(item, now=0)
+    print(f"Index memory: {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MiB")
+    tracemalloc.stop()
+    
+    timings = []
+    caught = false_positives = 0
+    for i in range(args.lookups):
+        original = rng.choice(items)
+        relist = i % 2 == 1
+        if relist:  # same seller and size, a few more words, a slightly lower price
+            probe = Item.parse(f"r{i}", original.title + " come nuova", f"{original.price_cents * 0.9 / 100:.2f} €",
+                               "u", size=original.size, seller=original.seller)
+        else:
+            probe = listing(rng, args.entries + i)
+        started = time.perf_counter()
+        flagged = index.check(probe, now=1) is not None
+        timings.append((time.perf_counter() - started) * 1000)
+        caught += relist and flagged
+        false_positives += flagged and not relist
+    timings.sort()
+    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+    print(f"Lookups: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+    print(f"Planted relists caught: {caught}/{args.lookups // 2}, fresh listings flagged: {false_positives}")
+    sys.exit(1 if p99 > args.budget_ms else 0)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+REPORT QUERY BENCHMARK
+Fills an items table with millions of synthetic listings and times every
+report query against the secondary indexes (and the FTS5 title index)
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import connect_database, enable_fts, price_report, query_items, rejection_report
+
+REASONS = ["Forbidden keywords", "Not a complete tracksuit", "Team not approved", "Size not allowed"]
+
+def build_db(path: str, rows: int):
+    teams = sorted(vinted_bot.APPROVED_TEAMS)
+    brands = sorted(vinted_bot.APPROVED_BRANDS)
+    sizes = ["XS", "S", "M", "L", "XL", "XXL"]
+    random.seed(11)
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    
+    def generate():
+        for i in range(rows):
+            approved = random.random() < 0.15
+            team = random.choice(teams)
+            cents = random.randint(500, 15000)
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + i * 20))
+            yield (
+                str(4_000_000_000 + i), f"Tuta calcio {team} {random.choice(brands)} taglia {random.choice(sizes)}",
+                f"{cents / 100:.2f} €", team if approved else None, random.choice(brands),
+                "approved" if approved else "rejected", "", None if approved else random.choice(REASONS),
+                stamp, cents, "EUR", random.choice(sizes), f"seller{i % 5000}",
+            )
+    
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    vinted_bot.init_schema(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected, "
+            "timestamp, price_cents, currency, size, seller) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            generate(),
+        )
+    conn.close()
+
+def timed(label: str, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    size = len(result) if isinstance(result, list) else result.get("total")
+    print(f"  {label:38s} {elapsed:9.1f} ms  ({size} rows)")
+    return elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reports.db")
+        started = time.perf_counter()
+        build_db(path, args.rows)
+        print(f"Built {args.rows:,} rows with indexes in {time.perf_counter() - started:.1f}s")
+        conn = connect_database(path)
+        conn.execute("ANALYZE")
+        
+        started = time.perf_counter()
+        fts = enable_fts(conn)
+        print(f"FTS5 index: {'built in %.1fs' % (time.perf_counter() - started) if fts else 'unavailable'}")
+        
+        timings = [
+            timed("listings team=inter approved", lambda: query_items(conn, team="inter", status="approved")),
+            timed("listings brand=nike since August", lambda: query_items(conn, brand="nike", since="2025-08-01")),
+            timed("listings search 'juventus adidas'", lambda: query_items(conn, text="juventus adidas")),
+            timed("listings under 20 € size M", lambda: query_items(conn, size="M", max_price_cents=2000)),
+            timed("reasons (all time)", lambda: rejection_report(conn)),
+            timed("reasons (one month)", lambda: rejection_report(conn, "2025-06-01", "2025-07-01")),
+            timed("prices per team", lambda: price_report(conn)),
+        ]
+        conn.close()
+    
+    slowest = max(timings)
+    print(f"Slowest query: {slowest:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    sys.exit(1 if slowest > args.budget_ms else 0)
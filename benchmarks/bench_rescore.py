@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+RESCORE BENCHMARK
+Builds a large items table and re-validates it with 1..N worker processes,
+reporting rows/sec and speedup over the single-process run
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import init_schema, rescore_items
+
+def build_db(path: str, rows: int):
+    """Fill a table whose stored verdicts are all stale, so every row is rewritten"""
+    vocabulary = sorted(
+        vinted_bot.APPROVED_TEAMS | vinted_bot.APPROVED_BRANDS | vinted_bot.JACKET_KEYWORDS
+        | vinted_bot.PANTS_KEYWORDS | {"bambino", "nuova", "taglia", "originale", "completa", "2023"}
+    )
+    random.seed(7)
+    conn = sqlite3.connect(path)
+    init_schema(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO items (item_id, title, status) VALUES (?, ?, 'unknown')",
+            ((str(4_000_000_000 + i), " ".join(random.choices(vocabulary, k=random.randint(3, 9)))) for i in range(rows)),
+        )
+    conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    counts = sorted({1, 2, 4, 8, args.max_workers} & set(range(1, args.max_workers + 1)))
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in counts:
+            path = os.path.join(tmp, f"rescore_{workers}.db")
+            build_db(path, args.rows)
+            stats = rescore_items(path, workers=workers, chunk_size=args.chunk_size, progress=lambda done, total: None)
+            rate = stats["rows"] / stats["seconds"]
+            baseline = baseline or rate
+            print(f"{workers:2d} worker(s): {rate:10,.0f} rows/s | speedup {rate / baseline:4.2f}x | "
+                  f"approved {stats['approved']} | rejected {stats['rejected']}")
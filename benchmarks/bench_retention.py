@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+RETENTION BENCHMARK
+Fills a database with months of synthetic listings, then measures file
+size and existence-lookup latency before and after compaction, archival
+and incremental vacuum
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vinted_bot
+from vinted_bot import REJECTION_REASONS, ItemStore, SeenCache, archive_items, compact_rejected, incremental_vacuum
+
+WORDS = ["tuta", "calcio", "felpa", "pantalone", "completa", "vintage", "nuova", "originale", "bambino", "zip"]
+
+def build_db(path: str, rows: int, days: int, now: float):
+    random.seed(5)
+    teams = sorted(vinted_bot.APPROVED_TEAMS)
+    brands = sorted(vinted_bot.APPROVED_BRANDS)
+    
+    def generate():
+        for i in range(rows):
+            approved = random.random() < 0.1
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - days * 86400 * (1 - i / rows)))
+            team = random.choice(teams)
+            title = " ".join(random.sample(WORDS, 5)) + f" {team} {random.choice(brands)}"
+            cents = random.randint(500, 15000)
+            yield (
+                str(4_000_000_000 + i), title, f"{cents / 100:.2f} €", team if approved else None, random.choice(brands),
+                "approved" if approved else "rejected", f"https://www.vinted.it/items/{4_000_000_000 + i}-{title.replace(' ', '-')}",
+                None, stamp, cents, "EUR", random.choice(["S", "M", "L"]), f"seller{i % 5000}",
+                None if approved else random.choice(list(REJECTION_REASONS)),
+            )
+    
+    store = ItemStore(path, seen=SeenCache(1))
+    store.close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected, timestamp, "
+            "price_cents, currency, size, seller, reason_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            generate(),
+        )
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+def measure(path: str, rows: int, lookups: int):
+    """File size and filter_unseen latency for 30-id batches (mostly stored ids, a few new)"""
+    store = ItemStore(path, seen=SeenCache(1))  # no cache: every lookup reaches SQLite
+    rng = random.Random(9)
+    timings = []
+    for _ in range(lookups):
+        ids = [str(4_000_000_000 + rng.randrange(rows)) for _ in range(27)] + [str(5_000_000_000 + rng.randrange(10**6)) for _ in range(3)]
+        started = time.perf_counter()
+        store.filter_unseen(ids)
+        timings.append((time.perf_counter() - started) * 1000)
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    store.close()
+    timings.sort()
+    return os.path.getsize(path), timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+def report(label: str, measured):
+    size, p50, p99 = measured
+    print(f"  {label:22s} {size / 2**20:8.1f} MiB | lookup p50 {p50:.3f} ms | p99 {p99:.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "retention.db")
+        started = time.perf_counter()
+        build_db(path, args.rows, args.days, now)
+        print(f"Built {args.rows:,} rows over {args.days} days in {time.perf_counter() - started:.1f}s")
+        report("before", measure(path, args.rows, args.lookups))
+        
+        conn = vinted_bot.connect_database(path)
+        started = time.perf_counter()
+        compacted = compact_rejected(conn, days=vinted_bot.CONFIG["COMPACT_AFTER_DAYS"], now=now)
+        compact_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        segments = archive_items(conn, days=vinted_bot.CONFIG["ARCHIVE_AFTER_DAYS"], directory=os.path.join(tmp, "archive"), now=now)
+        archive_seconds = time.perf_counter() - started
+        archived = sum(os.path.getsize(segment) for segment in segments)
+        started = time.perf_counter()
+        freed = 0
+        while True:
+            step = incremental_vacuum(conn)
+            if not step:
+                break
+            freed += step
+        vacuum_seconds = time.perf_counter() - started
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        print(f"Compacted {compacted:,} rows in {compact_seconds:.1f}s | {len(segments)} archive segments "
+              f"({archived / 2**20:.1f} MiB) in {archive_seconds:.1f}s | freed {freed:,} pages in "
+              f"{vinted_bot.CONFIG['VACUUM_PAGES']}-page steps in {vacuum_seconds:.1f}s")
+        report("after retention", measure(path, args.rows, args.lookups))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+SEEN CACHE BENCHMARK
+Startup cost, memory and lookup speed of the bounded seen-id cache on a
+large items table, compared with plain per-id SQLite lookups
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vinted_bot import ItemStore, SeenCache, init_schema
+
+def build_db(path: str, rows: int):
+    conn = sqlite3.connect(path)
+    init_schema(conn)
+    base = 3_000_000_000
+    with conn:
+        conn.executemany(
+            "INSERT INTO items (item_id, title, status) VALUES (?, 't', 'rejected')",
+            ((str(base + i),) for i in range(rows)),
+        )
+    conn.close()
+    return base
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--capacity", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        base = build_db(path, args.rows)
+        
+        tracemalloc.start()
+        started = time.perf_counter()
+        store = ItemStore(path, seen=SeenCache(args.capacity))
+        load_s = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"rows {args.rows:,} | cache {len(store.seen):,} ids, {store.seen.stats()['bytes'] / 1e6:.1f} MB | load {load_s:.2f}s | peak {peak / 1e6:.1f} MB")
+        
+        # Newest-first pages: mostly recent ids plus a share of brand new ones
+        random.seed(7)
+        top = base + args.rows
+        ids = [str(random.randint(top - 5000, top + 500)) for _ in range(args.lookups)]
+        
+        started = time.perf_counter()
+        for item_id in ids:
+            store.exists(item_id)
+        cached = args.lookups / (time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        for item_id in ids:
+            store.conn.execute("SELECT 1 FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        direct = args.lookups / (time.perf_counter() - started)
+        
+        print(f"lookups/s | cache {cached:,.0f} | sqlite {direct:,.0f} | {store.seen.stats()}")
+        store.close()
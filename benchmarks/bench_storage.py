@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+STORAGE BENCHMARK
+Per-item connect/commit path vs ItemStore (one WAL connection, bulk
+filter_unseen and one transaction per cycle) on synthetic items
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vinted_bot import ItemStore, init_schema
+
+def synthetic_cycles(total: int, cycle_size: int, repeat: float):
+    """Newest-first style cycles: part of each page was already seen last cycle"""
+    next_id = 4_000_000_000
+    previous = []
+    produced = 0
+    while produced < total:
+        carried = previous[:int(cycle_size * repeat)]
+        fresh = []
+        while len(fresh) + len(carried) < cycle_size and produced < total:
+            fresh.append(str(next_id))
+            next_id += 1
+            produced += 1
+        page = fresh + carried
+        previous = page
+        yield [(i, f"Tuta calcio Nike Inter {i}", "25,00 €", "inter", "nike", "approved", f"https://www.vinted.it/items/{i}", None) for i in page]
+
+# The original save_item statement: the 8 columns the rows above carry
+LEGACY_INSERT_SQL = """
+    INSERT OR IGNORE INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def legacy_path(path: str, cycles):
+    """The original item_exists/save_item: a connection per call, a commit per row"""
+    conn = sqlite3.connect(path)
+    init_schema(conn)
+    conn.close()
+    for rows in cycles:
+        for row in rows:
+            conn = sqlite3.connect(path)
+            exists = conn.execute("SELECT 1 FROM items WHERE item_id = ?", (row[0],)).fetchone() is not None
+            conn.close()
+            if exists:
+                continue
+            conn = sqlite3.connect(path)
+            conn.execute(LEGACY_INSERT_SQL, row)
+            conn.commit()
+            conn.close()
+
+def store_path(path: str, cycles):
+    store = ItemStore(path)
+    for rows in cycles:
+        unseen = set(store.filter_unseen([row[0] for row in rows]))
+        store.save_items_batch([row for row in rows if row[0] in unseen])
+    store.close()
+
+def run(name, func, items, cycle_size, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        func(path, synthetic_cycles(items, cycle_size, repeat))
+        elapsed = time.perf_counter() - started
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        conn.close()
+    print(f"{name:8s} | {stored:7d} items | {elapsed:8.2f}s | {stored / elapsed:10,.0f} items/s")
+    return elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--cycle-size", type=int, default=30)
+    parser.add_argument("--repeat", type=float, default=0.5, help="share of each page already seen")
+    args = parser.parse_args()
+    
+    legacy = run("legacy", legacy_path, args.items, args.cycle_size, args.repeat)
+    store = run("store", store_path, args.items, args.cycle_size, args.repeat)
+    print(f"speedup x{legacy / store:.1f}")
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+BROWSER MODE COMPARISON (live)
+Loads the same catalog pages in "default" and "lean" browser modes and
+prints average bytes transferred and page-ready time per mode.
+Needs Chrome and network access.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vinted_bot import CONFIG, PAGE_STATS, BrowserPool, build_search_url, create_browser, fetch_vinted_items, page_stats_summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5, help="page loads per mode")
+    parser.add_argument("--search", default=CONFIG["SEARCH_TEXT"])
+    args = parser.parse_args()
+    
+    PAGE_STATS.clear()
+    for mode in ("default", "lean"):
+        CONFIG["BROWSER_MODE"] = mode
+        pool = BrowserPool(factory=lambda: create_browser(mode), size=1)
+        for page in range(1, args.pages + 1):
+            fetch_vinted_items(pool, build_search_url(args.search, page=page))
+        pool.close()
+    
+    for mode, entry in page_stats_summary().items():
+        print(f"{mode:8s} | {entry['pages']:3d} pages | {entry['avg_bytes'] / 1024:8.0f} KiB | {entry['avg_ready_seconds']:6.2f}s ready")
@@ -0,0 +1,180 @@
+"""
+OFFLINE REPLAY HELPERS
+Serve recorded catalog HTML/JSON fixtures to the scraper without a browser
+or network: a fake WebDriver for the Selenium path and a local stub server
+for the HTTP path
+"""
+
+import copy
+import json
+import os
+import re
+import sys
+import threading
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vinted_bot import COUNT_ITEMS_JS, EXTRACT_CARDS_JS, PAGE_STATS_JS, HttpFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+class CatalogHTMLParser(HTMLParser):
+    """Turn a recorded catalog page into the cards EXTRACT_CARDS_JS returns"""
+
+    def __init__(self):
+        super().__init__()
+        self.cards = []
+        self._card = None
+        self._in_link = False
+        self._testid = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        testid = attrs.get("data-testid") or ""
+        if testid == "grid-item":
+            self._card = {"lines": [], "price": None, "brand": None, "size": None, "image": None}
+        if self._card is None:
+            return
+        if tag == "img" and not self._card["image"]:
+            self._card["image"] = attrs.get("src")
+        elif tag == "a" and "/items/" in (attrs.get("href") or ""):
+            match = re.search(r"/items/(\d+)", attrs["href"])
+            self._card.update(id=match.group(1) if match else None, url=attrs["href"], title=attrs.get("title"))
+            self._in_link = True
+        for suffix, key in (("--price-text", "price"), ("--description-title", "brand"), ("--description-subtitle", "size")):
+            if testid.endswith(suffix):
+                self._testid = key
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._in_link = False
+        elif tag == "p":
+            self._testid = None
+
+    def handle_data(self, data):
+        if self._card is None or not data.strip():
+            return
+        if self._in_link:
+            self._card["lines"].append(data.strip())
+        elif self._testid:
+            self._card[self._testid] = data.strip()
+            if self._testid == "price" and self._card.get("id"):
+                self.cards.append(self._card)
+                self._card = None
+
+def parse_catalog_html(html: str):
+    parser = CatalogHTMLParser()
+    parser.feed(html)
+    return parser.cards
+
+def _reid(record: dict, old_id: str, new_id: str) -> dict:
+    record = copy.deepcopy(record)
+    for key, value in record.items():
+        if isinstance(value, str):
+            record[key] = value.replace(old_id, new_id)
+    record["id"] = new_id if isinstance(record.get("id"), str) else int(new_id)
+    return record
+
+def synthetic_pages(template: list, pages: int, per_page: int, overlap: float = 0.5, start_id: int = 5_000_000_000):
+    """Newest-first pages cycling the template, each repeating part of the previous one"""
+    next_id = start_id
+    previous = []
+    result = []
+    for _ in range(pages):
+        carried = previous[:int(per_page * overlap)]
+        fresh = []
+        while len(fresh) + len(carried) < per_page:
+            source = template[next_id % len(template)]
+            fresh.append(_reid(source, str(source["id"]), str(next_id)))
+            next_id += 1
+        page = list(reversed(fresh)) + carried
+        result.append(page)
+        previous = page
+    return result
+
+class ReplayElement:
+    """WebElement stand-in for the selector fallback path"""
+
+    def __init__(self, card: dict):
+        self.card = card
+        self.text = "\n".join(card["lines"])
+
+    def get_attribute(self, name):
+        return self.card["url"] if name == "href" else None
+
+class ReplayDriver:
+    """WebDriver stand-in that answers the scraper's scripts from recorded cards"""
+
+    def __init__(self, pages: list):
+        self.pages = pages
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self._cards = []
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+        page = int((parse_qs(urlparse(url).query).get("page") or ["1"])[0])
+        self._cards = self.pages[page - 1] if page <= len(self.pages) else []
+
+    def execute_script(self, script):
+        if script == COUNT_ITEMS_JS:
+            return len(self._cards)
+        if script == PAGE_STATS_JS:
+            return {"bytes": 0, "resources": 0}
+        if script == EXTRACT_CARDS_JS:
+            return copy.deepcopy(self._cards)
+        raise ValueError("unexpected script")
+
+    def find_elements(self, by, selector):
+        return [ReplayElement(card) for card in self._cards]
+
+    def quit(self):
+        pass
+
+class _CatalogHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            status, headers, body = 200, {"Set-Cookie": "access_token_web=replay; Path=/"}, b"<html></html>"
+        elif url.path == HttpFetcher.CATALOG_PATH:
+            page = int((parse_qs(url.query).get("page") or ["1"])[0])
+            items = self.server.pages[page - 1] if page <= len(self.server.pages) else []
+            status, headers, body = 200, {"Content-Type": "application/json"}, json.dumps({"items": items}).encode()
+        else:
+            status, headers, body = 404, {}, b""
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class CatalogStubServer:
+    """Local HTTP server replaying catalog JSON pages by ``page`` parameter"""
+
+    def __init__(self, pages: list):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _CatalogHandler)
+        self.server.pages = pages
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+POLLING SIMULATION
+Replays synthetic listing arrival traces through a fixed CHECK_INTERVAL
+schedule and through AdaptivePoller, comparing time-to-alert and fetches
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vinted_bot import CONFIG, AdaptivePoller
+
+DAY = 86400.0
+
+# (name, peak listings per hour, burst listings per hour added during evening bursts)
+QUERIES = [
+    ("hot", 90.0, 300.0),
+    ("warm", 12.0, 40.0),
+    ("cold", 0.5, 0.0),
+]
+
+def arrival_trace(peak_per_hour: float, burst_per_hour: float, days: float, rng: random.Random):
+    """Non-homogeneous Poisson arrivals: quiet nights, busy evenings, short bursts"""
+    def rate(t):
+        hour = (t % DAY) / 3600
+        diurnal = 0.15 + 0.85 * max(0.0, math.sin(math.pi * (hour - 7) / 16)) if 7 <= hour <= 23 else 0.15
+        burst = burst_per_hour if 20.5 <= hour <= 21.0 else 0.0
+        return (peak_per_hour * diurnal + burst) / 3600
+    
+    ceiling = (peak_per_hour + burst_per_hour) / 3600
+    t = 0.0
+    arrivals = []
+    while True:
+        t += rng.expovariate(ceiling)
+        if t >= days * DAY:
+            return arrivals
+        if rng.random() < rate(t) / ceiling:
+            arrivals.append(t)
+
+def replay(arrivals, next_interval, days: float, per_page: int, max_pages: int):
+    """Poll the trace; items beyond the page cap are skipped like the real crawler"""
+    now = 0.0
+    index = 0
+    fetches = 0
+    delays = []
+    missed = 0
+    while now < days * DAY:
+        start = index
+        while index < len(arrivals) and arrivals[index] <= now:
+            index += 1
+        new = index - start
+        pages = min(max_pages, max(1, math.ceil(new / per_page)))
+        fetches += pages
+        visible = min(new, per_page * max_pages)
+        missed += new - visible
+        # Newest listings are on the first pages
+        delays.extend(now - t for t in arrivals[index - visible:index])
+        now += next_interval(visible, now)
+    return fetches, delays, missed
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--fixed", type=float, default=120, help="fixed interval in seconds")
+    parser.add_argument("--target", type=float, default=CONFIG["TARGET_NEW_PER_POLL"], help="expected new listings per poll")
+    parser.add_argument("--max-interval", type=float, default=CONFIG["MAX_INTERVAL"])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    CONFIG["TARGET_NEW_PER_POLL"] = args.target
+    CONFIG["MAX_INTERVAL"] = args.max_interval
+    
+    per_page, max_pages = 30, CONFIG["MAX_PAGES"]
+    print(f"{'query':6s} {'schedule':9s} {'fetches':>8s} {'mean TTA':>9s} {'p95 TTA':>8s} {'missed':>7s}")
+    totals = {"fixed": [0, []], "adaptive": [0, []]}
+    for name, peak, burst in QUERIES:
+        arrivals = arrival_trace(peak, burst, args.days, random.Random(args.seed))
+        poller = AdaptivePoller(rng=random.Random(args.seed).random)
+        schedules = {
+            "fixed": lambda new, now: args.fixed,
+            "adaptive": lambda new, now: poller.record_success(name, new, now),
+        }
+        for schedule, next_interval in schedules.items():
+            fetches, delays, missed = replay(arrivals, next_interval, args.days, per_page, max_pages)
+            totals[schedule][0] += fetches
+            totals[schedule][1].extend(delays)
+            mean = sum(delays) / len(delays) if delays else 0.0
+            print(f"{name:6s} {schedule:9s} {fetches:8d} {mean:8.0f}s {percentile(delays, 0.95):7.0f}s {missed:7d}")
+    for schedule, (fetches, delays) in totals.items():
+        mean = sum(delays) / len(delays) if delays else 0.0
+        print(f"{'total':6s} {schedule:9s} {fetches:8d} {mean:8.0f}s {percentile(delays, 0.95):7.0f}s")
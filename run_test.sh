@@ -12,7 +12,7 @@ if ! command -v python3 &> /dev/null; then
     exit 1
 fi
 
-echo "[1/4] Installing dependencies..."
+echo "[1/5] Installing dependencies..."
 pip3 install -q -r requirements.txt
 if [ $? -ne 0 ]; then
     echo "[ERROR] Failed to install dependencies"
@@ -21,7 +21,7 @@ fi
 echo "[OK] Dependencies installed"
 echo ""
 
-echo "[2/4] Running comprehensive tests..."
+echo "[2/5] Running comprehensive tests..."
 python3 test_bot.py
 if [ $? -ne 0 ]; then
     echo "[ERROR] Tests failed"
@@ -29,15 +29,23 @@ if [ $? -ne 0 ]; then
 fi
 echo ""
 
-echo "[3/4] Checking database..."
+echo "[3/5] Checking pipeline throughput against benchmarks/pipeline_baseline.json..."
+python3 benchmarks/bench_pipeline.py
+if [ $? -ne 0 ]; then
+    echo "[ERROR] Pipeline throughput regressed"
+    exit 1
+fi
+echo ""
+
+echo "[4/5] Checking database..."
 if [ -f vinted_bot.db ]; then
     echo "[OK] Database created: vinted_bot.db"
 else
-    echo "[WARNING] Database not created yet"
+    echo "[OK] No database yet: the tests use a temporary one, the bot creates vinted_bot.db on its first run"
 fi
 echo ""
 
-echo "[4/4] Bot is ready!"
+echo "[5/5] Bot is ready!"
 echo ""
 echo "============================================================"
 echo " Next steps:"
@@ -6,7 +6,19 @@ Verifies all functions work correctly
 
 import sys
 import os
+import gzip
+import io
+import json
 import logging
+import random
+import tempfile
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -19,8 +31,86 @@ from vinted_bot import (
     init_database,
     item_exists,
     save_item,
-    create_session,
-    fetch_items,
+    fetch_vinted_items,
+    BrowserPool,
+    HttpFetcher,
+    SeleniumFetcher,
+    COUNT_ITEMS_JS,
+    PAGE_STATS_JS,
+    PAGE_STATS,
+    build_chrome_options,
+    release_profile_dir,
+    page_stats_summary,
+    wait_for_grid,
+    create_fetcher,
+    DomainRateLimiter,
+    Fetcher,
+    SearchQuery,
+    SearchScheduler,
+    load_searches,
+    KeywordMatcher,
+    MatchVerdict,
+    match_title,
+    ItemStore,
+    RelistIndex,
+    ORDINARY_PRICES,
+    P2Quantile,
+    PriceStats,
+    SeenCache,
+    get_store,
+    process_items,
+    process_stream,
+    REASON_SQL,
+    Retention,
+    archive_items,
+    compact_rejected,
+    ItemBatch,
+    DiscordChannel,
+    Notification,
+    NotificationChannel,
+    NotificationDispatcher,
+    TelegramChannel,
+    AdaptivePoller,
+    PollState,
+    SqliteJobBroker,
+    SqliteSeenStore,
+    create_shared_state,
+    run_worker,
+    IMAGE_SECONDS,
+    Checkpoint,
+    PHOTO_REJECTED,
+    ImageCache,
+    ImageClassifier,
+    ImageVerifier,
+    decode_reason,
+    get_image_verifier,
+    run_classify,
+    METRICS,
+    MetricsRegistry,
+    start_metrics_server,
+    rescore_chunk,
+    rescore_items,
+    Item,
+    normalize_size,
+    parse_catalog_payload,
+    parse_price,
+    connect_database,
+    enable_fts,
+    main,
+    RULE_HITS,
+    RulesWatcher,
+    apply_rules,
+    env_overrides,
+    load_settings,
+    restore_rules,
+    rule_snapshot,
+    check_size,
+    read_dotenv,
+    rule_hit_report,
+    price_report,
+    query_items,
+    rejection_report,
+    CONFIG,
     APPROVED_TEAMS,
     APPROVED_BRANDS,
     FORBIDDEN_KEYWORDS,
@@ -31,6 +121,50 @@ from vinted_bot import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name: str) -> bytes:
+    """Read a recorded response from the fixtures directory"""
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer requests from the server's route table and record them"""
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?")[0]
+        self.server.requests.append({"method": self.command, "path": self.path, "headers": dict(self.headers), "body": body})
+        route = self.server.routes.get(path)
+        status, headers, payload = route(self) if route else (404, {}, b"not found")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def stub_server(routes):
+    """Run a local HTTP server on a free port for the duration of a test"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.routes = routes
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
 def test_validation():
     """Test validation functions"""
     logger.info("\n" + "="*60)
@@ -75,68 +209,1523 @@ def test_validation():
         status = "✅" if has_forbidden else "❌"
         logger.info(f"{status} Keyword '{keyword}' -> Detected: {has_forbidden}")
 
+def test_rules_reload():
+    """Test env overrides, the rules file watcher and per-keyword hit counters"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 1b: RULES FILE")
+    logger.info("="*60)
+    
+    environ = {"CHECK_INTERVAL": "45", "HEADLESS": "false", "LOG_LEVEL": "debug", "DISCORD_WEBHOOK_URL": "",
+               "SEARCHES": '[{"search_text": "tuta", "domain": "www.vinted.es"}]', "METRICS_PORT": ""}
+    overrides = env_overrides(environ, dotenv_path=None)
+    assert overrides == {"CHECK_INTERVAL": 45, "HEADLESS": False, "LOG_LEVEL": logging.DEBUG, "DISCORD_WEBHOOK_URL": "",
+                         "SEARCHES": [{"search_text": "tuta", "domain": "www.vinted.es"}]}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        dotenv = os.path.join(tmp, ".env")
+        with open(dotenv, "w") as f:
+            f.write("# comment\nDB_NAME='other.db'\nMAX_PAGES=2\n")
+        assert read_dotenv(dotenv) == {"DB_NAME": "other.db", "MAX_PAGES": "2"}
+        assert env_overrides({"MAX_PAGES": "4"}, dotenv) == {"DB_NAME": "other.db", "MAX_PAGES": 4}
+        
+        path = os.path.join(tmp, "rules.json")
+        def write(data):
+            with open(path, "w") as f:
+                f.write(data if isinstance(data, str) else json.dumps(data))
+        
+        saved = {key: CONFIG[key] for key in ("MAX_PAGES", "DB_NAME", "RULES_FILE")}
+        environ = {"RULES_FILE": path, "MAX_PAGES": "3"}
+        try:
+            # At startup every key in the file applies, startup-only ones included; the environment still wins
+            write({"rules": {"approved_teams": ["Lazio"]},
+                   "config": {"MAX_PAGES": 2, "DB_NAME": "rules.db", "DEAL_SCORE_THRESHOLD": "0.5"}})
+            load_settings(environ, dotenv_path=None)
+            assert match_title("Tuta calcio Lazio").is_valid and not match_title("Tuta calcio Inter").is_valid
+            assert CONFIG["MAX_PAGES"] == 3 and CONFIG["DB_NAME"] == "rules.db" and CONFIG["DEAL_SCORE_THRESHOLD"] == 0.5
+            
+            # A reload swaps the rules and use-time settings, but not what was built at startup
+            watcher = RulesWatcher(path, interval=0.05, environ=environ, dotenv_path=None)
+            assert watcher.check() and not watcher.check()
+            write({"rules": {"approved_teams": ["Lazio"]},
+                   "config": {"MAX_PAGES": 5, "DB_NAME": "other.db", "DEAL_SCORE_THRESHOLD": 0.3}})
+            assert watcher.check()
+            assert CONFIG["DB_NAME"] == "rules.db" and CONFIG["MAX_PAGES"] == 3 and CONFIG["DEAL_SCORE_THRESHOLD"] == 0.3
+            
+            # A broken file is rejected and the current rules stay
+            write('{"rules": {"approved_teams": "inter"}}')
+            assert not watcher.check()
+            assert match_title("Tuta calcio Lazio").is_valid
+            
+            watcher.start()
+            try:
+                write({"rules": {"approved_teams": ["inter", "lazio"], "allowed_sizes": ["m"]}})
+                deadline = time.monotonic() + 5
+                while not match_title("Tuta calcio Inter").is_valid and time.monotonic() < deadline:
+                    time.sleep(0.02)
+                assert match_title("Tuta calcio Inter").is_valid and match_title("Tuta calcio Lazio").is_valid
+                assert CONFIG["DEAL_SCORE_THRESHOLD"] == 0.15  # dropped from the file: back to the default
+                assert CONFIG["DB_NAME"] == "rules.db"
+            finally:
+                watcher.stop()
+        finally:
+            apply_rules({}, environ={}, dotenv_path=None)
+            CONFIG.update(saved)
+    assert match_title("Tuta calcio Inter").is_valid and not match_title("Tuta calcio Lazio").is_valid
+    assert CONFIG["MAX_PAGES"] == saved["MAX_PAGES"] and CONFIG["DB_NAME"] == saved["DB_NAME"]
+    assert CONFIG["DEAL_SCORE_THRESHOLD"] == 0.15
+    
+    before = RULE_HITS.value(category="teams", keyword="juventus")
+    with temp_database():
+        process_items([{"id": "9301", "title": "Tuta calcio Juventus Adidas", "price": "30 €", "url": ""}])
+    assert RULE_HITS.value(category="teams", keyword="juventus") == before + 1
+    report = rule_hit_report()
+    assert report["brands"]["adidas"] >= 1 and "kappa" in report["brands"]
+    logger.info("✅ Rules reloaded atomically and hits counted")
+
+def test_keyword_matcher():
+    """Test the compiled single-pass keyword matcher"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 1c: KEYWORD MATCHER")
+    logger.info("="*60)
+    
+    verdict = match_title("Tuta calcio Nike Inter XL")
+    logger.info(f"✅ {verdict}")
+    assert verdict.teams == ("inter",) and verdict.brand == "nike"
+    assert verdict.combos == ("tuta calcio",) and verdict.jacket == ("tuta",)
+    assert verdict.is_valid and verdict.reason == "Valid"
+    
+    verdict = match_title("Tuta Real Madrid Adidas bambino 10 anni")
+    assert verdict.forbidden == ("bambino",) and verdict.age == ("anni",)
+    assert verdict.reason == "Forbidden keywords"
+    assert match_title("Felpa Juventus Nike").reason == "Not a complete tracksuit"
+    assert match_title("Tracksuit Nike Sampdoria").reason == "Team not approved"
+    assert match_title("") == MatchVerdict()
+    
+    # Overlapping keywords and title order
+    matcher = KeywordMatcher({"a": ["he", "she", "his", "hers"], "b": ["hers"]})
+    assert matcher.scan("ushers") == [(1, "she"), (2, "he"), (2, "hers")]
+    verdict = match_title("Completo PSG Manchester City felpa pantalone")
+    assert verdict.teams == ("psg", "manchester city")
+    assert verdict.combos == ("completo",)
+    assert check_forbidden_keywords("Shorts Chelsea") and not check_forbidden_keywords(None)
+
+@contextmanager
+def temp_database():
+    """Point CONFIG["DB_NAME"] at a throwaway database"""
+    saved = CONFIG["DB_NAME"]
+    with tempfile.TemporaryDirectory() as tmp:
+        CONFIG["DB_NAME"] = os.path.join(tmp, "test.db")
+        try:
+            yield CONFIG["DB_NAME"]
+        finally:
+            get_store().close()
+            CONFIG["DB_NAME"] = saved
+
 def test_database():
     """Test database functions"""
     logger.info("\n" + "="*60)
     logger.info("🧪 TEST 2: DATABASE FUNCTIONS")
     logger.info("="*60)
     
-    try:
-        # Initialize database
-        logger.info("📝 Initializing database...")
-        init_database()
-        logger.info("✅ Database initialized successfully")
-        
-        # Test save and retrieve
-        test_item = {
-            "id": "test_item_12345",
-            "title": "Tuta calcio Nike Inter M",
-            "price": "€25.99",
-            "url": "https://www.vinted.it/items/123"
+    with temp_database():
+        try:
+            # Initialize database
+            logger.info("📝 Initializing database...")
+            init_database()
+            logger.info("✅ Database initialized successfully")
+            
+            # Test save and retrieve
+            test_item = {
+                "id": "test_item_12345",
+                "title": "Tuta calcio Nike Inter M",
+                "price": "€25.99",
+                "url": "https://www.vinted.it/items/123"
+            }
+            
+            logger.info(f"💾 Saving test item...")
+            save_item(test_item["id"], test_item["title"], test_item["price"], test_item["url"], "approved", "inter")
+            logger.info("✅ Item saved")
+            
+            logger.info(f"🔍 Checking if item exists...")
+            exists = item_exists("test_item_12345")
+            if exists:
+                logger.info("✅ Item retrieved from database")
+            else:
+                logger.warning("❌ Item not found in database")
+        
+        except Exception as e:
+            logger.error(f"❌ Database test failed: {e}")
+
+def test_item_store():
+    """Test the long-lived store with bulk lookups and batched writes"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2b: ITEM STORE")
+    logger.info("="*60)
+    
+    with temp_database() as path:
+        store = ItemStore(path)
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        rows = [(str(i), f"Tuta {i}", "10 €", None, None, "rejected", "", "Team not approved") for i in range(1000)]
+        store.save_items_batch(rows)
+        ids = [str(i) for i in range(990, 1010)] + ["1005"]
+        assert store.filter_unseen(ids) == [str(i) for i in range(1000, 1010)]
+        assert store.count() == 1000
+        store.close()
+        
+        items = [
+            {"id": "5001", "title": "Tuta calcio Nike Inter M", "price": "30 €", "url": "u1"},
+            {"id": "5002", "title": "Shorts Chelsea", "price": "5 €", "url": "u2"},
+            {"id": "5002", "title": "Shorts Chelsea", "price": "5 €", "url": "u2"},
+        ]
+        assert process_items(items) == (2, 1)
+        assert process_items(items) == (0, 0)
+        assert item_exists("5001") and item_exists("5002") and not item_exists("5003")
+        row = get_store().conn.execute("SELECT status, team, brand FROM items WHERE item_id = '5001'").fetchone()
+        assert row == ("approved", "inter", "nike")
+        logger.info("✅ Bulk dedup and batched writes OK")
+
+def test_item_model():
+    """Test parsed prices and sizes, typed columns and the schema migration"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2c: ITEM MODEL")
+    logger.info("="*60)
+    
+    assert parse_price("35,00 €") == (3500, "EUR")
+    assert parse_price("€1.234,5") == (123450, "EUR")
+    assert parse_price("£12.99") == (1299, "GBP")
+    assert parse_price("1 200 zł") == (120000, "PLN")
+    assert parse_price("40 EUR") == (4000, "EUR")
+    assert parse_price("N/A") == (None, None)
+    assert normalize_size("m / 38 / 10") == "M" and normalize_size("XL") == "XL"
+    assert normalize_size("140 cm") == "140 cm" and normalize_size("  ") is None
+    
+    item = Item.parse("1", "Tuta calcio Inter taglia s", "30,00 €", "u")
+    assert (item.price_cents, item.currency, item.size) == (3000, "EUR", "S")
+    assert item["title"] == item.title and item.get("seller") is None and item.get("nope", 1) == 1
+    assert Item.coerce({"id": "1", "title": item.title, "price": "30,00 €", "url": "u"}) == item
+    
+    payload = json.loads(load_fixture("vinted_catalog_page1.json"))
+    first = parse_catalog_payload(payload)[0]
+    assert (first.price_cents, first.size, first.brand, first.seller) == (3500, "M", "Nike", "marco_91")
+    
+    with temp_database() as path:
+        items = [
+            {"id": "6001", "title": "Tuta calcio Nike Inter", "price": "30,00 €", "url": "u", "size": "M"},
+            {"id": "6002", "title": "Tuta calcio Nike Inter", "price": "30,00 €", "url": "u", "size": "XXL"},
+            {"id": "6003", "title": "Tuta calcio Nike Inter", "price": "30,00 €", "url": "u", "size": "152 cm"},
+        ]
+        assert process_items(items) == (3, 1)
+        rows = get_store().conn.execute(
+            "SELECT item_id, status, reason_code, reason_rejected, price_cents, size FROM items ORDER BY item_id"
+        ).fetchall()
+        assert rows == [
+            ("6001", "approved", None, None, 3000, "M"),
+            ("6002", "rejected", 4, None, 3000, "XXL"),
+            ("6003", "rejected", 4, None, 3000, "152 cm"),
+        ]
+        get_store().close()
+    
+    # A database created before the typed columns existed
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE items (item_id TEXT PRIMARY KEY, title TEXT NOT NULL, price TEXT, team TEXT, brand TEXT,
+                                status TEXT, vinted_url TEXT, reason_rejected TEXT,
+                                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
+        """)
+        conn.execute(
+            "INSERT INTO items (item_id, title, price, status, reason_rejected) VALUES ('1', 'Tuta', '12,50 €', 'rejected', 'Team not approved')"
+        )
+        conn.commit()
+        conn.close()
+        store = ItemStore(path)
+        assert store.conn.execute("SELECT price_cents, currency, size, reason_code, reason_rejected FROM items").fetchone() == (
+            1250, "EUR", None, 3, None
+        )
+        indexes = {row[1] for row in store.conn.execute("PRAGMA index_list(items)")}
+        assert {"idx_items_price", "idx_items_size"} <= indexes
+        store.close()
+    logger.info("✅ Typed item fields parsed, enforced and stored")
+
+def test_reports():
+    """Test the report queries, their indexes, FTS search and the report command"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2d: REPORTS")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.db")
+        conn = connect_database(path)
+        rows = [
+            ("1", "Tuta Inter Nike", "30,00 €", "inter", "nike", "approved", "", None, "2026-01-05 10:00:00", 3000, "EUR", "M", "a"),
+            ("2", "Tuta Inter Adidas", "50,00 €", "inter", "adidas", "approved", "", None, "2026-01-06 10:00:00", 5000, "EUR", "L", "b"),
+            ("3", "Tuta Inter Puma", "90,00 €", "inter", "puma", "approved", "", None, "2026-02-01 10:00:00", 9000, "EUR", "S", "c"),
+            ("4", "Tuta Roma Nike", "20,00 €", "roma", "nike", "approved", "", None, "2026-02-02 10:00:00", 2000, "EUR", "M", "d"),
+            ("5", "Tuta Chelsea bambino", "10,00 €", None, None, "rejected", "", "Forbidden keywords", "2026-01-07 10:00:00", 1000, "EUR", None, "e"),
+            ("6", "Tuta Lazio", "15,00 €", None, None, "rejected", "", "Team not approved", "2026-02-03 10:00:00", 1500, "EUR", "M", "f"),
+        ]
+        with conn:
+            conn.executemany(
+                "INSERT INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected, "
+                "timestamp, price_cents, currency, size, seller) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(items)")}
+        assert {"idx_items_reason", "idx_items_team_currency", "idx_items_timestamp"} <= indexes
+        
+        assert [r["item_id"] for r in query_items(conn, team="Inter")] == ["3", "2", "1"]
+        assert [r["item_id"] for r in query_items(conn, status="approved", since="2026-02-01")] == ["4", "3"]
+        assert [r["item_id"] for r in query_items(conn, size="M", max_price_cents=2500)] == ["6", "4"]
+        assert [r["item_id"] for r in query_items(conn, text="nike")] == ["4", "1"]
+        
+        report = rejection_report(conn)
+        assert report["total"] == 6 and report["approved"] == 4 and abs(report["approval_rate"] - 4 / 6) < 1e-9
+        assert {r["reason"]: r["count"] for r in report["reasons"]} == {"Forbidden keywords": 1, "Team not approved": 1}
+        assert rejection_report(conn, until="2026-02-01")["total"] == 3
+        
+        # A listing in another currency gets its own row instead of skewing the euro prices
+        with conn:
+            conn.execute("INSERT INTO items (item_id, title, team, status, price_cents, currency) "
+                         "VALUES ('8', 'Tuta Inter Kappa', 'inter', 'approved', 8000, 'PLN')")
+        prices = price_report(conn)
+        assert prices[0] == {"team": "inter", "currency": "EUR", "count": 3, "min": 3000, "median": 5000, "avg": 5667, "max": 9000}
+        assert {"team": "inter", "currency": "PLN", "count": 1, "min": 8000, "median": 8000, "avg": 8000, "max": 8000} in prices
+        
+        # Full-text search follows inserts once the index exists
+        if enable_fts(conn):
+            with conn:
+                conn.execute("INSERT INTO items (item_id, title, status) VALUES ('7', 'Felpa Nike vintage', 'rejected')")
+            assert [r["item_id"] for r in query_items(conn, text="nike", limit=2)][0] == "7"
+            assert [r["item_id"] for r in query_items(conn, text="nike inter")] == ["1"]
+        conn.close()
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(["report", "prices", "--db", path])
+        assert "inter  PLN" in output.getvalue() and "inter  EUR       3" in output.getvalue()
+    logger.info("✅ Reports answered from the indexes")
+
+def test_seen_cache():
+    """Test the bounded seen-id cache in front of the items table"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2e: SEEN CACHE")
+    logger.info("="*60)
+    
+    cache = SeenCache(capacity=100)
+    for i in range(1000, 1250):
+        cache.add(str(i))
+    assert len(cache) <= 100 and cache.floor >= 1149
+    assert cache.lookup("1249") is True
+    assert cache.lookup("1250") is False
+    assert cache.lookup("1000") is None  # evicted, the DB decides
+    assert cache.lookup("test_item") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1 and cache.stats()["fallbacks"] == 2
+    
+    with temp_database() as path:
+        store = ItemStore(path, seen=SeenCache(capacity=1000))
+        rows = [(str(i), "t", "p", None, None, "rejected", "", None) for i in range(1, 20001)]
+        rows.append(("legacy_id", "t", "p", None, None, "rejected", "", None))
+        store.save_items_batch(rows)
+        store.close()
+        
+        # Reopening loads only the newest ids: memory stays bounded
+        store = ItemStore(path, seen=SeenCache(capacity=1000))
+        assert len(store.seen) == 1000 and store.seen.floor == 19000
+        assert store.filter_unseen(["19999", "20001", "5", "legacy_id", "legacy_new"]) == ["20001", "legacy_new"]
+        stats = store.seen.stats()
+        logger.info(f"✅ Cache stats: {stats}")
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["fallbacks"] == 3
+        store.save_items_batch([("20001", "t", "p", None, None, "approved", "", None)])
+        assert store.exists("20001") and store.seen.hits == 2
+        store.close()
+
+def test_relist_detection():
+    """Test relists are linked to the original listing and not notified twice"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2f: RELIST DETECTION")
+    logger.info("="*60)
+    
+    def listing(item_id, title, price="30,00 €", seller="marco_91", size=None):
+        return Item.parse(item_id, title, price, "u", size=size, seller=seller)
+    
+    index = RelistIndex(window=3600, max_entries=100, min_similarity=0.6, price_tolerance=0.2)
+    assert index.check(listing("1", "Tuta calcio Nike Inter completa taglia M"), now=0) is None
+    assert index.check(listing("2", "Tuta calcio Nike Inter completa M", "32,00 €"), now=10) == "1"
+    assert index.check(listing("3", "Tuta calcio Nike Inter completa taglia L"), now=20) is None  # other size
+    assert index.check(listing("4", "Tuta calcio Nike Inter completa taglia M", "45,00 €"), now=30) is None
+    assert index.check(listing("5", "Tuta calcio Nike Inter completa taglia M", seller="anna"), now=40) is None
+    assert index.check(listing("6", "Tuta calcio Adidas Juventus completa taglia M"), now=50) is None
+    assert len(index) == 5
+    # Matching keeps an entry alive; the others expire after the window
+    assert index.check(listing("7", "Tuta calcio Nike Inter completa taglia M come nuova"), now=3000) == "1"
+    assert index.check(listing("8", "Tuta calcio Nike Inter completa taglia L"), now=3700) is None
+    assert len(index) == 2
+    
+    small = RelistIndex(window=3600, max_entries=3)
+    for i in range(10):
+        small.check(listing(str(i), f"Tuta Roma Kappa {i} {i * 7} {i * 13}"), now=i)
+    assert len(small) == 3
+    
+    with temp_database() as path:
+        items = [
+            {"id": "9001", "title": "Tuta Juventus Adidas felpa e pantalone", "price": "40,00 €", "url": "u"},
+            {"id": "9002", "title": "Tuta calcio Nike Inter completa", "price": "30,00 €", "url": "u"},
+        ]
+        assert process_items(items) == (2, 2)
+        relist = {"id": "9003", "title": "Tuta Juventus adidas felpa + pantalone", "price": "38,00 €", "url": "u"}
+        assert process_items([relist]) == (1, 0)
+        # Within one batch the second copy is caught when the first is indexed
+        twins = [{"id": "9005", "title": "Tuta Roma Kappa completa M", "price": "25,00 €", "url": "u"},
+                 {"id": "9006", "title": "Tuta Roma Kappa completa M", "price": "25,00 €", "url": "u"}]
+        assert process_items(twins) == (2, 1)
+        rows = get_store().conn.execute("SELECT item_id, status, duplicate_of FROM items ORDER BY item_id").fetchall()
+        assert rows == [("9001", "approved", None), ("9002", "approved", None), ("9003", "approved", "9001"),
+                        ("9005", "approved", None), ("9006", "approved", "9005")]
+        
+        # An ordinary price is not notified but still indexed, the same way a restart indexes it
+        for _ in range(CONFIG["DEAL_MIN_SAMPLES"]):
+            get_store().prices.add(3000, "EUR", "arsenal", None, None)
+        assert process_items([{"id": "9010", "title": "Tuta calcio Arsenal completa", "price": "30,00 €", "url": "u"}]) == (1, 0)
+        probes = [Item.parse("9011", "Tuta calcio Arsenal completa", "29,00 €", "u"),
+                  Item.parse("9012", "Tuta Roma Kappa completa M", "25,00 €", "u"),
+                  Item.parse("9013", "Tuta calcio Nike Inter completa", "29,00 €", "u")]
+        before = [get_store().relists.find(probe) for probe in probes]
+        assert before == ["9010", "9005", "9002"]
+        
+        # A restart warms the index from the database, without the relists themselves
+        store = ItemStore(path)
+        assert len(store.relists) == 4
+        assert [store.relists.find(probe) for probe in probes] == before
+        store.close()
+    logger.info("✅ Relists linked to their original listing")
+
+def test_retention():
+    """Test reason codes, compaction, archival and incremental vacuum"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2g: RETENTION")
+    logger.info("="*60)
+    
+    now = time.mktime((2026, 6, 1, 12, 0, 0, 0, 0, -1))
+    
+    def stamp(days_ago):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - days_ago * 86400))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "retention.db")
+        store = ItemStore(path)
+        assert store.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        rows = [
+            ("1", "Tuta Inter Nike", "approved", None, 100),
+            ("2", "Tuta Chelsea bambino", "rejected", "Forbidden keywords", 100),
+            ("3", "Tuta Lazio Nike", "rejected", "Team not approved", 10),
+            ("4", "Tuta Inter Puma", "approved", None, 10),
+            ("5", "Felpa generica", "rejected", "Not a complete tracksuit", 1),
+            ("6", "Tuta Roma", "rejected", "Sold out", 10),
+        ]
+        store.save_items_batch([(item_id, title, "p", None, None, status, "u", reason) for item_id, title, status, reason, _ in rows])
+        with store.conn:
+            store.conn.executemany("UPDATE items SET timestamp = ? WHERE item_id = ?", [(stamp(age), r[0]) for *r, age in rows])
+        assert store.conn.execute("SELECT reason_code, reason_rejected FROM items WHERE item_id = '6'").fetchone() == (None, "Sold out")
+        
+        assert compact_rejected(store.conn, days=7, now=now) == 3
+        assert store.count() == 3
+        assert store.conn.execute("SELECT item_id, reason_code FROM compact_items ORDER BY item_id").fetchall() == [
+            ("2", 1), ("3", 3), ("6", None),
+        ]
+        assert store.filter_unseen(["2", "3", "5", "7"]) == ["7"] and store.exists("3")
+        store.close()
+        store = ItemStore(path)  # the seen cache is rebuilt from both tables
+        assert store.filter_unseen(["2", "3", "5", "7"]) == ["7"] and store.exists("3") and store.exists("6")
+        report = rejection_report(store.conn)
+        assert report["total"] == 6 and {r["reason"]: r["count"] for r in report["reasons"]} == {
+            "Forbidden keywords": 1, "Team not approved": 1, "Not a complete tracksuit": 1, "(none)": 1,
         }
+        assert rejection_report(store.conn, since=stamp(50))["total"] == 4
         
-        logger.info(f"💾 Saving test item...")
-        save_item(test_item, "approved", "inter")
-        logger.info("✅ Item saved")
+        archive = os.path.join(tmp, "archive")
+        segments = archive_items(store.conn, days=90, directory=archive, now=now)
+        assert len(segments) == 2 and all(segment.endswith(".jsonl.gz") for segment in segments)
+        records = []
+        for segment in segments:
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                records.extend(json.loads(line) for line in f)
+        assert sorted((r["item_id"], r["status"], r["reason_rejected"]) for r in records) == [
+            ("1", "approved", None), ("2", "rejected", "Forbidden keywords"),
+        ]
+        assert [r["title"] for r in records if r["item_id"] == "1"] == ["Tuta Inter Nike"]
+        assert store.count() == 2
+        assert not [name for name in os.listdir(archive) if name.endswith(".tmp")]
+        store.close()
+        store = ItemStore(path)  # archived ids are left to the high-water marks
+        assert store.filter_unseen(["1", "2", "4"]) == ["1", "2"]
         
-        logger.info(f"🔍 Checking if item exists...")
-        exists = item_exists("test_item_12345")
-        if exists:
-            logger.info("✅ Item retrieved from database")
-        else:
-            logger.warning("❌ Item not found in database")
+        retention = Retention(store, interval=3600)
+        assert retention.run_due(now=now + 1) == {"compacted": 0, "archived": 0, "pages_freed": 0}
+        assert retention.next_run == now + 3601
+        assert store.conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        store.close()
+        
+        output = io.StringIO()
+        saved_dir = CONFIG["ARCHIVE_DIR"]
+        CONFIG["ARCHIVE_DIR"] = archive
+        try:
+            with redirect_stdout(output):
+                main(["maintain", "--db", path, "--full-vacuum"])
+        finally:
+            CONFIG["ARCHIVE_DIR"] = saved_dir
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0  # rows are months old by the wall clock
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+        assert len(os.listdir(archive)) > len(segments)
+    logger.info("✅ Rejected rows compacted, old rows archived, pages released")
+
+def test_deal_scoring():
+    """Test streaming price quartiles and the deal score notification gate"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 2h: DEAL SCORING")
+    logger.info("="*60)
     
-    except Exception as e:
-        logger.error(f"❌ Database test failed: {e}")
+    rng = random.Random(3)
+    prices = [rng.lognormvariate(8, 0.4) for _ in range(5000)]
+    for q in (0.25, 0.5, 0.75):
+        estimator = P2Quantile(q)
+        for price in prices:
+            estimator.add(price)
+        exact = sorted(prices)[int(q * len(prices))]
+        assert abs(estimator.value() - exact) / exact < 0.02, (q, estimator.value(), exact)
+    small = P2Quantile(0.5)
+    for price in (500, 100, 300):
+        small.add(price)
+    assert small.value() == 300
+    
+    # Sparse keys fall back to the team; old keys are dropped past the cap
+    stats = PriceStats(max_keys=4, min_samples=3)
+    for cents in (4000, 5000, 6000):
+        stats.add(cents, "EUR", "inter", "nike", "M")
+    assert stats.score(Item("1", "t", price_cents=2500, currency="EUR", size="M", brand="nike", team="inter")) == 0.5
+    rare = Item("2", "t", price_cents=4000, currency="EUR", size="XS", brand="nike", team="inter")
+    assert stats.market(rare) == (("EUR", "inter", "nike", None), 3, 5000) and round(stats.score(rare), 6) == 0.2
+    assert stats.score(Item("3", "t", price_cents=4000, currency="EUR", team="roma")) is None
+    assert stats.add(3000, "EUR", "roma", None, None) == [("EUR", "roma", None, None)]
+    stats.add(3500, "EUR", "roma", "puma", None)
+    assert len(stats) == 4 and stats.query(size="M") == []
+    assert [row["team"] for row in stats.query(team="roma")] == ["roma", "roma"]
+    
+    with temp_database() as path:
+        store = get_store()
+        seed = []
+        for i in range(30):
+            item = Item.parse(str(7000 + i), "Tuta calcio Nike Inter", f"{45 + i % 11},00 €", "u", size="M", brand="nike", seller=f"s{i}")
+            item.team = "inter"
+            seed.append(item.to_row("approved"))
+        store.save_items_batch(seed)
+        assert store.prices.market(Item("x", "t", price_cents=1, currency="EUR", team="inter", brand="nike", size="M"))[1] == 30
+        
+        # A row already stored does not count twice, and a failed batch leaves the prices as they were
+        probe = Item("x", "t", price_cents=1, currency="EUR", team="inter", brand="nike", size="M")
+        store.save_items_batch(seed[:5])
+        extra = Item.parse("7100", "Tuta calcio Nike Inter", "20,00 €", "u", size="M", brand="nike", seller="s100")
+        extra.team = "inter"
+        store.conn.execute("CREATE TEMP TRIGGER fail_insert BEFORE INSERT ON items WHEN NEW.item_id = 'boom' "
+                           "BEGIN SELECT RAISE(ABORT, 'boom'); END")
+        try:
+            store.save_items_batch([extra.to_row("approved"), ("boom", "t", "1 €", None, None, "rejected", "", "x")])
+            assert False, "the batch should fail"
+        except sqlite3.IntegrityError:
+            pass
+        store.conn.execute("DROP TRIGGER fail_insert")
+        assert store.prices.market(probe)[1] == 30 and not store.exists("7100")
+        reopened = ItemStore(path)
+        assert reopened.prices.market(probe)[1] == 30  # the saved price_stats agree
+        reopened.close()
+        
+        skipped = ORDINARY_PRICES.value()
+        alerts = RecordingDispatcher()
+        listings = [
+            Item.parse("7100", "Tuta calcio Nike Inter", "30,00 €", "u", size="M", brand="nike", seller="cheap"),
+            Item.parse("7101", "Tuta calcio Nike Inter originale", "49,00 €", "u", size="M", brand="nike", seller="usual"),
+        ]
+        batch = next(process_stream([ItemBatch(listings)], dispatcher=alerts))
+        assert [item_id for item_id, _ in alerts.submitted] == ["7100"] and batch.new == 2
+        assert 0.3 < batch.notify[0].deal < 0.4 and ORDINARY_PRICES.value() == skipped + 1
+        description = DiscordChannel("u").request_for(batch.notify)[1]["embeds"][0]["description"]
+        assert "vs market" in description and f"{-batch.notify[0].deal:+.0%}" in description
+        
+        # The estimators are saved with the items and restored without replaying them
+        count = store.prices.query(team="inter", brand="nike", size="M")[0]["count"]
+        assert count == 32
+        with store.conn:
+            store.conn.execute("DELETE FROM items")
+        reopened = ItemStore(path)
+        assert reopened.prices.query(team="inter", brand="nike", size="M") == store.prices.query(team="inter", brand="nike", size="M")
+        reopened.close()
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(["report", "market", "--db", path, "--team", "inter", "--size", "M"])
+        assert "inter" in output.getvalue() and "32" in output.getvalue()
+    logger.info("✅ Quartiles tracked per team/brand/size and only deals notified")
 
-def test_session():
-    """Test session creation"""
+class FakeElement:
+    """Stand-in for a Selenium WebElement pointing at one listing"""
+
+    def __init__(self, item_id: str, title: str, price: str):
+        self.href = f"https://www.vinted.it/items/{item_id}"
+        self.text = f"{title}\n{price}"
+
+    def get_attribute(self, name):
+        return self.href if name == "href" else None
+
+def fake_cards(count: int):
+    return [
+        {
+            "id": str(2000 + i),
+            "url": f"https://www.vinted.it/items/{2000 + i}-tuta-calcio",
+            "lines": [f"Tuta calcio Adidas Juventus {i}"],
+            "title": None,
+            "price": "30,00 €",
+            "brand": "adidas",
+            "size": "L",
+            "image": f"https://images1.vinted.net/{i}.jpg",
+        }
+        for i in range(count)
+    ]
+
+class FakeDriver:
+    """Stand-in for a Chrome WebDriver serving a fixed catalog page"""
+
+    def __init__(self, elements, cards=None):
+        self.elements = elements
+        self.cards = cards or []
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self.quit_calls = 0
+        self.scripts = 0
+        self.element_reads = 0
+
+    def execute_script(self, script):
+        self.scripts += 1
+        if script == COUNT_ITEMS_JS:
+            return len(self.elements) or len(self.cards)
+        if script == PAGE_STATS_JS:
+            return {"bytes": 150_000, "resources": 12}
+        return list(self.cards)
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+
+    def find_elements(self, by, selector):
+        return list(self.elements)
+
+    def quit(self):
+        self.quit_calls += 1
+
+def test_browser_pool():
+    """Test that a warm browser is reused across cycles"""
     logger.info("\n" + "="*60)
-    logger.info("🧪 TEST 3: SESSION CREATION")
+    logger.info("🧪 TEST 3: BROWSER POOL")
     logger.info("="*60)
     
+    elements = [FakeElement(str(1000 + i), f"Tuta calcio Nike Inter {i}", "25,00 €") for i in range(8)]
+    drivers = []
+    
+    def factory():
+        driver = FakeDriver(elements)
+        drivers.append(driver)
+        return driver
+    
+    saved_wait = CONFIG["PAGE_LOAD_WAIT"]
+    CONFIG["PAGE_LOAD_WAIT"] = 0
     try:
-        session = create_session()
-        logger.info(f"✅ Session created")
-        logger.info(f"✅ Headers: {len(session.headers)} headers configured")
-        return session
-    except Exception as e:
-        logger.error(f"❌ Session creation failed: {e}")
-        return None
+        pool = BrowserPool(factory=factory, size=1, max_pages=100)
+        for _ in range(10):
+            items = fetch_vinted_items(pool)
+            assert len(items) == 8
+        logger.info(f"✅ 10 cycles -> {len(drivers)} browser(s) created")
+        assert len(drivers) == 1
+        
+        # Recycling after max_pages
+        pool = BrowserPool(factory=factory, size=1, max_pages=3)
+        drivers.clear()
+        for _ in range(6):
+            fetch_vinted_items(pool)
+        assert len(drivers) == 2
+        assert drivers[0].quit_calls == 1
+        
+        # Recycling on crash
+        drivers.clear()
+        pool = BrowserPool(factory=factory, size=1, max_pages=100)
+        fetch_vinted_items(pool)
+        drivers[0].get = None  # calling it raises TypeError
+        assert fetch_vinted_items(pool) == []
+        fetch_vinted_items(pool)
+        assert len(drivers) == 2
+        logger.info("✅ Browsers recycled after page limit and crash")
+        pool.close()
+    finally:
+        CONFIG["PAGE_LOAD_WAIT"] = saved_wait
+
+def test_script_extraction():
+    """Test one-call card extraction, its fallback and the grid wait"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 3b: SCRIPT EXTRACTION")
+    logger.info("="*60)
+    
+    driver = FakeDriver([], cards=fake_cards(25))
+    pool = BrowserPool(factory=lambda: driver, size=1)
+    items = fetch_vinted_items(pool)
+    assert len(items) == 25 and driver.scripts == 3  # grid check + page stats + extraction
+    assert items[0].to_dict() == {
+        "id": "2000", "title": "Tuta calcio Adidas Juventus 0", "price": "30,00 €",
+        "url": "https://www.vinted.it/items/2000-tuta-calcio", "price_cents": 3000, "currency": "EUR",
+        "size": "L", "brand": "adidas", "team": None, "seller": None,
+        "image": "https://images1.vinted.net/0.jpg", "duplicate_of": None,
+    }
+    
+    # Image-only links: title attribute instead of link text
+    driver.cards = [dict(fake_cards(1)[0], lines=[], title="Tuta calcio Nike Inter, taglia: M")]
+    assert fetch_vinted_items(pool)[0]["title"] == "Tuta calcio Nike Inter"
+    
+    # Script finds nothing: element path, which also handles slugged URLs
+    elements = [FakeElement(f"{3000 + i}-tuta", f"Tuta calcio Nike Inter {i}", "25,00 €") for i in range(6)]
+    fallback = FakeDriver(elements)
+    items = fetch_vinted_items(BrowserPool(factory=lambda: fallback, size=1))
+    assert [item["id"] for item in items] == [str(3000 + i) for i in range(6)]
+    
+    started = time.monotonic()
+    assert not wait_for_grid(FakeDriver([]), timeout=0.3)
+    assert time.monotonic() - started < 1.0
+    pool.close()
+    logger.info("✅ Script extraction, fallback and grid wait OK")
+
+def test_lean_browser_mode():
+    """Test the resource-blocking browser profile and page cost recording"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 3c: LEAN BROWSER MODE")
+    logger.info("="*60)
+    
+    saved = CONFIG["BROWSER_PROFILE_DIR"]
+    with tempfile.TemporaryDirectory() as tmp:
+        CONFIG["BROWSER_PROFILE_DIR"] = os.path.join(tmp, "profile")
+        try:
+            lean = build_chrome_options("lean")
+            assert lean.page_load_strategy == "eager"
+            assert lean.experimental_options["prefs"]["profile.managed_default_content_settings.images"] == 2
+            profile = [a for a in lean.arguments if a.startswith("--user-data-dir=")][0].split("=", 1)[1]
+            assert profile.endswith("profile-0")
+            
+            # Reserved until released: a browser starting alongside never shares the dir
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                options = list(pool.map(lambda _: build_chrome_options("lean"), range(4)))
+            picked = [a.split("=", 1)[1] for o in options for a in o.arguments if a.startswith("--user-data-dir=")]
+            assert sorted(os.path.basename(p) for p in picked) == [f"profile-{n}" for n in range(1, 5)]
+            for path in picked:
+                release_profile_dir(path)
+            release_profile_dir(profile)
+            
+            # A running Chrome holds profile-0: the next browser gets its own dir
+            os.makedirs(profile)
+            os.symlink("host-1234", os.path.join(profile, "SingletonLock"))
+            second = build_chrome_options("lean")
+            assert any(a.endswith("profile-1") for a in second.arguments)
+            release_profile_dir(os.path.join(tmp, "profile-1"))
+        finally:
+            CONFIG["BROWSER_PROFILE_DIR"] = saved
+    
+    default = build_chrome_options("default")
+    assert default.page_load_strategy == "normal"
+    assert not any(a.startswith("--user-data-dir=") for a in default.arguments)
+    
+    PAGE_STATS.clear()
+    fetch_vinted_items(BrowserPool(factory=lambda: FakeDriver([], cards=fake_cards(8)), size=1))
+    summary = page_stats_summary()
+    logger.info(f"✅ Page stats: {summary}")
+    assert summary[CONFIG["BROWSER_MODE"]]["pages"] == 1
+    assert summary[CONFIG["BROWSER_MODE"]]["avg_bytes"] == 150_000
+
+def test_http_fetcher():
+    """Test the HTTP backend against recorded catalog responses"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 4: HTTP FETCH BACKEND")
+    logger.info("="*60)
+    
+    catalog = load_fixture("vinted_catalog_page1.json")
+    state = {"expired": False}
+    
+    def home(handler):
+        return 200, {"Set-Cookie": "access_token_web=stub-token; Path=/"}, b"<html></html>"
+    
+    def items(handler):
+        if "access_token_web=stub-token" not in (handler.headers.get("Cookie") or "") or state["expired"]:
+            state["expired"] = False
+            return 401, {}, b"{}"
+        return 200, {"Content-Type": "application/json"}, catalog
+    
+    with stub_server({"/": home, HttpFetcher.CATALOG_PATH: items}) as (server, base_url):
+        fetcher = HttpFetcher(base_url=base_url)
+        first = fetcher.fetch("tuta calcio", "www.vinted.it")
+        second = fetcher.fetch("tuta calcio", "www.vinted.it")
+        state["expired"] = True
+        third = fetcher.fetch("tuta calcio", "www.vinted.it")
+        fetcher.close()
+    
+    paths = [r["path"].split("?")[0] for r in server.requests]
+    logger.info(f"✅ Requests served: {paths}")
+    assert len(first) == 10 and first == second == third
+    assert paths.count("/") == 2  # bootstrap + re-bootstrap after the 401
+    assert "search_text=tuta+calcio" in server.requests[1]["path"]
+    assert first[0]["id"] == "4821907311"
+    assert first[0]["price"] == "35.0 €"
+    assert first[0]["size"] == "M"
+    
+    assert isinstance(create_fetcher("http"), HttpFetcher)
+    assert isinstance(create_fetcher("selenium"), SeleniumFetcher)
+    try:
+        create_fetcher("carrier-pigeon")
+        assert False, "unknown backend accepted"
+    except ValueError:
+        logger.info("✅ Unknown backend rejected")
 
-def test_scraping(session):
+class FakeFetcher(Fetcher):
+    """Fetcher returning canned items per search and tracking concurrency"""
+
+    name = "fake"
+
+    def __init__(self, pages, delay: float = 0.05):
+        self.pages = pages
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, search_text=None, domain=None, page=1):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append((domain, time.monotonic()))
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return list(self.pages.get((domain, search_text), []))
+
+def test_search_scheduler():
+    """Test concurrent multi-query fetching with per-domain rate limits"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5: SEARCH SCHEDULER")
+    logger.info("="*60)
+    
+    searches = load_searches([
+        {"search_text": f"query {i}", "domain": "www.vinted.it" if i % 2 else "www.vinted.fr"}
+        for i in range(8)
+    ])
+    pages = {
+        (q.domain, q.search_text): [{"id": str(100 + i), "title": f"Tuta calcio {i}"} for i in range(n, n + 3)]
+        for n, q in enumerate(searches)
+    }
+    fetcher = FakeFetcher(pages)
+    interval = 0.03
+    scheduler = SearchScheduler(fetcher, searches, max_workers=4, rate_limiter=DomainRateLimiter(interval))
+    started = time.monotonic()
+    results = scheduler.run_cycle()
+    scheduler.close()
+    
+    logger.info(f"✅ Peak concurrency: {fetcher.peak}")
+    assert 1 < fetcher.peak <= 4
+    for domain in ("www.vinted.it", "www.vinted.fr"):
+        assert max(t for d, t in fetcher.calls if d == domain) - started >= 3 * interval
+    
+    # Slot reservation with a fake clock
+    sleeps = []
+    limiter = DomainRateLimiter(2.0, clock=lambda: 100.0, sleep=sleeps.append)
+    for domain in ("a", "a", "b", "a"):
+        limiter.acquire(domain)
+    assert sleeps == [2.0, 4.0]
+    
+    assert [r.query for r in results] == searches
+    assert results[0].unique == 3 and all(r.unique == 1 for r in results[1:])
+    assert all(r.latency >= fetcher.delay for r in results)
+    merged = [item["id"] for r in results for item in r.items]
+    assert len(merged) == len(set(merged)) == 10
+    assert SearchQuery("tuta calcio").key == "www.vinted.it:tuta calcio"
+
+class FeedFetcher(Fetcher):
+    """Newest-first paged feed over a growing list of listing ids"""
+
+    name = "feed"
+
+    def __init__(self, per_page: int = 30):
+        self.per_page = per_page
+        self.ids = []
+        self.fetches = 0
+
+    def publish(self, count: int):
+        start = self.ids[-1] + 1 if self.ids else 1000
+        self.ids.extend(range(start, start + count))
+
+    def fetch(self, search_text=None, domain=None, page=1):
+        self.fetches += 1
+        newest_first = self.ids[::-1]
+        chunk = newest_first[(page - 1) * self.per_page:page * self.per_page]
+        return [{"id": str(i), "title": f"Tuta calcio Inter {i}"} for i in chunk]
+
+def test_incremental_crawl():
+    """Test stop-at-last-seen pagination with a persisted high-water mark"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5b: INCREMENTAL CRAWL")
+    logger.info("="*60)
+    
+    with temp_database():
+        store = get_store()
+        query = SearchQuery("tuta calcio")
+        feed = FeedFetcher()
+        feed.publish(100)
+        
+        def cycle():
+            scheduler = SearchScheduler(feed, [query], max_workers=1, rate_limiter=DomainRateLimiter(0), max_pages=4, store=store)
+            feed.fetches = 0
+            result = scheduler.run_cycle()[0]
+            scheduler.commit(result)
+            scheduler.close()
+            return result
+        
+        first = cycle()
+        assert first.pages == 1 and len(first.items) == 30 and first.high_water == 1099
+        assert store.load_high_water() == {query.key: 1099}
+        
+        feed.publish(70)  # burst: more than one page of new listings
+        burst = cycle()
+        assert burst.pages == 3 and [int(i["id"]) for i in burst.items] == list(range(1169, 1099, -1))
+        
+        quiet = cycle()  # nothing changed: a single fetch, nothing new
+        assert quiet.pages == 1 and quiet.items == [] and quiet.high_water == 1169
+        
+        feed.publish(200)  # larger than the page cap
+        capped = cycle()
+        assert capped.pages == 4 and len(capped.items) == 120 and feed.fetches == 4
+        assert store.load_high_water()[query.key] == 1369
+        logger.info(f"✅ Pages per cycle: {first.pages}, {burst.pages}, {quiet.pages}, {capped.pages}")
+
+class TrickleFetcher(Fetcher):
+    """Yields one listing at a time, like a slow page extraction"""
+
+    name = "trickle"
+
+    def __init__(self, pages, delay: float = 0.02):
+        self.pages = pages
+        self.delay = delay
+        self.produced = 0
+        self.done = {}
+
+    def iter_fetch(self, search_text=None, domain=None, page=1):
+        for item in self.pages.get(search_text, []) if page == 1 else []:
+            time.sleep(self.delay)
+            self.produced += 1
+            yield item
+        self.done[search_text] = time.monotonic()
+
+    def fetch(self, search_text=None, domain=None, page=1):
+        return list(self.iter_fetch(search_text, domain, page))
+
+class RecordingDispatcher:
+    """Notes when each notification is handed over"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, notification):
+        self.submitted.append((notification.item_id, time.monotonic()))
+        return True
+
+def test_streaming_pipeline():
+    """Test that listings are processed and alerted while the page is still being extracted"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5c: STREAMING PIPELINE")
+    logger.info("="*60)
+    
+    items = [
+        {"id": str(5000 + i), "title": "Tuta calcio Nike Inter" if i == 0 else f"Felpa generica {i}", "price": "30,00 €", "url": "u"}
+        for i in range(10)
+    ]
+    with temp_database():
+        fetcher = TrickleFetcher({"a": items, "b": items[5:] + [dict(items[1], id="5100")]})
+        searches = [SearchQuery("a"), SearchQuery("b")]
+        scheduler = SearchScheduler(fetcher, searches, max_workers=2, rate_limiter=DomainRateLimiter(0))
+        alerts = RecordingDispatcher()
+        new = 0
+        finished = []
+        for result, batch in scheduler.stream_cycle(batch_size=4):
+            if batch is None:
+                finished.append(result)
+                continue
+            assert len(batch) <= 4
+            new += next(process_stream([ItemBatch(batch)], dispatcher=alerts)).new
+        scheduler.close()
+        
+        assert [item_id for item_id, _ in alerts.submitted] == ["5000"]
+        logger.info(f"✅ First alert {fetcher.done['a'] - alerts.submitted[0][1]:.3f}s before the page was extracted")
+        assert alerts.submitted[0][1] < fetcher.done["a"]
+        assert sorted(r.query.search_text for r in finished) == ["a", "b"]
+        assert new == 11 and sum(r.unique for r in finished) == 11
+        assert get_store().count() == 11
+    
+    # A full queue stalls extraction; abandoning the cycle lets the worker finish
+    fetcher = TrickleFetcher({"a": items}, delay=0)
+    scheduler = SearchScheduler(fetcher, [SearchQuery("a")], max_workers=1, rate_limiter=DomainRateLimiter(0))
+    stream = scheduler.stream_cycle(queue_size=2, batch_size=1)
+    assert next(stream)[1][0]["id"] == "5000"
+    time.sleep(0.1)
+    assert fetcher.produced <= 4  # one handed over, two queued, one waiting on the queue
+    stream.close()
+    scheduler.close()
+    assert fetcher.produced == 10
+    
+    # Selenium pages are streamed card by card from the same browser session
+    pool = BrowserPool(factory=lambda: FakeDriver([], cards=fake_cards(5)), size=1)
+    stream = SeleniumFetcher(pool).iter_fetch("tuta calcio")
+    assert next(stream)["id"] == "2000" and len(list(stream)) == 4
+    pool.close()
+
+class FakeClassifier(ImageClassifier):
+    """Scores the bundled sample photos without a model and records each batch"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.scores = {photo: 0.9 if photo == "tracksuit.png" else 0.1 for photo in SAMPLE_PHOTOS}
+        self.by_bytes = {data: self.scores[photo] for photo, data in SAMPLE_PHOTOS.items()}
+        self.batches = []
+
+    def predict(self, images):
+        self.batches.append(len(images))
+        return [self.by_bytes.get(data) for data in images]
+
+SAMPLE_PHOTOS = {photo: load_fixture(os.path.join("images", photo)) for photo in ("tracksuit.png", "jacket_only.png", "pants_only.png")}
+
+def test_image_verification():
+    """Test the photo check: batching, the on-disk cache and rejections"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5d: IMAGE VERIFICATION")
+    logger.info("="*60)
+    
+    downloads = []
+    
+    def download(url):
+        downloads.append(url)
+        return SAMPLE_PHOTOS[url.rsplit("/", 1)[-1]]
+    
+    def listing(item_id, photo=None, title="Tuta calcio Nike Inter"):
+        return Item.parse(item_id, title, "30,00 €", "u", seller=f"seller{item_id}",
+                          image=f"https://images.example/{item_id}/{photo}" if photo else None)
+    
+    with temp_database(), tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "images.db")
+        classifier = FakeClassifier()
+        verifier = ImageVerifier(classifier, ImageCache(cache_path), download, threshold=0.5, batch_size=2)
+        inferences = IMAGE_SECONDS.count()
+        alerts = RecordingDispatcher()
+        items = [
+            listing("1", "tracksuit.png"), listing("2", "jacket_only.png"), listing("3", "pants_only.png"),
+            listing("4", "missing.png"), listing("5"), listing("6", "jacket_only.png", title="Felpa generica"),
+        ]
+        batch = next(process_stream([ItemBatch(items)], dispatcher=alerts, verifier=verifier))
+        
+        assert sorted(item_id for item_id, _ in alerts.submitted) == ["1", "4", "5"]
+        assert classifier.batches == [2, 1]  # title rejects and unusable photos are never classified
+        assert IMAGE_SECONDS.count() == inferences + 3
+        assert "https://images.example/6/jacket_only.png" not in downloads
+        rows = dict(get_store().conn.execute("SELECT item_id, reason_code FROM items WHERE status = 'rejected'"))
+        assert rows == {"2": 5, "3": 5, "6": 2} and decode_reason(5) == PHOTO_REJECTED
+        assert batch.new == 6 and len(batch.notify) == 3
+        # Only listings past the photo check are indexed for relist detection
+        assert get_store().relists.find(Item.parse("12", "Tuta calcio Nike Inter", "30,00 €", "u", seller="seller2")) is None
+        assert get_store().relists.find(Item.parse("11", "Tuta calcio Nike Inter", "30,00 €", "u", seller="seller1")) == "1"
+        
+        # A re-check is a cache hit; a relist with a new URL but the same photo skips inference
+        downloads.clear()
+        assert verifier.scores([items[0], items[1]]) == {"1": 0.9, "2": 0.1}
+        assert downloads == [] and classifier.batches == [2, 1]
+        assert verifier.reject([listing("7", "tracksuit.png"), listing("8", "jacket_only.png")]) == {"8": 0.1}
+        assert len(downloads) == 2 and classifier.batches == [2, 1]
+        verifier.close()
+        
+        # Scores survive a restart and are kept apart per model
+        verifier = ImageVerifier(FakeClassifier(), ImageCache(cache_path), download)
+        downloads.clear()
+        assert verifier.reject([listing("2", "jacket_only.png")]) == {"2": 0.1}
+        assert downloads == [] and verifier.classifier.batches == []
+        verifier.classifier.name = "retrained"
+        assert verifier.reject([listing("2", "jacket_only.png")]) == {"2": 0.1}
+        assert verifier.classifier.batches == [1]
+        verifier.close()
+    
+    # Rescoring the titles keeps a photo rejection
+    assert rescore_chunk([("2", "Tuta calcio Nike Inter", None, "rejected", "inter", "nike", PHOTO_REJECTED)]) == []
+    assert CONFIG["IMAGE_CHECK"] is False and get_image_verifier() is None
+    
+    output = run_classify([os.path.join(FIXTURES_DIR, "images", photo) for photo in SAMPLE_PHOTOS], FakeClassifier())
+    assert [line.split()[0] for line in output.splitlines()] == ["0.90", "0.10", "0.10"]
+    assert "complete set" in output.splitlines()[0] and "rejected" in output.splitlines()[1]
+    logger.info("✅ Photos batched, cached by content and rejected below the threshold")
+
+def test_distributed_workers():
+    """Test job leasing, lease expiry and shared dedup across workers"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5e: DISTRIBUTED WORKERS")
+    logger.info("="*60)
+    
+    inter = SearchQuery("tuta inter")
+    roma = SearchQuery("tuta roma")
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = os.path.join(tmp, "shared.db")
+        broker, other = SqliteJobBroker(shared), SqliteJobBroker(shared)  # two processes' connections
+        broker.publish([inter, roma])
+        broker.publish([inter, roma])
+        first = broker.lease("w1", 60, now=1000)
+        second = other.lease("w2", 60, now=1000)
+        assert {first.query, second.query} == {inter, roma} and first.state is None
+        assert broker.lease("w3", 60, now=1000) is None
+        assert broker.status(1000) == {"jobs": 2, "leased": 2, "due": 2}
+        
+        # w1 dies: its lease expires and the job goes to w3; w1 can no longer touch it
+        assert other.renew(second, 600, now=1050)
+        taken = other.lease("w3", 60, now=1061)
+        assert taken.query == first.query and taken.token == first.token + 1
+        assert not broker.renew(first, 60, now=1062)
+        assert not broker.complete(first, PollState(interval=120, next_due=1200), 5)
+        state = PollState(interval=90, rate=0.01, last_poll=1070, next_due=1160)
+        assert other.complete(taken, state, 4242)
+        assert broker.lease("w1", 60, now=1100) is None  # not due yet, w2 still holds the other
+        again = broker.lease("w1", 60, now=1200)
+        assert again.query == first.query and again.high_water == 4242 and again.state.interval == 90
+        assert sorted(broker.reap(now=5000)) == sorted([(again.query.key, "w1"), (second.query.key, "w2")])
+        assert broker.reap(now=5000) == []
+        broker.publish([inter])
+        assert broker.status(5000)["jobs"] == 1
+        broker.close()
+        other.close()
+        
+        # Concurrent claims over two connections never hand out the same id twice
+        seen_a, seen_b = SqliteSeenStore(shared), SqliteSeenStore(shared)
+        ids = [str(i) for i in range(200)]
+        claimed = {"a": [], "b": []}
+        threads = [
+            threading.Thread(target=lambda: claimed["a"].extend(seen_a.claim(ids, "a", now=10))),
+            threading.Thread(target=lambda: claimed["b"].extend(seen_b.claim(ids[::-1], "b", now=20))),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(claimed["a"] + claimed["b"], key=int) == ids
+        assert seen_a.prune(before=15) == len(claimed["a"])
+        assert seen_b.claim(["0", "new"], "b") == (["0", "new"] if "0" in claimed["a"] else ["new"])
+        seen_a.close()
+        seen_b.close()
+    
+    # Two workers on overlapping searches: the shared listing is alerted once
+    items = [
+        {"id": "8000", "title": "Tuta calcio Nike Inter", "price": "30,00 €", "url": "u"},
+        {"id": "8001", "title": "Felpa generica", "price": "10,00 €", "url": "u"},
+    ]
+    pages = {("www.vinted.it", "tuta inter"): items, ("www.vinted.it", "tuta roma"): list(reversed(items))}
+    with temp_database():
+        broker, seen = create_shared_state("memory")
+        broker.publish([inter, roma])
+        alerts = RecordingDispatcher()
+        done = []
+        workers = [
+            threading.Thread(target=lambda name=name: done.append(
+                run_worker(broker, seen, name, FakeFetcher(pages), dispatcher=alerts, max_jobs=1)))
+            for name in ("w1", "w2")
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+        assert done == [1, 1]
+        assert [item_id for item_id, _ in alerts.submitted] == ["8000"]
+        assert broker.status(time.time()) == {"jobs": 2, "leased": 0, "due": 0}
+        
+        # A worker that dies mid-job: the next worker picks the job up once the lease runs out
+        saved = CONFIG["LEASE_SECONDS"], CONFIG["WORKER_IDLE_WAIT"]
+        CONFIG["LEASE_SECONDS"], CONFIG["WORKER_IDLE_WAIT"] = 0.2, 0.05
+        try:
+            broker.publish([SearchQuery("tuta milan")])
+            assert broker.lease("dead", 0.2, time.time()).query.search_text == "tuta milan"
+            started = time.monotonic()
+            assert run_worker(broker, seen, "w3", FakeFetcher({}, delay=0), dispatcher=alerts, max_jobs=1) == 1
+            assert time.monotonic() - started >= 0.15
+        finally:
+            CONFIG["LEASE_SECONDS"], CONFIG["WORKER_IDLE_WAIT"] = saved
+    logger.info("✅ Leases expire and move, shared claims keep alerts unique")
+
+def test_adaptive_poller():
+    """Test arrival-rate driven polling intervals and error backoff"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5f: ADAPTIVE POLLING")
+    logger.info("="*60)
+    
+    poller = AdaptivePoller(min_interval=30, max_interval=600, target_new=1, smoothing=0.5, backoff_max=3600, rng=lambda: 1.0)
+    now = 0.0
+    first = poller.record_success("hot", 30, now)  # baseline poll: no rate yet
+    assert first == poller.state("hot").interval
+    
+    intervals = []
+    for _ in range(5):
+        now += poller.state("hot").interval
+        intervals.append(poller.record_success("hot", 20, now))
+    assert intervals[-1] == 30  # busy search: down to the floor
+    
+    for _ in range(10):
+        now += poller.state("hot").interval
+        interval = poller.record_success("hot", 0, now)
+    assert interval == 600  # quiet search: up to the ceiling
+    
+    poller.record_success("cold", 0, 0.0)
+    assert poller.due(["hot", "cold"], now) == ["cold"]
+    assert poller.seconds_until_due(["hot"], now) == 600
+    
+    delays = [poller.record_error("hot", now) for _ in range(4)]
+    logger.info(f"✅ Intervals {intervals} | backoff {delays}")
+    assert delays == [1200, 2400, 3600, 3600]
+    assert poller.state("hot").next_due == now + 3600
+    poller.record_success("hot", 1, now + 3600)
+    assert poller.state("hot").failures == 0
+    
+    jittered = AdaptivePoller(min_interval=30, max_interval=600, rng=lambda: 0.25)
+    assert jittered.record_error("x", 0.0) == jittered.state("x").interval * 2 * 0.25
+
+def test_replay_pipeline():
+    """Test the offline replay benchmark end to end on both backends"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5g: OFFLINE PIPELINE REPLAY")
+    logger.info("="*60)
+    
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from bench_pipeline import DEFAULT_BASELINE, check_regression, run_benchmark
+    
+    with open(DEFAULT_BASELINE) as f:
+        assert set(json.load(f)) == {"selenium", "http"}  # the committed reference run_test.sh checks against
+    
+    for backend in ("selenium", "http"):
+        result = run_benchmark(backend, pages=6, per_page=10)
+        # Pages overlap by half, so only the first page plus half of each later one is new
+        assert result["items"] == 60 and result["stored"] == 35, result
+        assert set(result["stages"]) == {"extract", "dedup", "validate", "save"}
+        assert check_regression(result, min_throughput=50) == []
+        assert check_regression(result, {backend: {"items_per_sec": result["items_per_sec"] * 10}})
+        logger.info(f"✅ {backend}: {result['items_per_sec']:.0f} items/s")
+
+def test_metrics():
+    """Test counters, stage spans, the Prometheus endpoint and the JSON-lines file"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5h: METRICS")
+    logger.info("="*60)
+    
+    registry = MetricsRegistry()
+    rejected = registry.counter("test_rejected_total", "Rejected items", ("reason",))
+    rejected.inc(reason="Forbidden keywords")
+    rejected.inc(2, reason="Team not approved")
+    assert rejected.value(reason="Team not approved") == 2
+    assert registry.counter("test_rejected_total", "Rejected items", ("reason",)) is rejected
+    with registry.span("store"):
+        pass
+    registry.stage_seconds.observe(7.0, stage="store")
+    
+    text = registry.render()
+    assert "# TYPE test_rejected_total counter" in text
+    assert 'test_rejected_total{reason="Team not approved"} 2' in text
+    assert 'vinted_stage_seconds_bucket{stage="store",le="5.0"} 1' in text
+    assert 'vinted_stage_seconds_bucket{stage="store",le="+Inf"} 2' in text
+    assert 'vinted_stage_seconds_count{stage="store"} 2' in text
+    
+    server = start_metrics_server(port=0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert 'reason="Forbidden keywords"' in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.jsonl")
+        registry.write_jsonl(path, cycle=1)
+        registry.write_jsonl(path, cycle=2)
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [r["cycle"] for r in records] == [1, 2]
+        assert records[0]["metrics"]["test_rejected_total"]["Team not approved"] == 2
+    
+    # The processing stages feed the process-wide registry
+    scraped = METRICS.counter("vinted_items_scraped_total", "")
+    before = scraped.value()
+    spans_before = METRICS.stage_seconds.count(stage="validate")
+    with temp_database():
+        process_items([{"id": "9101", "title": "Tuta Juventus Adidas completa", "price": "40 €", "url": ""}])
+    assert scraped.value() == before + 1
+    assert METRICS.stage_seconds.count(stage="validate") == spans_before + 1
+    logger.info("✅ Metrics recorded and exported")
+
+def test_lazy_imports():
+    """Test that importing the bot loads no browser or HTTP stack and writes no log file"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5i: LAZY IMPORTS")
+    logger.info("="*60)
+    
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from bench_import import measure_import
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        result = measure_import(cwd=tmp)
+        assert result["modules"] == [], result
+        assert not os.path.exists(os.path.join(tmp, "vinted_bot.log"))
+    logger.info(f"✅ import vinted_bot took {result['seconds'] * 1000:.0f} ms without Selenium")
+
+def test_rescore():
+    """Test re-validating stored items after the keyword lists change"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 5j: RESCORE")
+    logger.info("="*60)
+    
+    with temp_database() as path:
+        store = get_store()
+        rows = [
+            ("7001", "Tuta calcio Nike Inter M", "30 €", None, None, "rejected", "", "Team not approved"),
+            ("7002", "Tuta Adidas Juventus bambino", "25 €", "juventus", "adidas", "approved", "", None),
+            ("7003", "Shorts Chelsea", "5 €", None, None, "rejected", "", "Forbidden keywords"),
+        ] + [(str(8000 + i), f"Tuta calcio Napoli {i}", "20 €", None, None, "rejected", "", "stale") for i in range(50)]
+        store.save_items_batch(rows)
+        
+        progress = []
+        stats = rescore_items(path, workers=1, chunk_size=7, progress=lambda done, total: progress.append((done, total)))
+        assert stats["rows"] == 53 and stats["changed"] == 52
+        assert progress[-1] == (53, 53) and len(progress) == 8
+        query = f"SELECT status, team, brand, {REASON_SQL} FROM items WHERE item_id = ?"
+        assert store.conn.execute(query, ("7001",)).fetchone() == ("approved", "inter", "nike", None)
+        assert store.conn.execute(query, ("7002",)).fetchone() == ("rejected", None, "adidas", "Forbidden keywords")
+        assert store.conn.execute(query, ("8049",)).fetchone() == ("approved", "napoli", None, None)
+        
+        # A process pool gives the same verdicts; nothing is left to change
+        stats = rescore_items(path, workers=2, chunk_size=10, progress=lambda done, total: None)
+        assert stats["rows"] == 53 and stats["changed"] == 0
+        assert stats["approved"] == 51 and stats["rejected"] == 2
+        
+        # Workers get the parent's live rules, sizes included, even when started fresh
+        store.save_items_batch([("7004", "Tuta calcio Nike Roma", "30 €", None, None, "rejected", "", "Size not allowed", None, None, "XXL"),
+                                ("7005", "Tuta calcio Nike Juventus", "30 €", "juventus", "nike", "approved", "", None, None, None, "M")])
+        snapshot = rule_snapshot()
+        try:
+            apply_rules({"rules": {"allowed_sizes": ["XXL"]}}, environ={}, dotenv_path=None)
+            fresh = rule_snapshot()
+            restore_rules(snapshot)
+            assert not check_size("XXL")
+            restore_rules(fresh)
+            assert check_size("XXL") and not check_size("M")
+            stats = rescore_items(path, workers=2, chunk_size=10, progress=lambda done, total: None)
+            assert store.conn.execute(query, ("7004",)).fetchone() == ("approved", "roma", "nike", None)
+            assert store.conn.execute(query, ("7005",)).fetchone() == ("rejected", None, "nike", "Size not allowed")
+        finally:
+            apply_rules({}, environ={}, dotenv_path=None)
+    logger.info("✅ Rescore updated only the changed verdicts")
+
+def test_notification_dispatcher():
+    """Test batched background notifications with retries and rate limits"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 6: NOTIFICATION DISPATCHER")
+    logger.info("="*60)
+    
+    state = {"discord": 0, "telegram": 0}
+    
+    def discord(handler):
+        state["discord"] += 1
+        if state["discord"] == 1:
+            return 429, {"Content-Type": "application/json"}, b'{"retry_after": 0.05, "global": false}'
+        time.sleep(0.2)  # slow webhook
+        return 204, {}, b""
+    
+    def telegram(handler):
+        state["telegram"] += 1
+        if state["telegram"] == 1:
+            return 500, {}, b"oops"
+        return 200, {"Content-Type": "application/json"}, b'{"ok": true}'
+    
+    routes = {"/webhook": discord, "/botTOKEN/sendMessage": telegram}
+    with stub_server(routes) as (server, base_url):
+        sleeps = []
+        
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            time.sleep(min(seconds, 0.01))
+        
+        dispatcher = NotificationDispatcher(
+            [DiscordChannel(base_url + "/webhook"), TelegramChannel("TOKEN", "42", api_url=base_url)],
+            batch_window=0.1, backoff=0.5, sleep=fake_sleep,
+        )
+        started = time.monotonic()
+        for i in range(5):
+            assert dispatcher.submit(Notification(str(i), f"Tuta calcio Inter {i}", "30 €", "inter", f"https://www.vinted.it/items/{i}"))
+        assert time.monotonic() - started < 0.05  # submit never waits on the network
+        dispatcher.flush()
+        dispatcher.close()
+    
+    logger.info(f"✅ Stats: {dispatcher.stats}")
+    assert dispatcher.stats["discord"] == {"sent": 5, "failed": 0, "dropped": 0, "retries": 1, "batches": 1}
+    assert dispatcher.stats["telegram"]["sent"] == 5 and dispatcher.stats["telegram"]["retries"] == 1
+    assert 0.05 in sleeps  # honoured retry_after
+    posts = [json.loads(r["body"]) for r in server.requests if r["path"] == "/webhook"]
+    assert len(posts) == 2 and len(posts[-1]["embeds"]) == 5
+    texts = [json.loads(r["body"])["text"] for r in server.requests if r["path"].startswith("/bot")]
+    assert texts[-1].count("🏐") == 5
+    
+    # A 400 is permanent: the batch fails at once instead of being retried
+    def bad_request(handler):
+        return 400, {"Content-Type": "application/json"}, b'["Invalid Form Body"]'
+    
+    with stub_server({"/webhook": bad_request}) as (server, base_url):
+        sleeps.clear()
+        dispatcher = NotificationDispatcher([DiscordChannel(base_url + "/webhook")], batch_window=0.05, max_retries=3,
+                                            sleep=fake_sleep)
+        for i in range(3):
+            dispatcher.submit(Notification(str(i), f"Tuta calcio Inter {i}", "30 €", "inter"))
+        dispatcher.flush()
+        dispatcher.close()
+    assert dispatcher.stats["discord"] == {"sent": 0, "failed": 3, "dropped": 0, "retries": 0, "batches": 0}
+    assert sum(len(json.loads(r["body"])["embeds"]) for r in server.requests) == 3 and not sleeps  # each sent once
+    
+    class ListBody:
+        headers = {}
+        
+        def json(self):
+            return ["not", "a", "mapping"]
+    
+    assert NotificationChannel._retry_after(ListBody()) == 1.0
+    
+    # Bounded queue: drops are counted instead of blocking
+    release = threading.Event()
+    in_send = threading.Event()
+    
+    class BlockingChannel(NotificationChannel):
+        name = "blocking"
+        
+        def __init__(self):
+            super().__init__(session=object())
+        
+        def send(self, batch):
+            in_send.set()
+            release.wait(5)
+        
+        def close(self):
+            pass
+    
+    dispatcher = NotificationDispatcher([BlockingChannel()], queue_size=2, batch_window=0)
+    dispatcher.submit(Notification("a", "t", "p", "inter"))
+    assert in_send.wait(5)
+    accepted = [dispatcher.submit(Notification(str(i), "t", "p", "inter")) for i in range(4)]
+    release.set()
+    dispatcher.close()
+    assert accepted == [True, True, False, False]
+    assert dispatcher.stats["blocking"]["dropped"] == 2 and dispatcher.stats["blocking"]["sent"] == 3
+
+def test_checkpoint():
+    """Test that a restarted monitor resumes marks, poll schedule and unsent notifications"""
+    logger.info("\n" + "="*60)
+    logger.info("🧪 TEST 6b: CHECKPOINT")
+    logger.info("="*60)
+    
+    release = threading.Event()
+    in_send = threading.Event()
+    
+    class RecordingChannel(NotificationChannel):
+        name = "recording"
+        
+        def __init__(self, block=False):
+            super().__init__(session=object())
+            self.block = block
+            self.sent = []
+        
+        def send(self, batch):
+            in_send.set()
+            if self.block:
+                release.wait(5)
+            self.sent.extend(notification.item_id for notification in batch)
+        
+        def close(self):
+            pass
+    
+    inter, roma = SearchQuery("tuta inter"), SearchQuery("tuta roma")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.json")
+        checkpoint = Checkpoint(path)
+        assert checkpoint.restore(SearchScheduler(Fetcher(), [inter]), AdaptivePoller(), None) == 0
+        
+        # First run: one batch stuck in the channel, two more queued behind it
+        scheduler = SearchScheduler(Fetcher(), [inter, roma], max_workers=1)
+        scheduler.high_water.update({inter.key: 500, roma.key: 300})
+        poller = AdaptivePoller(min_interval=30, max_interval=600)
+        interval = poller.record_success(inter.key, 0, now=1000.0)
+        poller.record_error(roma.key, now=1000.0)
+        dispatcher = NotificationDispatcher([RecordingChannel(block=True)], batch_window=0)
+        dispatcher.submit(Notification("a", "Tuta Inter", "30 €", "inter"))
+        assert in_send.wait(5)
+        dispatcher.submit(Notification("b", "Tuta Inter", "31 €", "inter"))
+        dispatcher.submit(Notification("c", "Tuta Inter", "32 €", "inter"))
+        assert [n.item_id for n in dispatcher.pending()["recording"]] == ["a", "b", "c"]
+        checkpoint.save(7, scheduler, poller, dispatcher, now=1000.0, wall=1_700_000_000.0)
+        assert os.listdir(tmp) == ["checkpoint.json"]
+        
+        # A crash while writing the next one leaves the last checkpoint readable
+        with open(path + ".tmp", "w") as f:
+            f.write('{"version": 1, "cyc')
+        assert checkpoint.load()["cycle"] == 7
+        
+        # Restart 30 s later with only one of the searches still configured
+        channel = RecordingChannel()
+        restarted = NotificationDispatcher([channel], batch_window=0)
+        scheduler = SearchScheduler(Fetcher(), [inter], max_workers=1)
+        poller = AdaptivePoller(min_interval=30, max_interval=600)
+        started = time.perf_counter()
+        assert checkpoint.restore(scheduler, poller, restarted, now=50.0, wall=1_700_000_030.0) == 7
+        logger.info(f"✅ Restored in {(time.perf_counter() - started) * 1000:.2f} ms")
+        assert scheduler.high_water == {inter.key: 500}
+        assert list(poller.states) == [inter.key]
+        assert poller.due([inter.key], 50.0) == [] and poller.seconds_until_due([inter.key], 50.0) == interval - 30
+        restarted.flush()
+        assert channel.sent == ["a", "b", "c"] and restarted.pending() == {"recording": []}
+        restarted.close()
+        
+        # Marks already stored further ahead win over the checkpoint
+        scheduler = SearchScheduler(Fetcher(), [inter], max_workers=1)
+        scheduler.high_water[inter.key] = 900
+        checkpoint.restore(scheduler, AdaptivePoller(), None)
+        assert scheduler.high_water == {inter.key: 900}
+        
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert checkpoint.load() is None and checkpoint.restore(scheduler, AdaptivePoller(), None) == 0
+    release.set()
+    dispatcher.close()
+
+def test_scraping(live: bool = False):
     """Test web scraping"""
     logger.info("\n" + "="*60)
-    logger.info("🧪 TEST 4: WEB SCRAPING (PRODUCTION TEST)")
+    logger.info("🧪 TEST 7: WEB SCRAPING (PRODUCTION TEST)")
     logger.info("="*60)
     
-    if not session:
-        logger.warning("⚠️ Session not available, skipping scraping test")
+    if not live:
+        logger.warning("⚠️ Live scraping only runs from the test script, skipping")
         return
     
     try:
         logger.info(f"🔗 Fetching items from Vinted...")
-        items = fetch_items(session)
+        items = fetch_vinted_items()
         
         if items:
             logger.info(f"✅ Fetched {len(items)} items")
@@ -168,15 +1757,48 @@ def run_all_tests():
     # Test 1: Validation
     test_validation()
     
+    test_rules_reload()
+    test_keyword_matcher()
+    
     # Test 2: Database
     test_database()
     
-    # Test 3: Session
-    session = test_session()
+    test_item_store()
+    test_item_model()
+    test_reports()
+    test_seen_cache()
+    test_relist_detection()
+    test_retention()
+    test_deal_scoring()
+    
+    # Test 3: Browser pool
+    test_browser_pool()
+    
+    test_script_extraction()
+    test_lean_browser_mode()
+    
+    # Test 4: HTTP backend
+    test_http_fetcher()
+    
+    # Test 5: Search scheduler
+    test_search_scheduler()
+    
+    test_incremental_crawl()
+    test_streaming_pipeline()
+    test_image_verification()
+    test_distributed_workers()
+    test_adaptive_poller()
+    test_replay_pipeline()
+    test_metrics()
+    test_lazy_imports()
+    test_rescore()
+    
+    # Test 6: Notifications
+    test_notification_dispatcher()
+    test_checkpoint()
     
-    # Test 4: Web Scraping
-    if session:
-        test_scraping(session)
+    # Test 7: Web Scraping
+    test_scraping(live=True)
     
     logger.info("\n" + "#"*60)
     logger.info("# ✅ ALL TESTS COMPLETED")
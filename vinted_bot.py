@@ -5,31 +5,32 @@ Monitor real-time adult complete football tracksuits (jacket + long pants)
 Using Selenium for real browser automation to bypass API restrictions
 """
 
-import sys
-import subprocess
-
-# Auto-install dependencies
-required_packages = ["selenium", "webdriver-manager"]
-for package in required_packages:
-    try:
-        __import__(package.replace("-", "_"))
-    except ImportError:
-        print(f"[INSTALLING] {package}...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+# Selenium, webdriver-manager and requests are imported where they are first
+# used, so the validators and the store load without them.
+# Install everything with: pip install -r requirements.txt
 
+import copy
+import hashlib
+import io
 import json
+import os
+import queue
+import random
+import re
+import signal
+import sys
 import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlencode
 import sqlite3
 
 # ============================================================================
@@ -44,22 +45,305 @@ CONFIG = {
     "DB_NAME": "vinted_bot.db",
     "LOG_LEVEL": logging.INFO,
     "HEADLESS": True,
+    "BROWSER_POOL_SIZE": 1,
+    "BROWSER_MAX_PAGES": 50,
+    "PAGE_LOAD_TIMEOUT": 20,
+    "PAGE_LOAD_WAIT": 5,
+    "BROWSER_MODE": "default",
+    "BROWSER_PROFILE_DIR": ".chrome-profile",
+    "FETCH_BACKEND": "selenium",
+    "SEARCH_TEXT": "tuta calcio",
+    "VINTED_DOMAIN": "www.vinted.it",
+    "HTTP_TIMEOUT": 10,
+    "HTTP_PER_PAGE": 30,
+    "SEARCHES": [
+        {"search_text": "tuta calcio", "domain": "www.vinted.it"},
+        {"search_text": "tuta da calcio", "domain": "www.vinted.it"},
+        {"search_text": "survêtement", "domain": "www.vinted.fr"},
+        {"search_text": "tracksuit", "domain": "www.vinted.co.uk"},
+    ],
+    "SEARCH_WORKERS": 4,
+    "DOMAIN_MIN_INTERVAL": 2.0,
+    "MAX_PAGES": 5,
+    "STREAM_QUEUE_SIZE": 64,
+    "STREAM_BATCH_SIZE": 16,
+    "BROKER": "sqlite",
+    "SHARED_DB": "vinted_shared.db",
+    "LEASE_SECONDS": 120,
+    "WORKER_IDLE_WAIT": 2.0,
+    "COORDINATOR_INTERVAL": 30,
+    "SEEN_RETENTION_DAYS": 30,
+    "COMPACT_AFTER_DAYS": 7,
+    "ARCHIVE_AFTER_DAYS": 90,
+    "ARCHIVE_DIR": "archive",
+    "ARCHIVE_FORMAT": "jsonl",
+    "RETENTION_INTERVAL": 3600,
+    "RETENTION_BATCH_SIZE": 50_000,
+    "VACUUM_PAGES": 2000,
+    "MIN_INTERVAL": 30,
+    "MAX_INTERVAL": 600,
+    "TARGET_NEW_PER_POLL": 0.5,
+    "RATE_SMOOTHING": 0.3,
+    "ERROR_BACKOFF_MAX": 1800,
+    "SEEN_CACHE_SIZE": 500_000,
+    "TELEGRAM_API_URL": "https://api.telegram.org",
+    "NOTIFY_TIMEOUT": 5,
+    "NOTIFY_QUEUE_SIZE": 1000,
+    "NOTIFY_BATCH_SIZE": 10,
+    "NOTIFY_BATCH_WINDOW": 1.0,
+    "NOTIFY_MAX_RETRIES": 4,
+    "NOTIFY_BACKOFF": 1.0,
+    "METRICS_PORT": 0,
+    "METRICS_HOST": "127.0.0.1",
+    "METRICS_FILE": "",
+    "RESCORE_WORKERS": 0,
+    "RESCORE_CHUNK_SIZE": 5000,
+    "RULES_FILE": "",
+    "RULES_RELOAD_INTERVAL": 5,
+    "RELIST_WINDOW_HOURS": 168,
+    "RELIST_MAX_ENTRIES": 20_000,
+    "RELIST_MIN_SIMILARITY": 0.6,
+    "RELIST_PRICE_TOLERANCE": 0.2,
+    "IMAGE_CHECK": False,
+    "IMAGE_MODEL": "models/tracksuit.onnx",
+    "IMAGE_INPUT_SIZE": 224,
+    "IMAGE_THRESHOLD": 0.5,
+    "IMAGE_BATCH_SIZE": 16,
+    "IMAGE_CACHE": "image_cache.db",
+    "IMAGE_TIMEOUT": 5,
+    "IMAGE_DOWNLOAD_WORKERS": 4,
+    "CHECKPOINT_FILE": "vinted_checkpoint.json",
+    "DEAL_SCORE_THRESHOLD": 0.15,
+    "DEAL_MIN_SAMPLES": 20,
+    "DEAL_MAX_KEYS": 5000,
+    "DEAL_WARMUP_ROWS": 50_000,
 }
 
 # ============================================================================
 # LOGGER SETUP
 # ============================================================================
 
-logging.basicConfig(
-    level=CONFIG["LOG_LEVEL"],
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("vinted_bot.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def setup_logging(level: Optional[int] = None, log_file: str = "vinted_bot.log"):
+    """Log to the console and ``log_file``; called by the entry points, not on import"""
+    logging.basicConfig(
+        level=CONFIG["LOG_LEVEL"] if level is None else level,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class Metric:
+    """A named family of values keyed by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), lock=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = lock or threading.RLock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Tuple = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+class Counter(Metric):
+    """Monotonic count, e.g. items scraped or notifications failed"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+    def snapshot(self) -> Dict:
+        return {",".join(key): value for key, value in sorted(self._values.items())}
+
+class Histogram(Metric):
+    """Bucketed distribution of observations, e.g. seconds spent in a stage"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), lock=None,
+                 buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        super().__init__(name, help_text, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry["counts"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry["count"] if entry else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels(key, (('le', repr(float(bound))),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._labels(key, (('le', '+Inf'),))} {entry['count']}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {entry['sum']}")
+            lines.append(f"{self.name}_count{self._labels(key)} {entry['count']}")
+        return lines
+
+    def snapshot(self) -> Dict:
+        return {
+            ",".join(key): {"count": entry["count"], "sum": entry["sum"]}
+            for key, entry in sorted(self._values.items())
+        }
+
+class MetricsRegistry:
+    """Counters and histograms for the hot path, rendered as Prometheus text.
+
+    ``span(stage)`` times a block into the ``vinted_stage_seconds``
+    histogram, so a slow cycle can be split into browser start, page load,
+    grid wait, extraction, SQLite and notification time.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._metrics = {}
+        self.stage_seconds = self.histogram("vinted_stage_seconds", "Seconds spent in each pipeline stage", ("stage",))
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if existing.kind != metric.kind:
+                    raise ValueError(f"{metric.name} is already registered as a {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames, self._lock))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, self._lock, buckets))
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as one observation of ``stage``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def write_jsonl(self, path: str, **fields):
+        """Append one snapshot line (plus ``fields``) to a JSON-lines file"""
+        record = {"timestamp": time.time(), **fields, "metrics": self.snapshot()}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def reset(self):
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+METRICS = MetricsRegistry()
+ITEMS_SCRAPED = METRICS.counter("vinted_items_scraped_total", "Listings handed to processing after cross-search dedup")
+ITEMS_NEW = METRICS.counter("vinted_items_new_total", "Listings not seen before")
+ITEMS_APPROVED = METRICS.counter("vinted_items_approved_total", "New listings that passed validation")
+ITEMS_REJECTED = METRICS.counter("vinted_items_rejected_total", "New listings rejected, by reason", ("reason",))
+SEARCH_ERRORS = METRICS.counter("vinted_search_errors_total", "Searches that failed, by whether the site blocked us", ("blocked",))
+SELECTOR_FALLBACKS = METRICS.counter("vinted_selector_fallbacks_total", "Pages where script extraction found nothing and selectors were tried")
+BROWSER_STARTS = METRICS.counter("vinted_browser_starts_total", "Chrome instances started by the pool")
+RELISTS = METRICS.counter("vinted_relists_total", "Approved listings suppressed as relists of a recent one")
+ORDINARY_PRICES = METRICS.counter("vinted_ordinary_prices_total", "Approved listings not notified: priced too close to the market")
+NOTIFICATIONS = METRICS.counter("vinted_notifications_total", "Notification outcomes per channel", ("channel", "outcome"))
+IMAGE_CHECKS = METRICS.counter("vinted_image_checks_total", "Listing photos checked, by whether the score was cached", ("outcome",))
+IMAGE_SECONDS = METRICS.histogram("vinted_image_inference_seconds", "Classifier time per photo (batch time / batch size)")
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None,
+                         registry: Optional[MetricsRegistry] = None):
+    """Serve Prometheus metrics at /metrics from a daemon thread; port 0 picks a free port"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = self.server.registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    port = CONFIG["METRICS_PORT"] if port is None else port
+    host = host or CONFIG["METRICS_HOST"]
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or METRICS
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"📈 Metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
 # ============================================================================
 # DATA VALIDATION
 # ============================================================================
@@ -96,16 +380,144 @@ APPROVED_COMBINATIONS = {
     "survêtement", "ensemble", "completo", "set completo"
 }
 
+JACKET_KEYWORDS = {"felpa", "giacca", "jacket", "hoodie", "tuta"}
+
+PANTS_KEYWORDS = {"pantalone", "pants", "trousers", "tuta"}
+
 # ============================================================================
-# DATABASE INITIALIZATION
+# ITEM MODEL
 # ============================================================================
 
-def init_database():
-    """Initialize SQLite database for tracking items"""
-    conn = sqlite3.connect(CONFIG["DB_NAME"])
-    cursor = conn.cursor()
+CURRENCY_CODES = {"EUR", "GBP", "USD", "PLN", "CZK", "SEK", "DKK", "HUF", "RON"}
+CURRENCY_SYMBOLS = {"€": "EUR", "£": "GBP", "$": "USD", "zł": "PLN", "kč": "CZK"}
+SIZE_RE = re.compile(r"^(XXXL|XXL|XXS|XS|XL|S|M|L)\b")
+SIZE_IN_TITLE_RE = re.compile(r"\b(?:taglia|tg\.?|size|taille)\s*:?\s*(XXXL|XXL|XXS|XS|XL|S|M|L)\b", re.IGNORECASE)
+PRICE_NUMBER_RE = re.compile(r"\d[\d.,\s]*")
+
+def parse_price(text: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """Parse "35,00 €", "€1.234,50", "£12.5" or "40 EUR" into (cents, currency)"""
+    if not text:
+        return None, None
+    currency = None
+    upper = text.upper()
+    for code in CURRENCY_CODES:
+        if code in upper:
+            currency = code
+            break
+    else:
+        lower = text.lower()
+        for symbol, code in CURRENCY_SYMBOLS.items():
+            if symbol in lower:
+                currency = code
+                break
     
-    cursor.execute("""
+    match = PRICE_NUMBER_RE.search(text)
+    if not match:
+        return None, currency
+    number = re.sub(r"\s", "", match.group()).rstrip(".,")
+    last = max(number.rfind("."), number.rfind(","))
+    # A trailing separator followed by one or two digits is the decimal point;
+    # every other separator groups thousands.
+    if last >= 0 and len(number) - last - 1 in (1, 2):
+        whole, fraction = number[:last], number[last + 1:].ljust(2, "0")
+    else:
+        whole, fraction = number, "00"
+    whole = whole.replace(".", "").replace(",", "") or "0"
+    return int(whole) * 100 + int(fraction), currency
+
+def normalize_size(text: Optional[str]) -> Optional[str]:
+    """Reduce a size label such as "M / 38 / 10" to "M"; other labels are kept as written"""
+    if not text or not text.strip():
+        return None
+    text = text.strip()
+    match = SIZE_RE.match(text.upper())
+    return match.group(1) if match else text
+
+def size_from_title(title: str) -> Optional[str]:
+    match = SIZE_IN_TITLE_RE.search(title or "")
+    return match.group(1).upper() if match else None
+
+# (item_id, title, price, team, brand, status, vinted_url, reason_rejected,
+#  price_cents, currency, size, seller, duplicate_of)
+ItemRow = Tuple[str, str, str, Optional[str], Optional[str], str, str, Optional[str],
+                Optional[int], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+class Item:
+    """One listing, with price and size parsed once when it is scraped.
+
+    Supports ``item["title"]`` and ``item.get("id")`` so code written
+    against the old item dicts keeps working.
+    """
+
+    __slots__ = ("id", "title", "price", "url", "price_cents", "currency", "size", "brand", "team", "seller", "image",
+                 "duplicate_of")
+
+    def __init__(self, id: str, title: str, price: str = "N/A", url: str = "", price_cents: Optional[int] = None,
+                 currency: Optional[str] = None, size: Optional[str] = None, brand: Optional[str] = None,
+                 team: Optional[str] = None, seller: Optional[str] = None, image: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.price = price
+        self.url = url
+        self.price_cents = price_cents
+        self.currency = currency
+        self.size = size
+        self.brand = brand
+        self.team = team
+        self.seller = seller
+        self.image = image
+        self.duplicate_of = None
+
+    @classmethod
+    def parse(cls, id: str, title: str, price: Optional[str] = None, url: str = "", size: Optional[str] = None,
+              brand: Optional[str] = None, seller: Optional[str] = None, image: Optional[str] = None) -> "Item":
+        """Build an item from scraped text, parsing the price and normalizing the size"""
+        price = price or "N/A"
+        price_cents, currency = parse_price(price)
+        return cls(
+            id, title, price, url or "", price_cents, currency,
+            normalize_size(size) or size_from_title(title), brand or None, None, seller or None, image or None,
+        )
+
+    @classmethod
+    def coerce(cls, item) -> "Item":
+        """Accept an Item or an item dict"""
+        if isinstance(item, cls):
+            return item
+        return cls.parse(
+            str(item.get("id") or ""), item.get("title") or "", item.get("price"), item.get("url") or "",
+            item.get("size"), item.get("brand"), item.get("seller"), item.get("image"),
+        )
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_row(self, status: str, reason: Optional[str] = None) -> ItemRow:
+        return (self.id, self.title, self.price, self.team, self.brand, status, self.url, reason,
+                self.price_cents, self.currency, self.size, self.seller, self.duplicate_of)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Item) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Item(id={self.id!r}, title={self.title!r}, price_cents={self.price_cents!r}, size={self.size!r})"
+
+# ============================================================================
+# DATABASE INITIALIZATION
+# ============================================================================
+
+def init_schema(conn: sqlite3.Connection):
+    """Create tables on an open connection"""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS items (
             item_id TEXT PRIMARY KEY,
             title TEXT NOT NULL,
@@ -115,102 +527,1162 @@ def init_database():
             status TEXT,
             vinted_url TEXT,
             reason_rejected TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            price_cents INTEGER,
+            currency TEXT,
+            size TEXT,
+            seller TEXT,
+            duplicate_of TEXT,
+            reason_code INTEGER
         )
     """)
-    
+    migrate_items(conn)
+    for name in RETIRED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, columns in ITEM_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON items({columns})")
+    conn.execute("CREATE TABLE IF NOT EXISTS reasons (code INTEGER PRIMARY KEY, reason TEXT NOT NULL)")
+    conn.executemany("INSERT OR REPLACE INTO reasons (code, reason) VALUES (?, ?)", REJECTION_REASONS.items())
+    # Old rejected rows, compacted down to their dedup key by retention
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS compact_items (
+            item_id TEXT PRIMARY KEY,
+            reason_code INTEGER,
+            day INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_compact_day ON compact_items(day, reason_code)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            search_key TEXT PRIMARY KEY,
+            high_water INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Streaming price quartiles behind deal scores, one row per PriceStats key
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_stats (
+            key TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
     conn.commit()
-    conn.close()
+
+# Columns added after the first release, with their SQLite types
+ITEM_COLUMNS = {
+    "price_cents": "INTEGER", "currency": "TEXT", "size": "TEXT", "seller": "TEXT", "duplicate_of": "TEXT",
+    "reason_code": "INTEGER",
+}
+
+# Rejection reasons are stored as these codes (mirrored in the reasons
+# table); any other reason text stays in reason_rejected
+REJECTION_REASONS = {
+    1: "Forbidden keywords", 2: "Not a complete tracksuit", 3: "Team not approved", 4: "Size not allowed",
+    5: "Photo not a complete tracksuit",
+}
+REASON_CODES = {reason: code for code, reason in REJECTION_REASONS.items()}
+PHOTO_REJECTED = REJECTION_REASONS[5]
+REASON_SQL = "CASE reason_code {} ELSE reason_rejected END".format(
+    " ".join(f"WHEN {code} THEN '{reason}'" for code, reason in REJECTION_REASONS.items())
+)
+
+def encode_reason(reason: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """(reason_code, reason_rejected) to store for a reason"""
+    if reason in REASON_CODES:
+        return REASON_CODES[reason], None
+    return None, reason or None
+
+def decode_reason(code: Optional[int], text: Optional[str] = None) -> Optional[str]:
+    return REJECTION_REASONS.get(code, text) if code is not None else text
+
+# Secondary indexes behind the report queries; the status index also covers
+# the rejection-reason breakdown
+ITEM_INDEXES = {
+    "idx_items_reason": "status, reason_code, reason_rejected, timestamp",
+    "idx_items_team_currency": "team, currency, price_cents",
+    "idx_items_brand": "brand",
+    "idx_items_timestamp": "timestamp",
+    "idx_items_price": "price_cents",
+    "idx_items_size": "size",
+    "idx_items_duplicate": "duplicate_of",
+}
+RETIRED_INDEXES = ("idx_items_status", "idx_items_team")
+
+def connect_database(path: Optional[str] = None) -> sqlite3.Connection:
+    """Open the items database in WAL mode with the schema up to date"""
+    conn = sqlite3.connect(path or CONFIG["DB_NAME"])
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # new files only; must come before WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    init_schema(conn)
+    return conn
+
+def migrate_items(conn: sqlite3.Connection):
+    """Add missing typed columns to an older items table and backfill prices"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    missing = [column for column in ITEM_COLUMNS if column not in existing]
+    if not missing:
+        return
+    with conn:
+        for column in missing:
+            conn.execute(f"ALTER TABLE items ADD COLUMN {column} {ITEM_COLUMNS[column]}")
+        if "price_cents" in missing:
+            rows = conn.execute("SELECT item_id, price FROM items WHERE price IS NOT NULL").fetchall()
+            conn.executemany(
+                "UPDATE items SET price_cents = ?, currency = ? WHERE item_id = ?",
+                (parse_price(price) + (item_id,) for item_id, price in rows),
+            )
+        if "reason_code" in missing:
+            conn.executemany(
+                "UPDATE items SET reason_code = ?, reason_rejected = NULL WHERE reason_rejected = ?",
+                [(code, reason) for reason, code in REASON_CODES.items()],
+            )
+    logger.info(f"🗃️ Added items columns: {', '.join(missing)}")
+
+def init_database():
+    """Initialize SQLite database for tracking items"""
+    get_store()
     logger.info("✅ Database initialized")
 
 # ============================================================================
 # VALIDATION FUNCTIONS
 # ============================================================================
 
+class MatchVerdict(NamedTuple):
+    """Every keyword category found in one title, in title order"""
+    forbidden: Tuple[str, ...] = ()
+    age: Tuple[str, ...] = ()
+    teams: Tuple[str, ...] = ()
+    brands: Tuple[str, ...] = ()
+    combos: Tuple[str, ...] = ()
+    jacket: Tuple[str, ...] = ()
+    pants: Tuple[str, ...] = ()
+
+    @property
+    def team(self) -> Optional[str]:
+        return self.teams[0] if self.teams else None
+
+    @property
+    def brand(self) -> Optional[str]:
+        return self.brands[0] if self.brands else None
+
+    @property
+    def has_forbidden(self) -> bool:
+        return bool(self.forbidden or self.age)
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(self.combos or (self.jacket and self.pants))
+
+    @property
+    def reason(self) -> str:
+        if self.has_forbidden:
+            return "Forbidden keywords"
+        if not self.is_complete:
+            return "Not a complete tracksuit"
+        if not self.team:
+            return "Team not approved"
+        return "Valid"
+
+    @property
+    def is_valid(self) -> bool:
+        return self.reason == "Valid"
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every keyword category.
+
+    All keyword lists are compiled into one automaton, so a title is
+    lowercased once and scanned once no matter how many keywords there are.
+    Matching keeps the substring semantics of the old ``keyword in title``
+    checks, including overlapping hits such as "tuta" inside "tuta calcio".
+    """
+
+    def __init__(self, categories: Dict[str, object]):
+        self.categories = tuple(categories)
+        keywords = {}
+        for category, words in categories.items():
+            for word in words:
+                keywords.setdefault(word.lower(), []).append(category)
+        self._keywords = [(word, tuple(cats)) for word, cats in keywords.items()]
+        self._lookup = dict(self._keywords)
+        self._build()
+
+    def _build(self):
+        goto = [{}]
+        out = [[]]
+        for index, (word, _) in enumerate(self._keywords):
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append([])
+                    nxt = len(goto) - 1
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].append(index)
+        
+        # Breadth-first failure links, folding each state's fallback
+        # transitions (except the root's) into its own table so scanning
+        # never has to walk the failure chain.
+        fail = [0] * len(goto)
+        delta = [{} for _ in goto]
+        order = list(goto[0].values())
+        for state in order:
+            for ch, nxt in goto[state].items():
+                order.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+        for state in order:
+            inherited = delta[fail[state]] if fail[state] else {}
+            delta[state] = {**inherited, **goto[state]}
+        
+        self._root = goto[0]
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+
+    def scan(self, text: str) -> List[Tuple[int, str]]:
+        """Return (start, keyword) for every keyword occurrence in lowercase text"""
+        delta, root, out, keywords = self._delta, self._root, self._out, self._keywords
+        state = 0
+        hits = []
+        for end, ch in enumerate(text):
+            nxt = delta[state].get(ch)
+            state = nxt if nxt is not None else root.get(ch, 0)
+            if out[state]:
+                for index in out[state]:
+                    word = keywords[index][0]
+                    hits.append((end - len(word) + 1, index))
+        hits.sort()
+        return [(start, keywords[index][0]) for start, index in hits]
+
+    def match(self, title: str) -> MatchVerdict:
+        """Scan a title once and group every hit by category"""
+        if not title:
+            return MatchVerdict()
+        found = {category: [] for category in self.categories}
+        seen = set()
+        for _, word in self.scan(title.lower()):
+            if word not in seen:
+                seen.add(word)
+                for category in self._lookup[word]:
+                    found[category].append(word)
+        return MatchVerdict(**{category: tuple(words) for category, words in found.items()})
+
+# Matcher category -> module-level keyword set
+RULE_CATEGORIES = {
+    "forbidden": "FORBIDDEN_KEYWORDS",
+    "age": "FORBIDDEN_AGE_KEYWORDS",
+    "teams": "APPROVED_TEAMS",
+    "brands": "APPROVED_BRANDS",
+    "combos": "APPROVED_COMBINATIONS",
+    "jacket": "JACKET_KEYWORDS",
+    "pants": "PANTS_KEYWORDS",
+}
+
+def build_matcher(rule_sets: Optional[Dict[str, object]] = None) -> KeywordMatcher:
+    """Compile the keyword sets (the module-level ones unless given) into a KeywordMatcher"""
+    rule_sets = rule_sets or globals()
+    return KeywordMatcher({category: rule_sets[name] for category, name in RULE_CATEGORIES.items()})
+
+MATCHER = build_matcher()
+
+def match_title(title: str) -> MatchVerdict:
+    """Return the full keyword verdict for a listing title"""
+    return MATCHER.match(title)
+
+def check_size(size: Optional[str]) -> bool:
+    """Return True if the size is allowed, or unknown"""
+    return size is None or size in ALLOWED_SIZES
+
+def validate_item(item: Item) -> Tuple[MatchVerdict, str]:
+    """Check the title keywords, then the size; return the verdict and the reason"""
+    verdict = match_title(item.title)
+    reason = verdict.reason
+    if reason == "Valid" and not check_size(item.size):
+        reason = "Size not allowed"
+    return verdict, reason
+
 def check_forbidden_keywords(text: str) -> bool:
     """Return True if text contains forbidden keywords"""
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    for keyword in FORBIDDEN_KEYWORDS + FORBIDDEN_AGE_KEYWORDS:
-        if keyword in text_lower:
-            return True
-    return False
+    return match_title(text).has_forbidden
 
 def check_team(title: str) -> Optional[str]:
     """Extract and validate team name"""
-    text = title.lower()
-    for team in APPROVED_TEAMS:
-        if team in text:
-            return team
-    return None
+    return match_title(title).team
 
 def check_brand(title: str) -> Optional[str]:
     """Extract and validate brand name"""
-    text = title.lower()
-    for brand in APPROVED_BRANDS:
-        if brand in text:
-            return brand
-    return None
+    return match_title(title).brand
 
 def is_valid_tracksuit(title: str) -> tuple:
     """Validate if title matches tracksuit criteria"""
-    title_lower = title.lower()
-    
-    if check_forbidden_keywords(title_lower):
-        return False, "Forbidden keywords"
-    
-    has_approved_combo = any(combo in title_lower for combo in APPROVED_COMBINATIONS)
+    verdict = match_title(title)
+    return verdict.is_valid, verdict.reason
+
+# ============================================================================
+# RULES
+# ============================================================================
+
+# Rules-file keys and the module-level sets they replace
+RULE_SETS = {
+    "approved_teams": "APPROVED_TEAMS",
+    "approved_brands": "APPROVED_BRANDS",
+    "allowed_sizes": "ALLOWED_SIZES",
+    "forbidden_keywords": "FORBIDDEN_KEYWORDS",
+    "forbidden_age_keywords": "FORBIDDEN_AGE_KEYWORDS",
+    "approved_combinations": "APPROVED_COMBINATIONS",
+    "jacket_keywords": "JACKET_KEYWORDS",
+    "pants_keywords": "PANTS_KEYWORDS",
+}
+
+DEFAULT_RULE_SETS = {name: frozenset(globals()[name]) for name in RULE_SETS.values()}
+DEFAULT_CONFIG = copy.deepcopy(CONFIG)
+
+RULE_HITS = METRICS.counter("vinted_rule_hits_total", "Processed listings in which each keyword fired", ("category", "keyword"))
+RULES_RELOADS = METRICS.counter("vinted_rules_reloads_total", "Rules file loads by outcome", ("outcome",))
+
+_RULES_LOCK = threading.Lock()
+_FILE_CONFIG_KEYS = set()
+
+# Settings read each time they are used; everything else is read once while
+# the bot starts, so a reload leaves those at their startup values
+RELOADABLE_CONFIG = frozenset({
+    "DEAL_SCORE_THRESHOLD", "METRICS_FILE", "HTTP_TIMEOUT", "HTTP_PER_PAGE", "NOTIFY_TIMEOUT",
+    "PAGE_LOAD_TIMEOUT", "PAGE_LOAD_WAIT", "IMAGE_TIMEOUT", "STREAM_BATCH_SIZE", "STREAM_QUEUE_SIZE",
+    "COMPACT_AFTER_DAYS", "ARCHIVE_AFTER_DAYS", "RETENTION_BATCH_SIZE", "VACUUM_PAGES",
+    "SEEN_RETENTION_DAYS", "SEARCHES",  # the coordinator re-reads its searches every round
+})
+
+def read_dotenv(path: str = ".env") -> Dict[str, str]:
+    """KEY=VALUE pairs from a .env file (see .env.example); empty if there is none"""
+    values = {}
+    if not path or not os.path.exists(path):
+        return values
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            values[key.strip()] = value.strip().strip("'\"")
+    return values
+
+def coerce_setting(key: str, value):
+    """Convert a text value to the type of CONFIG[key]"""
+    default = DEFAULT_CONFIG[key]
+    if not isinstance(value, str):
+        return value
+    if key == "LOG_LEVEL":
+        level = logging.getLevelName(value.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"{key}: unknown log level {value!r}")
+        return level
+    if isinstance(default, bool):
+        if value.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.strip().lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"{key}: expected a boolean, got {value!r}")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, (list, dict)):
+        return json.loads(value)
+    return value
+
+def env_overrides(environ: Optional[Dict[str, str]] = None, dotenv_path: Optional[str] = ".env") -> Dict:
+    """CONFIG values set in .env or the environment (which wins), typed like the defaults"""
+    values = read_dotenv(dotenv_path) if dotenv_path else {}
+    values.update(os.environ if environ is None else environ)
+    overrides = {}
+    for key in DEFAULT_CONFIG:
+        raw = values.get(key)
+        if raw is None or (raw == "" and not isinstance(DEFAULT_CONFIG[key], str)):
+            continue
+        overrides[key] = coerce_setting(key, raw)
+    return overrides
+
+def read_rules_file(path: str) -> Dict:
+    """Parse a JSON or YAML rules file"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError("YAML rules files need PyYAML (pip install pyyaml); JSON works without it") from e
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("a rules file must contain a mapping")
+    return data
+
+def apply_rules(data: Dict, environ: Optional[Dict[str, str]] = None, dotenv_path: Optional[str] = ".env",
+                reload: bool = False) -> KeywordMatcher:
+    """Validate a rules mapping, then swap in its keyword sets, a new matcher and config.
+
+    Everything is validated and compiled before anything changes, so a bad
+    file leaves the running rules untouched. Sets missing from the file fall
+    back to the built-in defaults; environment overrides win over the file.
+    On a reload only RELOADABLE_CONFIG keys change; other changed keys are
+    logged and keep their startup values.
+    """
+    rules = data.get("rules") or {}
+    settings = data.get("config") or {}
+    unknown = sorted(set(rules) - set(RULE_SETS))
+    if unknown:
+        raise ValueError(f"unknown rule sets: {', '.join(unknown)} (expected {', '.join(RULE_SETS)})")
     
-    if not has_approved_combo:
-        has_jacket = any(word in title_lower for word in ["felpa", "giacca", "jacket", "hoodie", "tuta"])
-        has_pants = any(word in title_lower for word in ["pantalone", "pants", "trousers", "tuta"])
-        if not (has_jacket and has_pants):
-            return False, "Not a complete tracksuit"
+    rule_sets = dict(DEFAULT_RULE_SETS)
+    for key, values in rules.items():
+        if not isinstance(values, list) or not all(isinstance(v, str) and v.strip() for v in values):
+            raise ValueError(f"{key} must be a list of non-empty strings")
+        normalize = str.upper if key == "allowed_sizes" else str.lower
+        rule_sets[RULE_SETS[key]] = frozenset(normalize(v.strip()) for v in values)
     
-    team = check_team(title)
-    if not team:
-        return False, "Team not approved"
+    new_config = {}
+    for key, value in settings.items():
+        if key not in DEFAULT_CONFIG:
+            logger.warning(f"⚠️ Ignoring unknown config key {key}")
+            continue
+        new_config[key] = coerce_setting(key, value)
+    restored = {key: copy.deepcopy(DEFAULT_CONFIG[key]) for key in _FILE_CONFIG_KEYS - set(new_config)}
+    overrides = env_overrides(environ, dotenv_path)
+    file_keys = set(new_config)
+    if reload:
+        wanted = {**restored, **new_config, **overrides}
+        fixed = sorted(key for key, value in wanted.items() if key not in RELOADABLE_CONFIG and value != CONFIG[key])
+        if fixed:
+            logger.warning(f"⚠️ Ignoring changed startup settings until restart: {', '.join(fixed)}")
+        for values in (restored, new_config, overrides):
+            for key in [key for key in values if key not in RELOADABLE_CONFIG]:
+                del values[key]
+        file_keys = (file_keys - set(fixed)) | (_FILE_CONFIG_KEYS & set(fixed))
     
-    return True, "Valid"
+    matcher = build_matcher(rule_sets)
+    with _RULES_LOCK:
+        globals().update(rule_sets)
+        globals()["MATCHER"] = matcher
+        CONFIG.update(restored)
+        CONFIG.update(new_config)
+        CONFIG.update(overrides)
+        _FILE_CONFIG_KEYS.clear()
+        _FILE_CONFIG_KEYS.update(file_keys)
+    return matcher
+
+def rule_snapshot() -> Dict:
+    """The live keyword and size sets, matcher and config, picklable for worker processes"""
+    with _RULES_LOCK:
+        snapshot = {name: globals()[name] for name in RULE_SETS.values()}
+        snapshot["MATCHER"] = MATCHER
+        snapshot["CONFIG"] = copy.deepcopy(CONFIG)
+        return snapshot
+
+def restore_rules(snapshot: Dict):
+    """Install a rule_snapshot() taken in another process"""
+    snapshot = dict(snapshot)
+    with _RULES_LOCK:
+        CONFIG.update(snapshot.pop("CONFIG"))
+        globals().update(snapshot)
+
+def load_settings(environ: Optional[Dict[str, str]] = None, dotenv_path: Optional[str] = ".env", rules: bool = True):
+    """Apply .env/environment overrides, then the rules file if one is configured.
+
+    Runs before anything is built, so every config key in the file takes effect.
+    """
+    CONFIG.update(env_overrides(environ, dotenv_path))
+    if rules and CONFIG["RULES_FILE"]:
+        apply_rules(read_rules_file(CONFIG["RULES_FILE"]), environ, dotenv_path)
+        logger.info(f"📜 Rules loaded from {CONFIG['RULES_FILE']}")
+
+class RulesWatcher:
+    """Reload the rules file into a fresh matcher whenever it changes on disk.
+
+    The file's mtime and size are polled every ``interval`` seconds from a
+    daemon thread, so the monitor loop never waits on it. A file that fails
+    to parse or validate is logged and skipped, keeping the current rules.
+    Only RELOADABLE_CONFIG keys change on a reload (see apply_rules).
+    """
+
+    def __init__(self, path: str, interval: Optional[float] = None, environ: Optional[Dict[str, str]] = None,
+                 dotenv_path: Optional[str] = ".env"):
+        self.path = path
+        self.interval = CONFIG["RULES_RELOAD_INTERVAL"] if interval is None else interval
+        self.environ = environ
+        self.dotenv_path = dotenv_path
+        self._stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> bool:
+        """Reload if the file changed; True when new rules were applied"""
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if self._stamp != "missing":
+                logger.warning(f"⚠️ Rules file unavailable: {e}")
+                self._stamp = "missing"
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            apply_rules(read_rules_file(self.path), self.environ, self.dotenv_path, reload=True)
+        except Exception as e:
+            RULES_RELOADS.inc(outcome="error")
+            logger.error(f"❌ Rules file {self.path} rejected, keeping the current rules: {e}")
+            return False
+        RULES_RELOADS.inc(outcome="ok")
+        logger.info(f"📜 Rules loaded from {self.path}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> "RulesWatcher":
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="rules-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.interval + 1)
+
+def record_rule_hits(verdict: MatchVerdict):
+    for category, keywords in zip(verdict._fields, verdict):
+        for keyword in keywords:
+            RULE_HITS.inc(category=category, keyword=keyword)
+
+def rule_hit_report() -> Dict[str, Dict[str, int]]:
+    """Hits per keyword of every active rule, zeros included, busiest first"""
+    report = {}
+    for category, name in RULE_CATEGORIES.items():
+        hits = {keyword: RULE_HITS.value(category=category, keyword=keyword) for keyword in globals()[name]}
+        report[category] = dict(sorted(hits.items(), key=lambda entry: (-entry[1], entry[0])))
+    return report
 
 # ============================================================================
 # DATABASE OPERATIONS
 # ============================================================================
 
+class SeenCache:
+    """Bounded in-memory index of the newest stored numeric item ids.
+
+    Vinted ids grow over time, so the cache keeps the ``capacity`` largest
+    ids in a sorted ``array('q')`` (8 bytes each) and evicts the oldest ones
+    in chunks. Everything above ``floor`` is known exactly: a miss there
+    means the id was never stored. Ids at or below ``floor``, and
+    non-numeric ids, are answered with ``None`` so the caller falls back to
+    the database.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or CONFIG["SEEN_CACHE_SIZE"]
+        self._ids = array("q")
+        self.floor = -1
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _numeric(item_id) -> Optional[int]:
+        item_id = str(item_id)
+        if item_id.isascii() and item_id.isdigit() and len(item_id) < 19:
+            return int(item_id)
+        return None
+
+    def load(self, conn: sqlite3.Connection):
+        """Fill the cache with the newest ids already stored, compacted ones included"""
+        numeric = "WHERE item_id NOT GLOB '*[^0-9]*' AND length(item_id) BETWEEN 1 AND 18"
+        rows = conn.execute(
+            f"SELECT CAST(item_id AS INTEGER) AS n FROM items {numeric} "
+            f"UNION ALL SELECT CAST(item_id AS INTEGER) FROM compact_items {numeric} "
+            "ORDER BY n DESC LIMIT ?",
+            (self.capacity,),
+        )
+        ids = array("q", (row[0] for row in rows))
+        ids.reverse()
+        self._ids = ids
+        self.floor = ids[0] - 1 if len(ids) >= self.capacity else -1
+
+    def add(self, item_id):
+        number = self._numeric(item_id)
+        if number is None or number <= self.floor:
+            return
+        ids = self._ids
+        if not ids or number > ids[-1]:
+            ids.append(number)
+        else:
+            index = bisect_left(ids, number)
+            if index < len(ids) and ids[index] == number:
+                return
+            ids.insert(index, number)
+        if len(ids) > self.capacity:
+            drop = len(ids) - self.capacity + max(1, self.capacity // 16)
+            self.floor = ids[drop - 1]
+            del ids[:drop]
+            self.evicted += drop
+
+    def lookup(self, item_id) -> Optional[bool]:
+        """True if stored, False if certainly not, None if the DB must decide"""
+        number = self._numeric(item_id)
+        if number is None or number <= self.floor:
+            self.fallbacks += 1
+            return None
+        ids = self._ids
+        index = bisect_left(ids, number)
+        if index < len(ids) and ids[index] == number:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._ids),
+            "capacity": self.capacity,
+            "bytes": self._ids.itemsize * len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+            "evicted": self.evicted,
+        }
+
+
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+_MINHASH_RNG = random.Random(0x5EED)
+MINHASH_PERMUTATIONS = [
+    (_MINHASH_RNG.randrange(1, MINHASH_PRIME), _MINHASH_RNG.randrange(0, MINHASH_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+def title_tokens(title: str) -> Tuple[str, ...]:
+    """The distinct lowercased words of a title, sorted and interned"""
+    return tuple(sorted({sys.intern(word) for word in re.findall(r"[^\W_]+", (title or "").lower())}))
+
+def minhash(tokens: Tuple[str, ...]) -> List[int]:
+    """MinHash signature; matching positions estimate the Jaccard similarity of two token sets"""
+    if not tokens:
+        return [0] * len(MINHASH_PERMUTATIONS)
+    hashes = [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big") for token in tokens]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_PERMUTATIONS]
+
+def band_keys(signature: List[int]) -> Tuple[int, ...]:
+    """One bucket key per band of MINHASH_ROWS signature values"""
+    return tuple(
+        hash((band,) + tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+        for band in range(MINHASH_BANDS)
+    )
+
+class Fingerprint:
+    """One indexed listing"""
+
+    __slots__ = ("item_id", "tokens", "keys", "price_cents", "size", "seller", "queued_at", "last_seen")
+
+    def __init__(self, item_id: str, tokens: Tuple[str, ...], keys: Tuple[int, ...], price_cents: Optional[int],
+                 size: Optional[str], seller: Optional[str], now: float):
+        self.item_id = item_id
+        self.tokens = tokens
+        self.keys = keys
+        self.price_cents = price_cents
+        self.size = size
+        self.seller = seller
+        self.queued_at = now
+        self.last_seen = now
+
+class RelistIndex:
+    """Recent approved listings, searchable for relists of the same tracksuit.
+
+    Titles are reduced to word sets and MinHash signatures, and banded into
+    LSH buckets (8 bands of 4 rows), so a lookup only compares the few
+    listings sharing a bucket. A candidate is a relist when the exact word
+    Jaccard similarity reaches ``min_similarity``, the seller and size match
+    (when both are known) and the price is within ``price_tolerance``. Entries
+    expire ``window`` seconds after they were last matched, and at most
+    ``max_entries`` are kept.
+    """
+
+    def __init__(self, window: Optional[float] = None, max_entries: Optional[int] = None,
+                 min_similarity: Optional[float] = None, price_tolerance: Optional[float] = None):
+        self.window = CONFIG["RELIST_WINDOW_HOURS"] * 3600 if window is None else window
+        self.max_entries = max_entries or CONFIG["RELIST_MAX_ENTRIES"]
+        self.min_similarity = CONFIG["RELIST_MIN_SIMILARITY"] if min_similarity is None else min_similarity
+        self.price_tolerance = CONFIG["RELIST_PRICE_TOLERANCE"] if price_tolerance is None else price_tolerance
+        self._buckets = {}
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _matches(self, entry: Fingerprint, tokens: set, item: Item) -> bool:
+        if item.seller and entry.seller and item.seller != entry.seller:
+            return False
+        if item.size and entry.size and item.size != entry.size:
+            return False
+        price_cents = item.price_cents
+        if price_cents and entry.price_cents:
+            if abs(price_cents - entry.price_cents) > self.price_tolerance * max(price_cents, entry.price_cents):
+                return False
+        shared = len(tokens.intersection(entry.tokens))
+        union = len(tokens) + len(entry.tokens) - shared
+        return bool(union) and shared / union >= self.min_similarity
+
+    def _remove(self, entry: Fingerprint):
+        for key in entry.keys:
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.remove(entry)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _evict(self, now: float):
+        cutoff = now - self.window
+        while self._queue and self._queue[0].queued_at < cutoff:
+            entry = self._queue.popleft()
+            if entry.last_seen >= cutoff:  # matched since it was queued: keep it
+                entry.queued_at = entry.last_seen
+                self._queue.append(entry)
+            else:
+                self._remove(entry)
+
+    def _insert(self, item_id: str, tokens: Tuple[str, ...], keys: Tuple[int, ...], price_cents: Optional[int],
+                size: Optional[str], seller: Optional[str], now: float):
+        entry = Fingerprint(item_id, tokens, keys, price_cents, size, seller, now)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(entry)
+        self._queue.append(entry)
+        while len(self._queue) > self.max_entries:
+            self._remove(self._queue.popleft())
+
+    def _find(self, item: Item, words: set, keys: Tuple[int, ...], now: float) -> Optional[str]:
+        """Oldest indexed listing the item relists (caller holds the lock)"""
+        self._evict(now)
+        best = None
+        for key in keys:
+            for entry in self._buckets.get(key, ()):
+                if entry.item_id != item.id and (best is None or entry.queued_at < best.queued_at):
+                    if self._matches(entry, words, item):
+                        best = entry
+        if best is None:
+            return None
+        best.last_seen = now
+        return best.item_id
+
+    def find(self, item: Item, now: Optional[float] = None) -> Optional[str]:
+        """Return the id of the listing this one relists, without indexing it"""
+        now = time.time() if now is None else now
+        tokens = title_tokens(item.title)
+        keys = band_keys(minhash(tokens))
+        with self._lock:
+            return self._find(item, set(tokens), keys, now)
+
+    def check(self, item: Item, now: Optional[float] = None) -> Optional[str]:
+        """Return the id of the listing this one relists, or index it and return None"""
+        now = time.time() if now is None else now
+        tokens = title_tokens(item.title)
+        keys = band_keys(minhash(tokens))
+        with self._lock:
+            duplicate = self._find(item, set(tokens), keys, now)
+            if duplicate is None:
+                self._insert(item.id, tokens, keys, item.price_cents, item.size, item.seller, now)
+            return duplicate
+
+    def load(self, conn: sqlite3.Connection, now: Optional[float] = None):
+        """Index the approved, non-relist listings stored within the window (the rows persist_stage indexes)"""
+        now = time.time() if now is None else now
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - self.window))
+        rows = conn.execute(
+            "SELECT item_id, title, price_cents, size, seller, CAST(strftime('%s', timestamp) AS INTEGER) FROM items "
+            "WHERE status = 'approved' AND duplicate_of IS NULL AND timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+            (since, self.max_entries),
+        ).fetchall()
+        with self._lock:
+            self._buckets.clear()
+            self._queue.clear()
+            for item_id, title, price_cents, size, seller, stamp in reversed(rows):
+                tokens = title_tokens(title)
+                self._insert(item_id, tokens, band_keys(minhash(tokens)), price_cents, size, seller, float(stamp or now))
+
+class P2Quantile:
+    """Running estimate of one quantile from five markers (the P² algorithm of Jain and Chlamtac).
+
+    ``add`` is O(1) and memory is constant: the markers sit at the minimum,
+    the maximum, the quantile and halfway to it on either side, and are
+    nudged along a parabola through their neighbours as values arrive.
+    """
+
+    __slots__ = ("q", "count", "heights", "positions", "desired", "increments")
+
+    def __init__(self, q: float):
+        self.q = q
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value: float):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            insort(heights, value)
+            return
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect_right(heights, value) - 1
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def state(self) -> List:
+        return [self.count, self.heights, self.positions, self.desired]
+
+    @classmethod
+    def from_state(cls, q: float, state: List) -> "P2Quantile":
+        estimator = cls(q)
+        estimator.count, estimator.heights, estimator.positions, estimator.desired = state
+        return estimator
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if self.count <= 5:
+            return self.heights[round(self.q * (len(self.heights) - 1))]
+        return self.heights[2]
+
+# (currency, team, brand, size); coarser keys leave the trailing fields None
+PriceKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+class PriceStats:
+    """Streaming price quartiles per team, brand and size, for scoring deals.
+
+    Each approved listing updates the estimators of three keys, from its
+    exact (currency, team, brand, size) down to (currency, team), so a rare
+    brand or size still has a market price from its team. A listing is
+    scored against the most specific key with ``min_samples`` prices. Keys
+    are kept in least-recently-updated order and the oldest dropped past
+    ``max_keys``. The store saves the estimators of every key it updates in
+    the price_stats table, so a restart reads a few thousand rows instead
+    of replaying the price history.
+    """
+
+    QUANTILES = (0.25, 0.5, 0.75)
+
+    def __init__(self, max_keys: Optional[int] = None, min_samples: Optional[int] = None):
+        self.max_keys = max_keys or CONFIG["DEAL_MAX_KEYS"]
+        self.min_samples = CONFIG["DEAL_MIN_SAMPLES"] if min_samples is None else min_samples
+        self._stats: "OrderedDict[PriceKey, Tuple[P2Quantile, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    @staticmethod
+    def keys(currency: Optional[str], team: Optional[str], brand: Optional[str], size: Optional[str]) -> List[PriceKey]:
+        """Most specific first, without repeats when brand or size is unknown"""
+        return list(dict.fromkeys([(currency, team, brand, size), (currency, team, brand, None), (currency, team, None, None)]))
+
+    def add(self, price_cents: Optional[int], currency: Optional[str], team: Optional[str], brand: Optional[str],
+            size: Optional[str]) -> List[PriceKey]:
+        """Update every key of the listing; return them"""
+        if price_cents is None:
+            return []
+        keys = self.keys(currency, team, brand, size)
+        with self._lock:
+            for key in keys:
+                estimators = self._stats.get(key)
+                if estimators is None:
+                    estimators = self._stats[key] = tuple(P2Quantile(q) for q in self.QUANTILES)
+                    if len(self._stats) > self.max_keys:
+                        self._stats.popitem(last=False)
+                else:
+                    self._stats.move_to_end(key)
+                for estimator in estimators:
+                    estimator.add(price_cents)
+        return keys
+
+    def dump(self, keys: Iterable[PriceKey], now: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """price_stats rows for the given keys"""
+        with self._lock:
+            return self.rows({key: self._stats[key] for key in keys if key in self._stats}, now)
+
+    @staticmethod
+    def rows(stats: Dict[PriceKey, Tuple[P2Quantile, ...]], now: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """price_stats rows for a mapping of estimators, e.g. from ``stage``"""
+        now = time.time() if now is None else now
+        return [(json.dumps(key), json.dumps([estimator.state() for estimator in estimators]), now)
+                for key, estimators in stats.items()]
+
+    def stage(self, listings: Iterable[Tuple]) -> Dict[PriceKey, Tuple[P2Quantile, ...]]:
+        """Copies of the estimators of every key the (price_cents, currency, team, brand, size)
+        listings touch, updated with them; nothing changes until ``commit``"""
+        staged = {}
+        with self._lock:
+            for price_cents, currency, team, brand, size in listings:
+                if price_cents is None:
+                    continue
+                for key in self.keys(currency, team, brand, size):
+                    estimators = staged.get(key)
+                    if estimators is None:
+                        current = self._stats.get(key)
+                        estimators = staged[key] = tuple(
+                            P2Quantile.from_state(e.q, copy.deepcopy(e.state())) for e in current
+                        ) if current else tuple(P2Quantile(q) for q in self.QUANTILES)
+                    for estimator in estimators:
+                        estimator.add(price_cents)
+        return staged
+
+    def commit(self, staged: Dict[PriceKey, Tuple[P2Quantile, ...]]):
+        """Install estimators returned by ``stage``"""
+        with self._lock:
+            for key, estimators in staged.items():
+                self._stats[key] = estimators
+                self._stats.move_to_end(key)
+                if len(self._stats) > self.max_keys:
+                    self._stats.popitem(last=False)
+
+    def market(self, item: Item) -> Optional[Tuple[PriceKey, int, float]]:
+        """(key, sample count, median cents) the item is compared with, or None without enough history"""
+        with self._lock:
+            for key in self.keys(item.currency, item.team, item.brand, item.size):
+                estimators = self._stats.get(key)
+                if estimators and estimators[0].count >= self.min_samples:
+                    return key, estimators[0].count, estimators[1].value()
+        return None
+
+    def score(self, item: Item) -> Optional[float]:
+        """How far below the market median the item is priced (0.3 = 30% cheaper); None when unknown"""
+        market = self.market(item) if item.price_cents is not None else None
+        if market is None or not market[2]:
+            return None
+        return 1 - item.price_cents / market[2]
+
+    def query(self, team: Optional[str] = None, brand: Optional[str] = None, size: Optional[str] = None,
+              currency: Optional[str] = None) -> List[Dict]:
+        """Quartiles per key, filtered on the given fields, busiest first"""
+        wanted = (currency, team, brand, size)
+        with self._lock:
+            rows = [
+                {"currency": key[0], "team": key[1], "brand": key[2], "size": key[3], "count": estimators[0].count,
+                 **{f"p{round(e.q * 100)}": round(e.value()) for e in estimators}}
+                for key, estimators in self._stats.items()
+                if all(want is None or want == have for want, have in zip(wanted, key))
+            ]
+        return sorted(rows, key=lambda row: (-row["count"], [str(v) for v in (row["team"], row["brand"], row["size"])]))
+
+    def load(self, conn: sqlite3.Connection, limit: Optional[int] = None):
+        """Restore the saved estimators; the first time, replay the most recent approved prices and save them"""
+        saved = conn.execute("SELECT key, state FROM price_stats ORDER BY updated DESC LIMIT ?", (self.max_keys,)).fetchall()
+        with self._lock:
+            self._stats.clear()
+            for key, state in reversed(saved):
+                self._stats[tuple(json.loads(key))] = tuple(
+                    P2Quantile.from_state(q, entry) for q, entry in zip(self.QUANTILES, json.loads(state))
+                )
+        if saved:
+            return
+        rows = conn.execute(
+            "SELECT price_cents, currency, team, brand, size FROM items WHERE status = 'approved' "
+            "AND duplicate_of IS NULL AND price_cents IS NOT NULL ORDER BY timestamp DESC LIMIT ?",
+            (limit or CONFIG["DEAL_WARMUP_ROWS"],),
+        ).fetchall()
+        for row in reversed(rows):
+            self.add(*row)
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO price_stats (key, state, updated) VALUES (?, ?, ?)", self.dump(list(self._stats)))
+
+class ItemStore:
+    """Long-lived SQLite connection owning every read and write of the items table.
+
+    The connection runs in WAL mode so a whole cycle is written in one
+    transaction with a single fsync, and existence checks for a cycle are
+    answered by one ``IN (...)`` query instead of a connection per item.
+    """
+
+    INSERT_SQL = """
+        INSERT OR IGNORE INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected,
+                                     price_cents, currency, size, seller, duplicate_of, reason_code)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    ROW_FIELDS = 13
+    IN_CHUNK = 512
+
+    def __init__(self, path: Optional[str] = None, seen: Optional[SeenCache] = None, relists: Optional[RelistIndex] = None,
+                 prices: Optional[PriceStats] = None):
+        self.path = path or CONFIG["DB_NAME"]
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # new files only; must come before WAL
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.lock = threading.RLock()
+        init_schema(self.conn)
+        self.seen = seen if seen is not None else SeenCache()
+        self.seen.load(self.conn)
+        self.relists = relists if relists is not None else RelistIndex()
+        self.relists.load(self.conn)
+        self.prices = prices if prices is not None else PriceStats()
+        self.prices.load(self.conn)
+
+    @staticmethod
+    def _placeholders(count: int) -> int:
+        """Round IN-list sizes up to a power of two so statements stay cached"""
+        size = 8
+        while size < count:
+            size *= 2
+        return size
+
+    def _select_existing(self, ids: List[str]) -> set:
+        size = self._placeholders(len(ids))
+        padded = list(ids) + [None] * (size - len(ids))
+        marks = ",".join("?" * size)
+        sql = f"SELECT item_id FROM items WHERE item_id IN ({marks}) UNION ALL SELECT item_id FROM compact_items WHERE item_id IN ({marks})"
+        return {row[0] for row in self.conn.execute(sql, padded + padded)}
+
+    def exists(self, item_id: str) -> bool:
+        with self.lock:
+            cached = self.seen.lookup(item_id)
+            if cached is not None:
+                return cached
+            return self.conn.execute(
+                "SELECT 1 FROM items WHERE item_id = ? UNION ALL SELECT 1 FROM compact_items WHERE item_id = ?", (item_id, item_id)
+            ).fetchone() is not None
+
+    def filter_unseen(self, ids: List[str]) -> List[str]:
+        """Return the ids not yet stored, keeping their order and dropping repeats"""
+        unique = list(dict.fromkeys(ids))
+        existing = set()
+        with self.lock:
+            unknown = []
+            for item_id in unique:
+                cached = self.seen.lookup(item_id)
+                if cached is None:
+                    unknown.append(item_id)
+                elif cached:
+                    existing.add(item_id)
+            for start in range(0, len(unknown), self.IN_CHUNK):
+                existing |= self._select_existing(unknown[start:start + self.IN_CHUNK])
+        return [item_id for item_id in unique if item_id not in existing]
+
+    def save_items_batch(self, rows: List[ItemRow]):
+        """Insert a whole cycle of rows in one transaction"""
+        if not rows:
+            return
+        rows = [self._encode(row) for row in rows]
+        with self.lock:
+            with self.conn:
+                # Only rows actually inserted count towards the market prices, never one already stored
+                priced = []
+                for row in rows:
+                    inserted = self.conn.execute(self.INSERT_SQL, row).rowcount == 1
+                    if inserted and row[5] == "approved" and row[12] is None:
+                        priced.append((row[8], row[9], row[3], row[4], row[10]))
+                staged = self.prices.stage(priced)
+                if staged:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO price_stats (key, state, updated) VALUES (?, ?, ?)", self.prices.rows(staged)
+                    )
+            self.prices.commit(staged)  # in memory only once the rows are committed
+            for row in rows:
+                self.seen.add(row[0])
+
+    @classmethod
+    def _encode(cls, row: ItemRow) -> tuple:
+        """Pad rows in the old 8-field layout and swap the reason text for its code"""
+        row = tuple(row) + (None,) * (cls.ROW_FIELDS - len(row))
+        code, text = encode_reason(row[7])
+        return row[:7] + (text,) + row[8:] + (code,)
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def load_high_water(self) -> Dict[str, int]:
+        """Return the newest item id reached by each search"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT search_key, high_water FROM crawl_state"))
+
+    def set_high_water(self, search_key: str, high_water: int):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO crawl_state (search_key, high_water) VALUES (?, ?) "
+                "ON CONFLICT(search_key) DO UPDATE SET high_water = excluded.high_water, updated_at = CURRENT_TIMESTAMP",
+                (search_key, high_water),
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_STORE: Optional[ItemStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_store() -> ItemStore:
+    """Return the process-wide store for CONFIG["DB_NAME"], opening it on first use"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None or _STORE.path != CONFIG["DB_NAME"]:
+            if _STORE is not None:
+                _STORE.close()
+            _STORE = ItemStore()
+        return _STORE
+
 def item_exists(item_id: str) -> bool:
     """Check if item already recorded"""
     try:
-        conn = sqlite3.connect(CONFIG["DB_NAME"])
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM items WHERE item_id = ?", (item_id,))
-        result = cursor.fetchone() is not None
-        conn.close()
-        return result
-    except:
+        return get_store().exists(item_id)
+    except Exception as e:
+        logger.error(f"DB lookup error: {e}")
         return False
 
-def save_item(item_id: str, title: str, price: str, vinted_url: str, status: str, team: Optional[str] = None, reason: Optional[str] = None):
+def save_item(item_id: str, title: str, price: str, vinted_url: str, status: str, team: Optional[str] = None, reason: Optional[str] = None, brand: Optional[str] = None):
     """Save item to database"""
     try:
-        conn = sqlite3.connect(CONFIG["DB_NAME"])
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR IGNORE INTO items (item_id, title, price, team, brand, status, vinted_url, reason_rejected)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            item_id,
-            title,
-            price,
-            team,
-            check_brand(title),
-            status,
-            vinted_url,
-            reason,
-        ))
-        conn.commit()
-        conn.close()
+        item = Item.parse(item_id, title, price, vinted_url)
+        item.team = team
+        item.brand = brand or check_brand(title)
+        get_store().save_items_batch([item.to_row(status, reason)])
     except Exception as e:
         logger.error(f"DB save error: {e}")
 
@@ -218,37 +1690,367 @@ def save_item(item_id: str, title: str, price: str, vinted_url: str, status: str
 # NOTIFICATIONS
 # ============================================================================
 
-def send_discord(item_id: str, title: str, price: str, team: str):
-    """Send Discord notification"""
-    if not CONFIG["DISCORD_WEBHOOK_URL"]:
-        return
-    try:
-        import requests
-        data = {"embeds": [{"title": title[:256], "description": f"👥 **{team}** | 💰 **{price}**", "color": 65280}]}
-        requests.post(CONFIG["DISCORD_WEBHOOK_URL"], json=data, timeout=5)
-        logger.info("✅ Discord sent")
-    except:
-        pass
+@dataclass
+class Notification:
+    """One approved listing waiting to be announced"""
+    item_id: str
+    title: str
+    price: str
+    team: Optional[str]
+    url: str = ""
+    deal: Optional[float] = None  # fraction below the market median, when known
 
-def send_telegram(item_id: str, title: str, price: str, team: str):
-    """Send Telegram notification"""
+class RateLimited(Exception):
+    """The channel answered 429; retry after ``retry_after`` seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited for {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+class NotificationChannel:
+    """A notification destination with its own pooled HTTP session"""
+
+    name = "base"
+    max_batch = 10
+
+    def __init__(self, session=None):
+        self.session = session or self._create_session()
+
+    @staticmethod
+    def _create_session():
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        return session
+
+    def request_for(self, batch: List[Notification]) -> Tuple[str, Dict]:
+        raise NotImplementedError
+
+    def send(self, batch: List[Notification]):
+        """Post one batch, raising RateLimited on 429 and on other failures"""
+        url, payload = self.request_for(batch)
+        response = self.session.post(url, json=payload, timeout=CONFIG["NOTIFY_TIMEOUT"])
+        if response.status_code == 429:
+            raise RateLimited(self._retry_after(response))
+        response.raise_for_status()
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        header = response.headers.get("Retry-After")
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+        retry_after = body.get("retry_after") or (body.get("parameters") or {}).get("retry_after")
+        return float(retry_after or 1.0)
+
+    def close(self):
+        self.session.close()
+
+class DiscordChannel(NotificationChannel):
+    """Discord webhook; a batch becomes one message with up to 10 embeds"""
+
+    name = "discord"
+    max_batch = 10
+
+    def __init__(self, webhook_url: str, session=None):
+        super().__init__(session)
+        self.webhook_url = webhook_url
+
+    def request_for(self, batch: List[Notification]) -> Tuple[str, Dict]:
+        embeds = []
+        for n in batch:
+            description = f"👥 **{n.team}** | 💰 **{n.price}**" + (f" | 📉 **{-n.deal:+.0%}** vs market" if n.deal is not None else "")
+            embed = {"title": n.title[:256], "description": description, "color": 65280}
+            if n.url:
+                embed["url"] = n.url
+            embeds.append(embed)
+        return self.webhook_url, {"embeds": embeds}
+
+class TelegramChannel(NotificationChannel):
+    """Telegram bot; a batch becomes one message"""
+
+    name = "telegram"
+    max_batch = 10
+
+    def __init__(self, token: str, chat_id: str, api_url: Optional[str] = None, session=None):
+        super().__init__(session)
+        self.url = f"{(api_url or CONFIG['TELEGRAM_API_URL']).rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+
+    def request_for(self, batch: List[Notification]) -> Tuple[str, Dict]:
+        text = "\n\n".join(
+            f"🏐 *{n.title}*\n👥 {n.team}\n💰 {n.price}" + (f" ({-n.deal:+.0%} vs market)" if n.deal is not None else "")
+            + (f"\n🔗 {n.url}" if n.url else "")
+            for n in batch
+        )
+        return self.url, {"chat_id": self.chat_id, "text": text[:4096], "parse_mode": "Markdown"}
+
+class NotificationDispatcher:
+    """Deliver notifications from background workers, one per channel.
+
+    ``submit`` never blocks the monitor loop: each channel has a bounded
+    queue and a notification is dropped (and counted) when it is full.
+    Workers batch whatever arrives within ``batch_window`` seconds, and
+    retry network errors and 5xx answers with jittered exponential backoff,
+    waiting exactly ``retry_after`` when the channel answers 429. Other 4xx
+    answers fail the batch at once.
+    """
+
+    def __init__(self, channels: List[NotificationChannel], queue_size: Optional[int] = None,
+                 batch_window: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff: Optional[float] = None, sleep: Callable = time.sleep):
+        self.channels = channels
+        self.batch_window = CONFIG["NOTIFY_BATCH_WINDOW"] if batch_window is None else batch_window
+        self.max_retries = CONFIG["NOTIFY_MAX_RETRIES"] if max_retries is None else max_retries
+        self.backoff = CONFIG["NOTIFY_BACKOFF"] if backoff is None else backoff
+        self.sleep = sleep
+        size = queue_size or CONFIG["NOTIFY_QUEUE_SIZE"]
+        self.queues = {channel.name: queue.Queue(maxsize=size) for channel in channels}
+        self.stats = {
+            channel.name: {"sent": 0, "failed": 0, "dropped": 0, "retries": 0, "batches": 0}
+            for channel in channels
+        }
+        self._stats_lock = threading.Lock()
+        # Queued or in-flight notifications per channel, for the checkpoint
+        self._pending = {channel.name: {} for channel in channels}
+        self._workers = []
+        for channel in channels:
+            worker = threading.Thread(target=self._run, args=(channel,), name=f"notify-{channel.name}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _count(self, channel: str, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[channel][key] += amount
+        NOTIFICATIONS.inc(amount, channel=channel, outcome=key)
+
+    def _put(self, name: str, notification: Notification) -> bool:
+        with self._stats_lock:
+            self._pending[name][notification.item_id] = notification
+        try:
+            self.queues[name].put_nowait(notification)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._pending[name].pop(notification.item_id, None)
+            self._count(name, "dropped")
+            logger.warning(f"⚠️ {name} queue full, dropped {notification.item_id}")
+            return False
+
+    def submit(self, notification: Notification) -> bool:
+        """Queue a notification on every channel; False if any queue was full"""
+        accepted = True
+        for name in self.queues:
+            accepted = self._put(name, notification) and accepted
+        return accepted
+
+    def pending(self) -> Dict[str, List[Notification]]:
+        """Notifications not yet sent or given up on, per channel, oldest first"""
+        with self._stats_lock:
+            return {name: list(notifications.values()) for name, notifications in self._pending.items()}
+
+    def requeue(self, pending: Dict[str, List[Notification]]) -> int:
+        """Queue saved notifications again on the channels they were pending on; return how many"""
+        count = 0
+        for name, notifications in pending.items():
+            if name not in self.queues:
+                logger.warning(f"⚠️ {len(notifications)} pending notification(s) for unconfigured channel {name}")
+                continue
+            count += sum(self._put(name, notification) for notification in notifications)
+        return count
+
+    def _next_batch(self, channel: NotificationChannel) -> Tuple[List[Notification], bool]:
+        """Wait for one notification, then gather more for ``batch_window`` seconds"""
+        q = self.queues[channel.name]
+        batch = []
+        item = q.get()
+        deadline = time.monotonic() + self.batch_window
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= channel.max_batch:
+                return batch, False
+            remaining = deadline - time.monotonic()
+            try:
+                item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+            except queue.Empty:
+                return batch, False
+        q.task_done()  # the stop marker
+        return batch, True
+
+    def _deliver(self, channel: NotificationChannel, batch: List[Notification]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with METRICS.span("notify_send"):
+                    channel.send(batch)
+                self._count(channel.name, "sent", len(batch))
+                self._count(channel.name, "batches")
+                logger.info(f"✅ {channel.name.capitalize()} sent ({len(batch)} items)")
+                return
+            except RateLimited as e:
+                delay = e.retry_after
+            except Exception as e:
+                if not self._is_transient(e):
+                    self._count(channel.name, "failed", len(batch))
+                    logger.error(f"❌ {channel.name} rejected {len(batch)} notifications, not retrying: {e}")
+                    return
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"⚠️ {channel.name} send failed: {e}")
+            if attempt < self.max_retries:
+                self._count(channel.name, "retries")
+                self.sleep(delay)
+        self._count(channel.name, "failed", len(batch))
+        logger.error(f"❌ {channel.name} gave up on {len(batch)} notifications")
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Network errors and 5xx answers are worth retrying; other 4xx ones never succeed"""
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is not None:
+            return status >= 500
+        return isinstance(error, OSError)  # requests' connection errors and timeouts included
+
+    def _run(self, channel: NotificationChannel):
+        q = self.queues[channel.name]
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch(channel)
+            if not batch:
+                continue
+            try:
+                self._deliver(channel, batch)
+            finally:
+                with self._stats_lock:
+                    for notification in batch:
+                        self._pending[channel.name].pop(notification.item_id, None)
+                for _ in batch:
+                    q.task_done()
+
+    def flush(self):
+        """Block until every queued notification was sent or given up on"""
+        for q in self.queues.values():
+            q.join()
+
+    def close(self, timeout: float = 10.0):
+        """Finish queued notifications and stop the workers"""
+        for q in self.queues.values():
+            q.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        for channel in self.channels:
+            channel.close()
+
+def create_channels() -> List[NotificationChannel]:
+    """Build the channels configured in CONFIG"""
+    channels = []
+    if CONFIG["DISCORD_WEBHOOK_URL"]:
+        channels.append(DiscordChannel(CONFIG["DISCORD_WEBHOOK_URL"]))
+    if CONFIG["TELEGRAM_BOT_TOKEN"] and CONFIG["TELEGRAM_CHAT_ID"]:
+        channels.append(TelegramChannel(CONFIG["TELEGRAM_BOT_TOKEN"], CONFIG["TELEGRAM_CHAT_ID"]))
+    return channels
+
+_DISPATCHER: Optional[NotificationDispatcher] = None
+
+def get_dispatcher() -> NotificationDispatcher:
+    """Return the process-wide dispatcher, starting its workers on first use"""
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        _DISPATCHER = NotificationDispatcher(create_channels())
+    return _DISPATCHER
+
+def send_discord(item_id: str, title: str, price: str, team: str):
+    """Send Discord notification"""
+    if not CONFIG["DISCORD_WEBHOOK_URL"]:
+        return
+    channel = DiscordChannel(CONFIG["DISCORD_WEBHOOK_URL"])
+    try:
+        channel.send([Notification(item_id, title, price, team)])
+        logger.info("✅ Discord sent")
+    except Exception as e:
+        logger.error(f"❌ Discord error: {e}")
+    finally:
+        channel.close()
+
+def send_telegram(item_id: str, title: str, price: str, team: str):
+    """Send Telegram notification"""
     if not CONFIG["TELEGRAM_BOT_TOKEN"] or not CONFIG["TELEGRAM_CHAT_ID"]:
         return
+    channel = TelegramChannel(CONFIG["TELEGRAM_BOT_TOKEN"], CONFIG["TELEGRAM_CHAT_ID"])
     try:
-        import requests
-        text = f"🏐 *{title}*\n👥 {team}\n💰 {price}"
-        url = f"https://api.telegram.org/bot{CONFIG['TELEGRAM_BOT_TOKEN']}/sendMessage"
-        requests.post(url, json={"chat_id": CONFIG["TELEGRAM_CHAT_ID"], "text": text, "parse_mode": "Markdown"}, timeout=5)
+        channel.send([Notification(item_id, title, price, team)])
         logger.info("✅ Telegram sent")
-    except:
-        pass
+    except Exception as e:
+        logger.error(f"❌ Telegram error: {e}")
+    finally:
+        channel.close()
 
 # ============================================================================
 # SELENIUM BROWSER
 # ============================================================================
 
-def create_browser():
-    """Create Selenium Chrome browser with anti-detection settings"""
+_DRIVER_PATH: Optional[str] = None
+
+def resolve_driver_path() -> str:
+    """Resolve the ChromeDriver binary once and reuse it for the whole process"""
+    global _DRIVER_PATH
+    if _DRIVER_PATH is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        
+        logger.info("🔧 Resolving ChromeDriver...")
+        _DRIVER_PATH = ChromeDriverManager().install()
+    return _DRIVER_PATH
+
+# URL patterns blocked over CDP in lean mode: media, fonts and trackers the
+# listing grid does not need.
+LEAN_BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*",
+    "*criteo.com*", "*adnxs.com*", "*taboola.com*", "*tiktok.com*", "*snapchat.com*",
+    "*onetrust.com*", "*cookielaw.org*", "*datadoghq*", "*sentry.io*",
+]
+
+_PROFILE_LOCK = threading.Lock()
+_PROFILE_DIRS_IN_USE = set()
+
+def _free_profile_dir(base: str) -> str:
+    """Reserve the first profile directory no browser of ours or running Chrome holds.
+
+    Chrome refuses to share a user-data dir, so each pooled browser gets
+    ``<base>-<n>``; a recycled browser reuses a released one and keeps its
+    cookies and cache warm. The pick is made under a lock because browsers
+    start concurrently, before Chrome has written its SingletonLock.
+    """
+    with _PROFILE_LOCK:
+        index = 0
+        while True:
+            path = os.path.abspath(f"{base}-{index}")
+            if path not in _PROFILE_DIRS_IN_USE and not os.path.lexists(os.path.join(path, "SingletonLock")):
+                _PROFILE_DIRS_IN_USE.add(path)
+                return path
+            index += 1
+
+def release_profile_dir(path: Optional[str]):
+    """Give a profile directory back once its browser has quit"""
+    with _PROFILE_LOCK:
+        _PROFILE_DIRS_IN_USE.discard(path)
+
+def build_chrome_options(mode: Optional[str] = None, profile_dir: Optional[str] = None):
+    """Chrome options for the "default" or the resource-blocking "lean" mode"""
+    mode = mode or CONFIG["BROWSER_MODE"]
+    from selenium.webdriver.chrome.options import Options
+    
     chrome_options = Options()
     
     if CONFIG["HEADLESS"]:
@@ -261,173 +2063,1772 @@ def create_browser():
     chrome_options.add_experimental_option('useAutomationExtension', False)
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
     
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_options
-    )
-    return driver
+    if mode == "lean":
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-remote-fonts")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_argument(f"--user-data-dir={profile_dir or _free_profile_dir(CONFIG['BROWSER_PROFILE_DIR'])}")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+        })
+    elif mode != "default":
+        raise ValueError(f"Unknown browser mode: {mode}")
+    return chrome_options
 
-def fetch_vinted_items() -> List[Dict]:
-    """Fetch items from Vinted using Selenium with robust selectors"""
-    driver = None
-    items = []
+def create_browser(mode: Optional[str] = None):
+    """Create Selenium Chrome browser with anti-detection settings"""
+    mode = mode or CONFIG["BROWSER_MODE"]
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
     
+    profile_dir = _free_profile_dir(CONFIG["BROWSER_PROFILE_DIR"]) if mode == "lean" else None
     try:
-        logger.info("🌐 Starting browser...")
-        driver = create_browser()
-        driver.set_page_load_timeout(20)
-        
-        search_url = "https://www.vinted.it/items?search_text=tuta%20calcio&order=newest_first"
-        logger.info(f"📄 Loading {search_url}...")
-        driver.get(search_url)
-        
-        logger.info("⏳ Waiting for page to load...")
-        time.sleep(5)
+        driver = webdriver.Chrome(
+            service=Service(resolve_driver_path()),
+            options=build_chrome_options(mode, profile_dir)
+        )
+    except Exception:
+        release_profile_dir(profile_dir)
+        raise
+    driver.profile_dir = profile_dir  # released by the pool when the driver quits
+    if mode == "lean":
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        except Exception as e:
+            logger.warning(f"⚠️ CDP URL blocking unavailable: {e}")
+    return driver
+
+class BrowserPool:
+    """Pool of warm browser drivers reused across monitoring cycles.
+
+    Drivers are created lazily up to ``size``, health-checked on checkout and
+    recycled after ``max_pages`` page loads or when a session raises.
+    """
+
+    def __init__(self, factory: Callable = create_browser, size: Optional[int] = None, max_pages: Optional[int] = None):
+        self.factory = factory
+        self.size = size or CONFIG["BROWSER_POOL_SIZE"]
+        self.max_pages = max_pages or CONFIG["BROWSER_MAX_PAGES"]
+        self._idle = []
+        self._pages = {}
+        self._live = 0
+        self._cond = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    @contextmanager
+    def session(self):
+        """Check out a driver for one page load, returning it to the pool afterwards"""
+        driver = self._checkout()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self._checkin(driver, broken)
+
+    def _checkout(self):
+        with self._cond:
+            while True:
+                while self._idle:
+                    driver = self._idle.pop()
+                    if self._is_alive(driver):
+                        return driver
+                    logger.warning("♻️ Dropping unresponsive browser")
+                    self._discard(driver)
+                if self._live < self.size:
+                    self._live += 1
+                    break
+                self._cond.wait()
         
-        # Try multiple selector strategies
-        item_elements = []
-        selectors_to_try = [
-            (By.CSS_SELECTOR, "a[href*='/items/']"),
-            (By.CSS_SELECTOR, "article"),
-            (By.CSS_SELECTOR, "[class*='item']"),
-            (By.XPATH, "//a[@href and contains(@href, '/items/')]"),
-        ]
+        try:
+            logger.info("🌐 Starting browser...")
+            with METRICS.span("browser_start"):
+                driver = self.factory()
+                driver.set_page_load_timeout(CONFIG["PAGE_LOAD_TIMEOUT"])
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
         
-        for selector_type, selector in selectors_to_try:
-            try:
-                logger.info(f"🔍 Trying selector: {selector}")
-                elements = driver.find_elements(selector_type, selector)
-                if elements and len(elements) > 5:
-                    logger.info(f"✅ Found {len(elements)} elements with selector: {selector}")
-                    item_elements = elements
-                    break
-            except Exception as e:
-                logger.debug(f"Selector {selector} failed: {e}")
+        with self._cond:
+            self.created += 1
+            self._pages[id(driver)] = 0
+        BROWSER_STARTS.inc()
+        return driver
+
+    def _checkin(self, driver, broken: bool):
+        with self._cond:
+            pages = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = pages
+            if broken or pages >= self.max_pages:
+                logger.info(f"♻️ Recycling browser after {pages} pages{' (crashed)' if broken else ''}")
+                self._discard(driver)
+            else:
+                self._idle.append(driver)
+            self._cond.notify()
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot (caller holds the lock)"""
+        self._pages.pop(id(driver), None)
+        self._live -= 1
+        self.recycled += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        release_profile_dir(getattr(driver, "profile_dir", None))
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Quit every idle driver"""
+        with self._cond:
+            if self._idle:
+                logger.info("🔒 Closing browser...")
+            while self._idle:
+                driver = self._idle.pop()
+                self._pages.pop(id(driver), None)
+                self._live -= 1
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                release_profile_dir(getattr(driver, "profile_dir", None))
+            self._cond.notify_all()
+
+_BROWSER_POOL: Optional[BrowserPool] = None
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it on first use"""
+    global _BROWSER_POOL
+    if _BROWSER_POOL is None:
+        _BROWSER_POOL = BrowserPool()
+    return _BROWSER_POOL
+
+def build_search_url(search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> str:
+    """Build the newest-first catalog page URL for a search"""
+    search_text = search_text or CONFIG["SEARCH_TEXT"]
+    domain = domain or CONFIG["VINTED_DOMAIN"]
+    url = f"https://{domain}/items?search_text={quote(search_text)}&order=newest_first"
+    return f"{url}&page={page}" if page > 1 else url
+
+class FetchError(Exception):
+    """A catalog page could not be fetched; ``blocked`` when Vinted refused us"""
+
+    def __init__(self, message: str, blocked: bool = False):
+        super().__init__(message)
+        self.blocked = blocked
+
+ITEM_LINK_SELECTOR = "a[href*='/items/']"
+
+COUNT_ITEMS_JS = f"return document.querySelectorAll(\"{ITEM_LINK_SELECTOR}\").length;"
+
+# Collects every listing card in one WebDriver round-trip instead of two
+# per element (href + text). Card fields Vinted marks with data-testid are
+# read when present; the link text (or its title attribute for image-only
+# links) is returned so Python parses it the same way as the element path.
+EXTRACT_CARDS_JS = f"""
+const cards = [];
+const seen = new Set();
+const pick = (root, suffix) => {{
+    const el = root.querySelector(`[data-testid$="${{suffix}}"]`);
+    return el ? el.textContent.trim() : null;
+}};
+for (const link of document.querySelectorAll("{ITEM_LINK_SELECTOR}")) {{
+    const match = link.href.match(/\\/items\\/(\\d+)/);
+    if (!match || seen.has(match[1])) continue;
+    seen.add(match[1]);
+    const card = link.closest("[data-testid*='grid-item'], article") || link.parentElement || link;
+    const img = card.querySelector("img");
+    cards.push({{
+        id: match[1],
+        url: link.href,
+        lines: (link.innerText || "").split("\\n").map(l => l.trim()).filter(Boolean),
+        title: link.getAttribute("title"),
+        price: pick(card, "--price-text"),
+        brand: pick(card, "--description-title"),
+        size: pick(card, "--description-subtitle"),
+        image: img ? (img.currentSrc || img.src) : null,
+    }});
+}}
+return cards;
+"""
+
+# Bytes transferred according to the Resource Timing API. Cross-origin
+# responses without Timing-Allow-Origin report 0, so this undercounts
+# third-party traffic, which is what lean mode blocks anyway.
+PAGE_STATS_JS = """
+const nav = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+let bytes = nav ? (nav.transferSize || 0) : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+return {bytes: bytes, resources: resources.length};
+"""
+
+@dataclass
+class PageStats:
+    """Cost of loading one catalog page"""
+    url: str
+    mode: str
+    ready_seconds: float
+    bytes: int = 0
+    resources: int = 0
+
+PAGE_STATS = deque(maxlen=1000)
+
+def record_page_stats(driver, url: str, ready_seconds: float) -> PageStats:
+    """Read transfer sizes from the page and keep them for later comparison"""
+    stats = PageStats(url, CONFIG["BROWSER_MODE"], ready_seconds)
+    try:
+        raw = driver.execute_script(PAGE_STATS_JS)
+        if isinstance(raw, dict):
+            stats.bytes = int(raw.get("bytes") or 0)
+            stats.resources = int(raw.get("resources") or 0)
+    except Exception as e:
+        logger.debug(f"Page stats unavailable: {e}")
+    PAGE_STATS.append(stats)
+    logger.info(f"📦 {stats.bytes / 1024:.0f} KiB, {stats.resources} resources, ready in {ready_seconds:.2f}s ({stats.mode})")
+    return stats
+
+def page_stats_summary() -> Dict[str, Dict[str, float]]:
+    """Average page cost per browser mode over the recorded pages"""
+    summary = {}
+    for stats in PAGE_STATS:
+        entry = summary.setdefault(stats.mode, {"pages": 0, "avg_bytes": 0.0, "avg_ready_seconds": 0.0})
+        entry["pages"] += 1
+        entry["avg_bytes"] += (stats.bytes - entry["avg_bytes"]) / entry["pages"]
+        entry["avg_ready_seconds"] += (stats.ready_seconds - entry["avg_ready_seconds"]) / entry["pages"]
+    return summary
+
+def _item_id_from_url(url: str) -> Optional[str]:
+    match = re.search(r"/items/(\d+)", url or "")
+    return match.group(1) if match else None
+
+def _item_from_lines(item_id: str, url: str, lines: List[str], price: Optional[str] = None, **extra) -> Optional[Item]:
+    """Build an item from a listing link's text lines"""
+    if not lines:
+        return None
+    title = lines[0]
+    
+    if not price:
+        for line in lines:
+            if "€" in line or any(c.isdigit() for c in line):
+                price = line
+                break
+    
+    if not title or len(title) <= 5:
+        return None
+    return Item.parse(item_id, title, price, url, **extra)
+
+def _extract_with_script(driver) -> Iterator[Item]:
+    """Read every card with a single execute_script call and yield them as they are parsed"""
+    for card in driver.execute_script(EXTRACT_CARDS_JS) or []:
+        lines = card.get("lines") or [part.strip() for part in (card.get("title") or "").split(",") if part.strip()]
+        item = _item_from_lines(
+            str(card.get("id") or ""), card.get("url") or "", lines, price=card.get("price"),
+            brand=card.get("brand"), size=card.get("size"), image=card.get("image"),
+        )
+        if item:
+            yield item
+
+def _extract_with_selectors(driver) -> Iterator[Item]:
+    """Element-by-element extraction, kept as a fallback for unexpected markup"""
+    from selenium.webdriver.common.by import By
+    
+    item_elements = []
+    selectors_to_try = [
+        (By.CSS_SELECTOR, ITEM_LINK_SELECTOR),
+        (By.CSS_SELECTOR, "article"),
+        (By.CSS_SELECTOR, "[class*='item']"),
+        (By.XPATH, "//a[@href and contains(@href, '/items/')]"),
+    ]
+    
+    for selector_type, selector in selectors_to_try:
+        try:
+            logger.info(f"🔍 Trying selector: {selector}")
+            elements = driver.find_elements(selector_type, selector)
+            if elements and len(elements) > 5:
+                logger.info(f"✅ Found {len(elements)} elements with selector: {selector}")
+                item_elements = elements
+                break
+        except Exception as e:
+            logger.debug(f"Selector {selector} failed: {e}")
+            continue
+    
+    if not item_elements:
+        logger.warning("⚠️ No items found with any selector")
+        logger.info("📸 Page source preview (first 2000 chars):")
+        logger.info(driver.page_source[:2000])
+        return
+    
+    logger.info(f"🎯 Processing {len(item_elements)} items...")
+    for element in item_elements:
+        try:
+            href = element.get_attribute("href") or ""
+            item_id = _item_id_from_url(href)
+            if not item_id:
                 continue
+            
+            text_content = element.text or ""
+            lines = [line.strip() for line in text_content.split("\n") if line.strip()]
+            item = _item_from_lines(item_id, href, lines)
+        except Exception as e:
+            logger.debug(f"Error extracting item: {e}")
+            continue
+        if item:
+            logger.debug(f"✓ Extracted: {item_id} - {item['title'][:40]}")
+            yield item
+
+def wait_for_grid(driver, timeout: Optional[float] = None) -> bool:
+    """Return as soon as listing links are on the page, or False after ``timeout``"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    timeout = CONFIG["PAGE_LOAD_WAIT"] if timeout is None else timeout
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: (d.execute_script(COUNT_ITEMS_JS) or 0) > 0
+        )
+        return True
+    except TimeoutException:
+        return False
+
+def iter_vinted_items(pool: Optional[BrowserPool] = None, search_url: Optional[str] = None,
+                      raise_errors: bool = False) -> Iterator[Item]:
+    """Yield items from a pooled Selenium browser as each card is extracted"""
+    pool = pool or get_browser_pool()
+    search_url = search_url or build_search_url()
+    count = 0
+    
+    try:
+        with pool.session() as driver:
+            logger.info(f"📄 Loading {search_url}...")
+            started = time.perf_counter()
+            with METRICS.span("page_load"):
+                driver.get(search_url)
+            
+            logger.info("⏳ Waiting for item grid...")
+            with METRICS.span("grid_wait"):
+                ready = wait_for_grid(driver)
+            if not ready:
+                logger.warning(f"⚠️ Item grid not ready after {CONFIG['PAGE_LOAD_WAIT']}s")
+            record_page_stats(driver, search_url, time.perf_counter() - started)
+            
+            with METRICS.span("extract"):
+                for item in _extract_with_script(driver):
+                    count += 1
+                    yield item
+                if not count:
+                    logger.info("↪️ Script extraction found nothing, falling back to selectors")
+                    SELECTOR_FALLBACKS.inc()
+                    for item in _extract_with_selectors(driver):
+                        count += 1
+                        yield item
+            
+            logger.info(f"🎉 Successfully scraped {count} valid items")
+    
+    except Exception as e:
+        logger.error(f"❌ Selenium error: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        if raise_errors:
+            raise FetchError(str(e)) from e
+
+def fetch_vinted_items(pool: Optional[BrowserPool] = None, search_url: Optional[str] = None, raise_errors: bool = False) -> List[Item]:
+    """Fetch items from Vinted using a pooled Selenium browser with robust selectors"""
+    return list(iter_vinted_items(pool, search_url, raise_errors))
+
+# ============================================================================
+# FETCH BACKENDS
+# ============================================================================
+
+class Fetcher:
+    """Source of catalog listings for one search.
+
+    Backends return Item objects with ``id``, ``title``, ``price`` and
+    ``url`` set, and price, size, brand and seller parsed where the page has
+    them, so the monitor loop does not care how they were obtained. They
+    raise FetchError when a page cannot be read.
+    """
+
+    name = "base"
+
+    def fetch(self, search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> List[Item]:
+        raise NotImplementedError
+
+    def iter_fetch(self, search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> Iterator[Item]:
+        """Yield a page's listings as they are read; backends that can stream override this"""
+        yield from self.fetch(search_text, domain, page)
+
+    def close(self):
+        """Release any browser or connection held by the backend"""
+
+class SeleniumFetcher(Fetcher):
+    """Render the catalog page in a pooled headless Chrome"""
+
+    name = "selenium"
+
+    def __init__(self, pool: Optional[BrowserPool] = None):
+        self.pool = pool or get_browser_pool()
+
+    def fetch(self, search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> List[Item]:
+        return fetch_vinted_items(self.pool, build_search_url(search_text, domain, page), raise_errors=True)
+
+    def iter_fetch(self, search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> Iterator[Item]:
+        return iter_vinted_items(self.pool, build_search_url(search_text, domain, page), raise_errors=True)
+
+    def close(self):
+        self.pool.close()
+
+class HttpFetcher(Fetcher):
+    """Read the catalog JSON API over a pooled ``requests.Session``.
+
+    The API only answers once the session holds the anonymous cookies Vinted
+    hands out on the home page, so each domain is bootstrapped on first use
+    and again whenever the API answers 401.
+    """
+
+    name = "http"
+    CATALOG_PATH = "/api/v2/catalog/items"
+
+    def __init__(self, base_url: Optional[str] = None, session=None):
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.session = session or self._create_session()
+        self._bootstrapped = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_session():
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "it-IT,it;q=0.9,en;q=0.8",
+        })
+        return session
+
+    def _origin(self, domain: str) -> str:
+        return self.base_url or f"https://{domain}"
+
+    def _bootstrap(self, domain: str, force: bool = False):
+        with self._lock:
+            if domain in self._bootstrapped and not force:
+                return
+            logger.info(f"🍪 Bootstrapping cookies for {domain}...")
+            response = self.session.get(self._origin(domain) + "/", timeout=CONFIG["HTTP_TIMEOUT"])
+            response.raise_for_status()
+            self._bootstrapped.add(domain)
+
+    def _get_catalog(self, search_text: str, domain: str, page: int = 1):
+        params = {
+            "search_text": search_text,
+            "order": "newest_first",
+            "per_page": CONFIG["HTTP_PER_PAGE"],
+            "page": page,
+        }
+        url = f"{self._origin(domain)}{self.CATALOG_PATH}?{urlencode(params)}"
+        return self.session.get(url, timeout=CONFIG["HTTP_TIMEOUT"])
+
+    def fetch(self, search_text: Optional[str] = None, domain: Optional[str] = None, page: int = 1) -> List[Item]:
+        search_text = search_text or CONFIG["SEARCH_TEXT"]
+        domain = domain or CONFIG["VINTED_DOMAIN"]
         
-        if not item_elements:
-            logger.warning("⚠️ No items found with any selector")
-            logger.info("📸 Page source preview (first 2000 chars):")
-            logger.info(driver.page_source[:2000])
+        try:
+            with METRICS.span("http_fetch"):
+                self._bootstrap(domain)
+                response = self._get_catalog(search_text, domain, page)
+                if response.status_code == 401:
+                    self._bootstrap(domain, force=True)
+                    response = self._get_catalog(search_text, domain, page)
+            if response.status_code in (403, 429):
+                raise FetchError(f"{domain} answered {response.status_code}", blocked=True)
+            response.raise_for_status()
+            items = parse_catalog_payload(response.json(), self._origin(domain))
+            logger.info(f"🎉 Successfully fetched {len(items)} valid items")
             return items
+        except FetchError:
+            raise
+        except Exception as e:
+            raise FetchError(f"HTTP fetch error: {e}") from e
+
+    def close(self):
+        self.session.close()
+
+def _format_price(price, currency: Optional[str] = None) -> str:
+    """Render a catalog API price (plain value or amount/currency dict)"""
+    if isinstance(price, dict):
+        currency = price.get("currency_code") or currency
+        price = price.get("amount")
+    if price in (None, ""):
+        return "N/A"
+    return f"{price} €" if currency in (None, "EUR") else f"{price} {currency}"
+
+def parse_catalog_payload(payload: Dict, origin: str = "https://www.vinted.it") -> List[Item]:
+    """Convert a catalog API response into Items, price, size, brand, seller and photo parsed"""
+    items = []
+    for raw in payload.get("items") or []:
+        item_id = str(raw.get("id") or "")
+        title = (raw.get("title") or "").strip()
+        if not item_id.isdigit() or len(title) <= 5:
+            continue
         
-        logger.info(f"🎯 Processing {len(item_elements)} items...")
+        photo = raw.get("photo") or {}
+        items.append(Item.parse(
+            item_id, title, _format_price(raw.get("price"), raw.get("currency")),
+            raw.get("url") or f"{origin}/items/{item_id}",
+            size=raw.get("size_title"), brand=raw.get("brand_title"),
+            seller=(raw.get("user") or {}).get("login"), image=photo.get("url"),
+        ))
+    return items
+
+FETCH_BACKENDS = {
+    SeleniumFetcher.name: SeleniumFetcher,
+    HttpFetcher.name: HttpFetcher,
+}
+
+def create_fetcher(backend: Optional[str] = None) -> Fetcher:
+    """Instantiate the fetch backend named in CONFIG["FETCH_BACKEND"]"""
+    backend = backend or CONFIG["FETCH_BACKEND"]
+    if backend not in FETCH_BACKENDS:
+        raise ValueError(f"Unknown fetch backend: {backend} (choose from {', '.join(FETCH_BACKENDS)})")
+    return FETCH_BACKENDS[backend]()
+
+# ============================================================================
+# SEARCH SCHEDULER
+# ============================================================================
+
+@dataclass(frozen=True)
+class SearchQuery:
+    """One catalog search on one Vinted domain"""
+    search_text: str
+    domain: str = "www.vinted.it"
+
+    @property
+    def key(self) -> str:
+        return f"{self.domain}:{self.search_text}"
+
+@dataclass
+class SearchResult:
+    """Outcome of running one search during a cycle"""
+    query: SearchQuery
+    items: List[Item] = field(default_factory=list)
+    latency: float = 0.0
+    error: Optional[str] = None
+    pages: int = 0
+    high_water: Optional[int] = None
+    unique: int = 0
+    new: int = 0
+    approved: int = 0
+
+def load_searches(definitions: Optional[List[Dict]] = None) -> List[SearchQuery]:
+    """Build SearchQuery objects from CONFIG["SEARCHES"]-style dicts"""
+    definitions = definitions if definitions is not None else CONFIG["SEARCHES"]
+    return [
+        SearchQuery(d["search_text"], d.get("domain") or CONFIG["VINTED_DOMAIN"])
+        for d in definitions
+    ]
+
+class DomainRateLimiter:
+    """Space out requests to the same domain by at least ``min_interval`` seconds.
+
+    Slots are reserved under the lock and slept on outside it, so workers
+    hitting different domains never wait on each other.
+    """
+
+    def __init__(self, min_interval: Optional[float] = None, clock: Callable = time.monotonic, sleep: Callable = time.sleep):
+        self.min_interval = CONFIG["DOMAIN_MIN_INTERVAL"] if min_interval is None else min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, domain: str):
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.min_interval
+        if slot > now:
+            self.sleep(slot - now)
+
+def _numeric_id(item: Dict) -> int:
+    item_id = str(item.get("id", ""))
+    return int(item_id) if item_id.isdigit() else -1
+
+class SearchScheduler:
+    """Run every search of a cycle concurrently over a bounded worker pool.
+
+    Each search is crawled incrementally: results are newest first, so pages
+    are fetched only until the oldest listing on a page is at or below the
+    high-water mark (the newest id seen by the previous cycle), up to
+    ``max_pages``. The first crawl of a search only reads page one.
+    """
+
+    def __init__(self, fetcher: Fetcher, searches: List[SearchQuery], max_workers: Optional[int] = None,
+                 rate_limiter: Optional[DomainRateLimiter] = None, max_pages: Optional[int] = None,
+                 store: Optional[ItemStore] = None):
+        self.fetcher = fetcher
+        self.searches = searches
+        self.max_workers = max_workers or CONFIG["SEARCH_WORKERS"]
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        self.max_pages = max_pages or CONFIG["MAX_PAGES"]
+        self.store = store
+        self.high_water = store.load_high_water() if store else {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="search")
+
+    def _crawl(self, query: SearchQuery, result: SearchResult, emit: Optional[Callable] = None):
+        mark = self.high_water.get(query.key)
+        newest = mark
+        for page in range(1, self.max_pages + 1):
+            if page > 1:
+                self.rate_limiter.acquire(query.domain)
+            ids = []
+            for item in self.fetcher.iter_fetch(query.search_text, query.domain, page):
+                item_id = _numeric_id(item)
+                ids.append(item_id)
+                if mark is None or item_id > mark:
+                    if emit:
+                        emit(result, item)
+                    else:
+                        result.items.append(item)
+            result.pages = page
+            if not ids:
+                break
+            newest = max([newest or -1] + ids)
+            if mark is None or min(ids) <= mark:
+                break
+        else:
+            logger.warning(f"⚠️ {query.key}: page cap ({self.max_pages}) reached before the last seen item")
+        result.high_water = newest
+
+    def _run(self, query: SearchQuery, emit: Optional[Callable] = None) -> SearchResult:
+        self.rate_limiter.acquire(query.domain)
+        started = time.perf_counter()
+        result = SearchResult(query)
+        try:
+            with METRICS.span("search"):
+                self._crawl(query, result, emit)
+        except Exception as e:
+            result.error = str(e)
+            SEARCH_ERRORS.inc(blocked="true" if getattr(e, "blocked", False) else "false")
+            logger.error(f"❌ Search {query.key} failed: {e}")
+        result.latency = time.perf_counter() - started
+        return result
+
+    def commit(self, result: SearchResult):
+        """Advance the high-water mark once the search's items are stored"""
+        if result.error or result.high_water is None or result.high_water < 0:
+            return
+        if result.high_water == self.high_water.get(result.query.key):
+            return
+        self.high_water[result.query.key] = result.high_water
+        if self.store:
+            self.store.set_high_water(result.query.key, result.high_water)
+
+    def run_cycle(self, searches: Optional[List[SearchQuery]] = None) -> List[SearchResult]:
+        """Fetch every (or the given) search and drop items already returned by an earlier one"""
+        results = list(self._executor.map(self._run, self.searches if searches is None else searches))
+        seen = set()
+        for result in results:
+            unique = []
+            for item in result.items:
+                item_id = str(item.get("id", ""))
+                if item_id and item_id not in seen:
+                    seen.add(item_id)
+                    unique.append(item)
+            result.items = unique
+            result.unique = len(unique)
+        return results
+
+    def stream_cycle(self, searches: Optional[List[SearchQuery]] = None, queue_size: Optional[int] = None,
+                     batch_size: Optional[int] = None) -> Iterator[Tuple[SearchResult, Optional[List[Item]]]]:
+        """Yield (result, items) micro-batches while the searches are still fetching, then (result, None) per finished search.
+
+        Fetch workers hand listings over through a queue of ``queue_size``
+        and block when it is full, so a slow consumer throttles extraction.
+        Each batch holds whatever was waiting, up to ``batch_size`` listings,
+        with duplicates of listings already yielded this cycle removed.
+        """
+        searches = self.searches if searches is None else searches
+        batch_size = batch_size or CONFIG["STREAM_BATCH_SIZE"]
+        events = queue.Queue(maxsize=queue_size or CONFIG["STREAM_QUEUE_SIZE"])
         
-        for element in item_elements[:30]:
+        def run(query: SearchQuery):
+            result = None
             try:
-                href = element.get_attribute("href") or ""
-                if "/items/" not in href:
-                    continue
-                
-                item_id = href.split("/items/")[-1].split("?")[0]
-                if not item_id or not item_id.isdigit():
-                    continue
-                
-                text_content = element.text or ""
-                lines = [line.strip() for line in text_content.split("\n") if line.strip()]
-                
-                if not lines:
-                    continue
-                
-                title = lines[0]
-                
-                price = "N/A"
-                for line in lines:
-                    if "€" in line or any(c.isdigit() for c in line):
-                        price = line
+                result = self._run(query, emit=lambda result, item: events.put((result, item)))
+            finally:
+                events.put((result or SearchResult(query, error="aborted"), None))
+        
+        running = len(searches)
+        for query in searches:
+            self._executor.submit(run, query)
+        seen = set()
+        try:
+            while running:
+                pending = [events.get()]
+                while len(pending) < batch_size:
+                    try:
+                        pending.append(events.get_nowait())
+                    except queue.Empty:
                         break
-                
-                if title and len(title) > 5:
-                    item = {
-                        "id": item_id,
-                        "title": title,
-                        "price": price,
-                        "url": href
-                    }
-                    items.append(item)
-                    logger.debug(f"✓ Extracted: {item_id} - {title[:40]}")
-            
+                current, batch = None, []
+                for result, item in pending:
+                    if batch and result is not current:
+                        yield current, batch
+                        batch = []
+                    current = result
+                    if item is None:
+                        if batch:
+                            yield result, batch
+                            batch = []
+                        running -= 1
+                        yield result, None
+                        continue
+                    item_id = str(item.get("id", ""))
+                    if item_id and item_id not in seen:
+                        seen.add(item_id)
+                        result.unique += 1
+                        batch.append(item)
+                if batch:
+                    yield current, batch
+        finally:
+            # An abandoned cycle still lets every worker finish its page
+            while running:
+                if events.get()[1] is None:
+                    running -= 1
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+# ============================================================================
+# ADAPTIVE POLLING
+# ============================================================================
+
+@dataclass
+class PollState:
+    """Polling schedule and arrival-rate estimate for one search"""
+    interval: float
+    rate: Optional[float] = None
+    last_poll: Optional[float] = None
+    next_due: float = 0.0
+    failures: int = 0
+
+class AdaptivePoller:
+    """Choose each search's next poll from its observed listing arrival rate.
+
+    The rate (new items per second) is an exponentially weighted average
+    over past polls. The next interval aims to find about
+    ``target_new`` new listings, clamped to [min_interval, max_interval], so
+    busy searches are polled often and quiet ones back off. Failed or
+    blocked polls back off exponentially with full jitter instead.
+    """
+
+    def __init__(self, min_interval: Optional[float] = None, max_interval: Optional[float] = None,
+                 target_new: Optional[float] = None, smoothing: Optional[float] = None,
+                 backoff_max: Optional[float] = None, rng: Callable = random.random):
+        self.min_interval = min_interval or CONFIG["MIN_INTERVAL"]
+        self.max_interval = max_interval or CONFIG["MAX_INTERVAL"]
+        self.target_new = target_new or CONFIG["TARGET_NEW_PER_POLL"]
+        self.smoothing = smoothing or CONFIG["RATE_SMOOTHING"]
+        self.backoff_max = backoff_max or CONFIG["ERROR_BACKOFF_MAX"]
+        self.rng = rng
+        self.states: Dict[str, PollState] = {}
+
+    def state(self, key: str) -> PollState:
+        if key not in self.states:
+            initial = min(max(CONFIG["CHECK_INTERVAL"], self.min_interval), self.max_interval)
+            self.states[key] = PollState(interval=initial)
+        return self.states[key]
+
+    def due(self, keys: List[str], now: float) -> List[str]:
+        return [key for key in keys if self.state(key).next_due <= now]
+
+    def seconds_until_due(self, keys: List[str], now: float) -> float:
+        if not keys:
+            return self.max_interval
+        return max(0.0, min(self.state(key).next_due for key in keys) - now)
+
+    def record_success(self, key: str, new_items: int, now: float) -> float:
+        """Update the rate estimate after a successful poll and schedule the next one"""
+        state = self.state(key)
+        if state.last_poll is not None and now > state.last_poll:
+            observed = new_items / (now - state.last_poll)
+            if state.rate is None:
+                state.rate = observed
+            else:
+                state.rate = self.smoothing * observed + (1 - self.smoothing) * state.rate
+            ideal = self.target_new / state.rate if state.rate > 0 else self.max_interval
+            state.interval = min(max(ideal, self.min_interval), self.max_interval)
+        state.last_poll = now
+        state.failures = 0
+        state.next_due = now + state.interval
+        return state.interval
+
+    def record_error(self, key: str, now: float) -> float:
+        """Back off exponentially with full jitter after a failed or blocked poll"""
+        state = self.state(key)
+        state.failures += 1
+        ceiling = min(self.backoff_max, state.interval * (2 ** state.failures))
+        delay = max(self.min_interval, ceiling * self.rng())
+        state.next_due = now + delay
+        return delay
+
+# ============================================================================
+# JOB QUEUE
+# ============================================================================
+
+@dataclass
+class Lease:
+    """A search job checked out by one worker until ``expires``"""
+    query: SearchQuery
+    owner: str
+    token: int
+    expires: float
+    state: Optional[PollState] = None
+    high_water: Optional[int] = None
+
+class JobBroker:
+    """Shared queue of search jobs handed out under time-limited leases.
+
+    Every configured search is one job with its own due time, polling state
+    and high-water mark. A worker leases a due job, renews the lease while
+    it works and completes it with the next due time. A lease that is not
+    renewed expires and the job goes to whichever worker asks next; the
+    token bumped on every lease stops the old holder from completing it.
+    """
+
+    name = "base"
+
+    def publish(self, queries: List[SearchQuery]):
+        """Add new searches as immediately due jobs and drop the ones no longer configured"""
+        raise NotImplementedError
+
+    def lease(self, owner: str, seconds: float, now: float) -> Optional[Lease]:
+        """Check out the most overdue job nobody holds, or None"""
+        raise NotImplementedError
+
+    def renew(self, lease: Lease, seconds: float, now: float) -> bool:
+        """Extend a lease; False once it expired and went to another worker"""
+        raise NotImplementedError
+
+    def complete(self, lease: Lease, state: PollState, high_water: Optional[int]) -> bool:
+        """Release the job with its next due time; False if the lease was lost"""
+        raise NotImplementedError
+
+    def reap(self, now: float) -> List[Tuple[str, str]]:
+        """Free the jobs whose lease expired; return (search key, owner) for each"""
+        raise NotImplementedError
+
+    def status(self, now: float) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self):
+        """Release any connection held by the broker"""
+
+class MemoryJobBroker(JobBroker):
+    """In-process stand-in for a shared broker, for tests and single-host runs"""
+
+    name = "memory"
+
+    def __init__(self, path: Optional[str] = None):
+        self.jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, queries: List[SearchQuery]):
+        with self._lock:
+            wanted = {query.key: query for query in queries}
+            for key in list(self.jobs):
+                if key not in wanted:
+                    del self.jobs[key]
+            for key, query in wanted.items():
+                self.jobs.setdefault(key, {"query": query, "due_at": 0.0, "state": None, "high_water": None,
+                                           "owner": None, "token": 0, "expires": None})
+
+    def lease(self, owner: str, seconds: float, now: float) -> Optional[Lease]:
+        with self._lock:
+            free = [job for job in self.jobs.values()
+                    if job["due_at"] <= now and (job["owner"] is None or job["expires"] < now)]
+            if not free:
+                return None
+            job = min(free, key=lambda job: job["due_at"])
+            job.update(owner=owner, token=job["token"] + 1, expires=now + seconds)
+            state = copy.copy(job["state"]) if job["state"] else None
+            return Lease(job["query"], owner, job["token"], job["expires"], state, job["high_water"])
+
+    def _held(self, lease: Lease) -> Optional[Dict]:
+        job = self.jobs.get(lease.query.key)
+        if job and job["owner"] == lease.owner and job["token"] == lease.token:
+            return job
+        return None
+
+    def renew(self, lease: Lease, seconds: float, now: float) -> bool:
+        with self._lock:
+            job = self._held(lease)
+            if job is None:
+                return False
+            job["expires"] = lease.expires = now + seconds
+            return True
+
+    def complete(self, lease: Lease, state: PollState, high_water: Optional[int]) -> bool:
+        with self._lock:
+            job = self._held(lease)
+            if job is None:
+                return False
+            job.update(owner=None, expires=None, due_at=state.next_due, state=copy.copy(state))
+            if high_water is not None:
+                job["high_water"] = high_water
+            return True
+
+    def reap(self, now: float) -> List[Tuple[str, str]]:
+        with self._lock:
+            expired = [(key, job["owner"]) for key, job in self.jobs.items() if job["owner"] and job["expires"] < now]
+            for key, _ in expired:
+                self.jobs[key].update(owner=None, expires=None)
+            return expired
+
+    def status(self, now: float) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "jobs": len(self.jobs),
+                "leased": sum(1 for job in self.jobs.values() if job["owner"] and job["expires"] >= now),
+                "due": sum(1 for job in self.jobs.values() if job["due_at"] <= now),
+            }
+
+class SqliteJobBroker(JobBroker):
+    """Job queue in a SQLite file shared by every worker on the host (or on a shared volume).
+
+    Leases are taken inside ``BEGIN IMMEDIATE`` transactions, so two
+    processes can never check out the same job.
+    """
+
+    name = "sqlite"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            search_key TEXT PRIMARY KEY,
+            search_text TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            due_at REAL NOT NULL DEFAULT 0,
+            interval REAL,
+            rate REAL,
+            last_poll REAL,
+            failures INTEGER NOT NULL DEFAULT 0,
+            high_water INTEGER,
+            owner TEXT,
+            token INTEGER NOT NULL DEFAULT 0,
+            lease_expires REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (due_at);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG["SHARED_DB"]
+        self.conn = connect_shared(self.path)
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def publish(self, queries: List[SearchQuery]):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (search_key, search_text, domain) VALUES (?, ?, ?)",
+                [(query.key, query.search_text, query.domain) for query in queries],
+            )
+            keys = [query.key for query in queries]
+            conn.execute(f"DELETE FROM jobs WHERE search_key NOT IN ({', '.join('?' * len(keys))})", keys)
+
+    def lease(self, owner: str, seconds: float, now: float) -> Optional[Lease]:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT search_key, search_text, domain, interval, rate, last_poll, failures, due_at, high_water, token "
+                "FROM jobs WHERE due_at <= ? AND (owner IS NULL OR lease_expires < ?) ORDER BY due_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            key, search_text, domain, interval, rate, last_poll, failures, due_at, high_water, token = row
+            conn.execute(
+                "UPDATE jobs SET owner = ?, token = ?, lease_expires = ? WHERE search_key = ?",
+                (owner, token + 1, now + seconds, key),
+            )
+        state = PollState(interval, rate, last_poll, due_at, failures) if interval is not None else None
+        return Lease(SearchQuery(search_text, domain), owner, token + 1, now + seconds, state, high_water)
+
+    def renew(self, lease: Lease, seconds: float, now: float) -> bool:
+        with self._transaction() as conn:
+            renewed = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE search_key = ? AND owner = ? AND token = ?",
+                (now + seconds, lease.query.key, lease.owner, lease.token),
+            ).rowcount == 1
+        if renewed:
+            lease.expires = now + seconds
+        return renewed
+
+    def complete(self, lease: Lease, state: PollState, high_water: Optional[int]) -> bool:
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET owner = NULL, lease_expires = NULL, due_at = ?, interval = ?, rate = ?, last_poll = ?, "
+                "failures = ?, high_water = COALESCE(?, high_water) WHERE search_key = ? AND owner = ? AND token = ?",
+                (state.next_due, state.interval, state.rate, state.last_poll, state.failures, high_water,
+                 lease.query.key, lease.owner, lease.token),
+            ).rowcount == 1
+
+    def reap(self, now: float) -> List[Tuple[str, str]]:
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "SELECT search_key, owner FROM jobs WHERE owner IS NOT NULL AND lease_expires < ?", (now,)
+            ).fetchall()
+            conn.execute("UPDATE jobs SET owner = NULL, lease_expires = NULL WHERE owner IS NOT NULL AND lease_expires < ?", (now,))
+        return expired
+
+    def status(self, now: float) -> Dict[str, int]:
+        with self._lock:
+            jobs, leased, due = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(owner IS NOT NULL AND lease_expires >= ?), 0), COALESCE(SUM(due_at <= ?), 0) FROM jobs",
+                (now, now),
+            ).fetchone()
+        return {"jobs": jobs, "leased": leased, "due": due}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+class SharedSeenStore:
+    """Listing ids claimed by any worker; the first claim wins, so an item is alerted once"""
+
+    name = "base"
+
+    def claim(self, item_ids: List[str], owner: str, now: Optional[float] = None) -> List[str]:
+        """Record the ids and return the ones no worker had claimed before"""
+        raise NotImplementedError
+
+    def prune(self, before: float) -> int:
+        """Forget claims older than ``before``; return how many were dropped"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any connection held by the store"""
+
+class MemorySeenStore(SharedSeenStore):
+    """In-process stand-in for the shared seen-id store"""
+
+    name = "memory"
+
+    def __init__(self, path: Optional[str] = None):
+        self.claims: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, item_ids: List[str], owner: str, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        with self._lock:
+            fresh = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in self.claims]
+            self.claims.update((item_id, now) for item_id in fresh)
+            return fresh
+
+    def prune(self, before: float) -> int:
+        with self._lock:
+            stale = [item_id for item_id, claimed in self.claims.items() if claimed < before]
+            for item_id in stale:
+                del self.claims[item_id]
+            return len(stale)
+
+class SqliteSeenStore(SharedSeenStore):
+    """Claimed ids in the shared SQLite file, next to the job queue"""
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG["SHARED_DB"]
+        self.conn = connect_shared(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_ids (
+                item_id TEXT PRIMARY KEY,
+                owner TEXT,
+                claimed_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_seen_claimed ON seen_ids (claimed_at);
+        """)
+        self._lock = threading.Lock()
+
+    def claim(self, item_ids: List[str], owner: str, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        fresh = []
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for item_id in dict.fromkeys(item_ids):
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO seen_ids (item_id, owner, claimed_at) VALUES (?, ?, ?)", (item_id, owner, now)
+                    )
+                    if cursor.rowcount == 1:
+                        fresh.append(item_id)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return fresh
+
+    def prune(self, before: float) -> int:
+        with self._lock:
+            return self.conn.execute("DELETE FROM seen_ids WHERE claimed_at < ?", (before,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+def connect_shared(path: str) -> sqlite3.Connection:
+    """Autocommit connection to the shared queue file; callers open their own transactions"""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+SHARED_BACKENDS = {
+    SqliteJobBroker.name: (SqliteJobBroker, SqliteSeenStore),
+    MemoryJobBroker.name: (MemoryJobBroker, MemorySeenStore),
+}
+
+def create_shared_state(backend: Optional[str] = None, path: Optional[str] = None) -> Tuple[JobBroker, SharedSeenStore]:
+    """Open the job broker and seen-id store named in CONFIG["BROKER"]"""
+    backend = backend or CONFIG["BROKER"]
+    if backend not in SHARED_BACKENDS:
+        raise ValueError(f"Unknown broker: {backend} (choose from {', '.join(SHARED_BACKENDS)})")
+    broker_class, seen_class = SHARED_BACKENDS[backend]
+    return broker_class(path), seen_class(path)
+
+# ============================================================================
+# IMAGE VERIFICATION
+# ============================================================================
+
+class ImageClassifier:
+    """Scores listing photos: the probability that each shows a complete jacket + pants set"""
+
+    # Part of the cache key, so scores from another model are never reused
+    name = "base"
+
+    def predict(self, images: List[bytes]) -> List[Optional[float]]:
+        """One score per encoded image, None for images that cannot be decoded"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class OnnxClassifier(ImageClassifier):
+    """A local ONNX model run on the CPU with onnxruntime.
+
+    Photos are decoded with Pillow, resized to ``input_size`` squared and
+    normalized with the ImageNet mean and deviation into one NCHW float32
+    batch. The model returns either one logit per image or two-class
+    logits with the complete set as class 1.
+    """
+
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def __init__(self, path: Optional[str] = None, input_size: Optional[int] = None):
+        try:
+            import numpy
+            import onnxruntime
+            from PIL import Image
+        except ImportError as e:
+            raise RuntimeError("IMAGE_CHECK needs onnxruntime, numpy and Pillow: pip install onnxruntime pillow") from e
+        path = path or CONFIG["IMAGE_MODEL"]
+        self._np = numpy
+        self._image = Image
+        self.input_size = input_size or CONFIG["IMAGE_INPUT_SIZE"]
+        self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.name = f"{os.path.basename(path)}:{digest.hexdigest()[:12]}"
+        self._mean = numpy.array(self.MEAN, dtype=numpy.float32).reshape(3, 1, 1)
+        self._std = numpy.array(self.STD, dtype=numpy.float32).reshape(3, 1, 1)
+
+    def _tensor(self, data: bytes):
+        with self._image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGB").resize((self.input_size, self.input_size))
+            pixels = self._np.asarray(image, dtype=self._np.float32) / 255.0
+        return (pixels.transpose(2, 0, 1) - self._mean) / self._std
+
+    def predict(self, images: List[bytes]) -> List[Optional[float]]:
+        np = self._np
+        tensors = {}
+        for index, data in enumerate(images):
+            try:
+                tensors[index] = self._tensor(data)
             except Exception as e:
-                logger.debug(f"Error extracting item: {e}")
+                logger.debug(f"🖼️ Undecodable photo: {e}")
+        scores = [None] * len(images)
+        if not tensors:
+            return scores
+        logits = np.asarray(self.session.run(None, {self.input_name: np.stack(list(tensors.values()))})[0], dtype=np.float64)
+        if logits.ndim == 1 or logits.shape[-1] == 1:
+            probabilities = 1.0 / (1.0 + np.exp(-logits.reshape(-1)))
+        else:
+            shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            probabilities = shifted[:, 1] / shifted.sum(axis=-1)
+        for index, probability in zip(tensors, probabilities):
+            scores[index] = float(probability)
+        return scores
+
+class ImageCache:
+    """Classifier scores on disk, keyed by model and photo content digest.
+
+    Photo URLs map to their digest as well, so a listing that is checked
+    again costs one lookup and a relist reusing the photo skips inference.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG["IMAGE_CACHE"]
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS photo_urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL) WITHOUT ROWID")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS photo_scores (
+                    model TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    PRIMARY KEY (model, digest)
+                ) WITHOUT ROWID
+            """)
+
+    def _select(self, sql: str, keys: List[str], *params) -> List[Tuple]:
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.extend(self.conn.execute(sql.format(",".join("?" * len(chunk))), (*params, *chunk)))
+        return rows
+
+    def digests(self, urls: List[str]) -> Dict[str, str]:
+        return dict(self._select("SELECT url, digest FROM photo_urls WHERE url IN ({})", urls))
+
+    def scores(self, model: str, digests: List[str]) -> Dict[str, float]:
+        return dict(self._select("SELECT digest, score FROM photo_scores WHERE model = ? AND digest IN ({})", digests, model))
+
+    def store(self, model: str, urls: Dict[str, str], scores: Dict[str, float]):
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO photo_urls (url, digest) VALUES (?, ?)", urls.items())
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO photo_scores (model, digest, score) VALUES (?, ?, ?)",
+                [(model, digest, score) for digest, score in scores.items()],
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+class ImageVerifier:
+    """Second opinion from the photo on listings whose title was approved.
+
+    Photos not in the cache are downloaded concurrently and classified in
+    batches of ``batch_size``; per-photo inference time goes to the
+    ``vinted_image_inference_seconds`` histogram. A listing without a
+    usable photo keeps its title verdict.
+    """
+
+    def __init__(self, classifier: ImageClassifier, cache: Optional[ImageCache] = None,
+                 download: Optional[Callable[[str], bytes]] = None, threshold: Optional[float] = None,
+                 batch_size: Optional[int] = None, workers: Optional[int] = None):
+        self.classifier = classifier
+        self.cache = cache or ImageCache()
+        self.download = download or self._download
+        self.threshold = CONFIG["IMAGE_THRESHOLD"] if threshold is None else threshold
+        self.batch_size = batch_size or CONFIG["IMAGE_BATCH_SIZE"]
+        self._pool = ThreadPoolExecutor(max_workers=workers or CONFIG["IMAGE_DOWNLOAD_WORKERS"], thread_name_prefix="photo")
+        self._session = None
+
+    def _download(self, url: str) -> bytes:
+        if self._session is None:
+            self._session = HttpFetcher._create_session()
+        response = self._session.get(url, timeout=CONFIG["IMAGE_TIMEOUT"])
+        response.raise_for_status()
+        return response.content
+
+    def _fetch(self, url: str) -> Optional[bytes]:
+        try:
+            return self.download(url)
+        except Exception as e:
+            logger.debug(f"🖼️ Photo download failed for {url}: {e}")
+            return None
+
+    def _classify(self, blobs: Dict[str, bytes]) -> Dict[str, float]:
+        scores = {}
+        digests = list(blobs)
+        for start in range(0, len(digests), self.batch_size):
+            chunk = digests[start:start + self.batch_size]
+            started = time.perf_counter()
+            try:
+                results = self.classifier.predict([blobs[digest] for digest in chunk])
+            except Exception as e:
+                logger.warning(f"⚠️ Photo classifier failed on {len(chunk)} photo(s): {e}")
                 continue
+            elapsed = time.perf_counter() - started
+            for _ in chunk:
+                IMAGE_SECONDS.observe(elapsed / len(chunk))
+            logger.debug(f"🖼️ Classified {len(chunk)} photo(s) in {elapsed * 1000:.0f} ms ({elapsed * 1000 / len(chunk):.1f} ms each)")
+            scores.update((digest, score) for digest, score in zip(chunk, results) if score is not None)
+        return scores
+
+    def scores(self, items: List[Item]) -> Dict[str, float]:
+        """Photo score per item id; items without a usable photo are left out"""
+        model = self.classifier.name
+        urls = sorted({item.image for item in items if item.image})
+        digests = self.cache.digests(urls)
+        known = self.cache.scores(model, sorted(set(digests.values())))
+        # Photos never seen, or never scored by this model, have to be downloaded
+        missing = [url for url in urls if digests.get(url) not in known]
+        blobs = {}
+        for url, data in zip(missing, self._pool.map(self._fetch, missing)):
+            if data is not None:
+                digests[url] = hashlib.blake2b(data, digest_size=16).hexdigest()
+                blobs.setdefault(digests[url], data)
+        known.update(self.cache.scores(model, sorted(set(blobs) - set(known))))
+        fresh = self._classify({digest: data for digest, data in blobs.items() if digest not in known})
+        self.cache.store(model, {url: digests[url] for url in missing if url in digests}, fresh)
+        known.update(fresh)
         
-        logger.info(f"🎉 Successfully scraped {len(items)} valid items")
-    
-    except Exception as e:
-        logger.error(f"❌ Selenium error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-    
-    finally:
-        if driver:
-            logger.info("🔒 Closing browser...")
-            try:
-                driver.quit()
-            except:
-                pass
-    
-    return items
+        scores = {}
+        for item in items:
+            score = known.get(digests.get(item.image)) if item.image else None
+            if score is None:
+                IMAGE_CHECKS.inc(outcome="unavailable")
+                continue
+            IMAGE_CHECKS.inc(outcome="classified" if digests[item.image] in fresh else "cached")
+            scores[item.id] = score
+        return scores
+
+    def reject(self, items: List[Item]) -> Dict[str, float]:
+        """Items whose photo scores below the threshold, with their scores"""
+        return {item_id: score for item_id, score in self.scores(items).items() if score < self.threshold}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+        self.cache.close()
+        self.classifier.close()
+
+def run_classify(paths: List[str], classifier: ImageClassifier) -> str:
+    """Score local photos one by one and format score, latency and verdict per file (the classify command)"""
+    lines = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        started = time.perf_counter()
+        score = classifier.predict([data])[0]
+        elapsed = (time.perf_counter() - started) * 1000
+        if score is None:
+            lines.append(f"   -   {elapsed:7.1f} ms  undecodable    {path}")
+        else:
+            verdict = "complete set" if score >= CONFIG["IMAGE_THRESHOLD"] else "rejected"
+            lines.append(f"{score:5.2f}  {elapsed:7.1f} ms  {verdict:13s}  {path}")
+    return "\n".join(lines)
+
+_VERIFIER: Optional[ImageVerifier] = None
+
+def get_image_verifier() -> Optional[ImageVerifier]:
+    """Return the process-wide photo verifier, or None unless CONFIG["IMAGE_CHECK"] is on"""
+    global _VERIFIER
+    if _VERIFIER is None and CONFIG["IMAGE_CHECK"]:
+        _VERIFIER = ImageVerifier(OnnxClassifier())
+        logger.info(f"🖼️ Photo check on: {_VERIFIER.classifier.name} (threshold {_VERIFIER.threshold})")
+    return _VERIFIER if CONFIG["IMAGE_CHECK"] else None
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+class Checkpoint:
+    """Monitor state saved after every cycle, so a restarted run resumes instead of starting cold.
+
+    The file holds the cycle counter, each search's high-water mark and
+    poll schedule, and the notifications still waiting on each channel. It
+    is written to a temporary file, synced and renamed over the old one, so
+    a crash leaves either the previous checkpoint or the new one. Poll
+    times are saved as wall-clock times, since the monitor loop schedules
+    on the monotonic clock, which restarts with the process.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG["CHECKPOINT_FILE"]
+
+    def save(self, cycle: int, scheduler: SearchScheduler, poller: AdaptivePoller,
+             dispatcher: Optional[NotificationDispatcher] = None, now: Optional[float] = None,
+             wall: Optional[float] = None):
+        """Write the checkpoint; ``now`` is the poller's clock (monotonic) and ``wall`` the matching time.time()"""
+        wall = time.time() if wall is None else wall
+        shift = wall - (time.monotonic() if now is None else now)
+        state = {
+            "version": self.VERSION,
+            "saved_at": wall,
+            "cycle": cycle,
+            "high_water": dict(scheduler.high_water),
+            "polls": {
+                key: {
+                    "interval": poll.interval, "rate": poll.rate, "failures": poll.failures,
+                    "last_poll": None if poll.last_poll is None else poll.last_poll + shift,
+                    "next_due": poll.next_due + shift,
+                }
+                for key, poll in poller.states.items()
+            },
+            "pending": {
+                name: [vars(notification) for notification in notifications]
+                for name, notifications in (dispatcher.pending() if dispatcher else {}).items() if notifications
+            },
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def load(self) -> Optional[Dict]:
+        """The saved state, or None when there is no usable checkpoint"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        if not isinstance(state, dict) or state.get("version") != self.VERSION:
+            logger.warning(f"⚠️ Ignoring checkpoint {self.path}: unknown version")
+            return None
+        return state
+
+    def restore(self, scheduler: SearchScheduler, poller: AdaptivePoller,
+                dispatcher: Optional[NotificationDispatcher] = None, now: Optional[float] = None,
+                wall: Optional[float] = None) -> int:
+        """Apply the checkpoint to a fresh scheduler, poller and dispatcher; return the cycle to continue from"""
+        started = time.perf_counter()
+        state = self.load()
+        if state is None:
+            return 0
+        wall = time.time() if wall is None else wall
+        shift = (time.monotonic() if now is None else now) - wall
+        keys = {query.key for query in scheduler.searches}
+        for key, mark in state["high_water"].items():
+            # The store may already be ahead: it is written as each search completes
+            if key in keys and mark > scheduler.high_water.get(key, -1):
+                scheduler.high_water[key] = mark
+        for key, poll in state["polls"].items():
+            if key in keys:
+                poller.states[key] = PollState(
+                    poll["interval"], poll["rate"], None if poll["last_poll"] is None else poll["last_poll"] + shift,
+                    poll["next_due"] + shift, poll["failures"],
+                )
+        pending = {name: [Notification(**fields) for fields in entries] for name, entries in state["pending"].items()}
+        requeued = dispatcher.requeue(pending) if dispatcher and pending else 0
+        logger.info(
+            f"♻️ Resumed from checkpoint: cycle {state['cycle']}, {len(keys & set(state['polls']))} search(es), "
+            f"{requeued} pending notification(s), saved {wall - state['saved_at']:.0f}s ago "
+            f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+        return state["cycle"]
 
 # ============================================================================
 # MAIN LOOP
 # ============================================================================
 
+@dataclass
+class ItemBatch:
+    """Listings moving through the processing stages together"""
+    items: List[Item]
+    rows: List[ItemRow] = field(default_factory=list)
+    notify: List[Notification] = field(default_factory=list)
+
+    @property
+    def new(self) -> int:
+        return len(self.rows)
+
+def parse_stage(batches: Iterable[ItemBatch]) -> Iterator[ItemBatch]:
+    """Turn raw dicts into Items, dropping incomplete ones and repeats within the batch"""
+    for batch in batches:
+        by_id = {}
+        for item in batch.items:
+            item = Item.coerce(item)
+            if item.id and item.title and item.id not in by_id:
+                by_id[item.id] = item
+        batch.items = list(by_id.values())
+        ITEMS_SCRAPED.inc(len(batch.items))
+        yield batch
+
+def dedup_stage(batches: Iterable[ItemBatch], store: ItemStore) -> Iterator[ItemBatch]:
+    """Keep only listings that are not in the store yet"""
+    for batch in batches:
+        if batch.items:
+            by_id = {item.id: item for item in batch.items}
+            with METRICS.span("dedup"):
+                unseen = store.filter_unseen(list(by_id))
+            logger.debug(f"Already processed: {len(by_id) - len(unseen)}")
+            batch.items = [by_id[item_id] for item_id in unseen]
+        yield batch
+
+def claim_stage(batches: Iterable[ItemBatch], seen: SharedSeenStore, owner: str) -> Iterator[ItemBatch]:
+    """Keep only listings no other worker has claimed"""
+    for batch in batches:
+        if batch.items:
+            with METRICS.span("claim"):
+                fresh = set(seen.claim([item.id for item in batch.items], owner))
+            batch.items = [item for item in batch.items if item.id in fresh]
+        yield batch
+
+def validate_stage(batches: Iterable[ItemBatch], store: ItemStore) -> Iterator[ItemBatch]:
+    """Build a row per listing and a notification per approved listing that is not a relist"""
+    for batch in batches:
+        with METRICS.span("validate"):
+            for item in batch.items:
+                verdict, reason = validate_item(item)
+                record_rule_hits(verdict)
+                item.brand = verdict.brand or (item.brand.lower() if item.brand else None)
+                
+                if reason == "Valid":
+                    item.team = verdict.team
+                    item.duplicate_of = store.relists.find(item)  # indexed in persist_stage, once past the gates
+                    batch.rows.append(item.to_row("approved"))
+                    if item.duplicate_of:
+                        RELISTS.inc()
+                        logger.info(f"♻️ {item.id} | {item.title} | relist of {item.duplicate_of}, not notifying")
+                    else:
+                        batch.notify.append(Notification(item.id, item.title, item.price, item.team, item.url))
+                        logger.info(f"✅ {item.id} | {item.title} | {item.team}")
+                else:
+                    batch.rows.append(item.to_row("rejected", reason))
+                    ITEMS_REJECTED.inc(reason=reason)
+                    logger.debug(f"❌ {item.id} | {reason}")
+        yield batch
+
+def image_stage(batches: Iterable[ItemBatch], verifier: ImageVerifier) -> Iterator[ItemBatch]:
+    """Reject approved listings whose photo does not show a complete set; one classifier pass per batch"""
+    for batch in batches:
+        if batch.notify:
+            by_id = {item.id: item for item in batch.items}
+            with METRICS.span("image"):
+                rejected = verifier.reject([by_id[notification.item_id] for notification in batch.notify])
+            if rejected:
+                batch.rows = [
+                    by_id[row[0]].to_row("rejected", PHOTO_REJECTED) if row[0] in rejected else row for row in batch.rows
+                ]
+                batch.notify = [notification for notification in batch.notify if notification.item_id not in rejected]
+                ITEMS_REJECTED.inc(len(rejected), reason=PHOTO_REJECTED)
+                for item_id, score in rejected.items():
+                    logger.info(f"🖼️ {item_id} | {by_id[item_id].title} | photo score {score:.2f}, not notifying")
+        yield batch
+
+def deal_stage(batches: Iterable[ItemBatch], store: ItemStore, threshold: Optional[float] = None) -> Iterator[ItemBatch]:
+    """Score approved listings against the market; with enough history only those priced ``threshold`` below it notify"""
+    threshold = CONFIG["DEAL_SCORE_THRESHOLD"] if threshold is None else threshold
+    for batch in batches:
+        if batch.notify:
+            by_id = {item.id: item for item in batch.items}
+            deals = []
+            for notification in batch.notify:
+                notification.deal = store.prices.score(by_id[notification.item_id])
+                if notification.deal is None or threshold is None or notification.deal >= threshold:
+                    deals.append(notification)
+                else:
+                    ORDINARY_PRICES.inc()
+                    logger.info(f"💤 {notification.item_id} | {notification.title} | {-notification.deal:+.0%} vs market, not notifying")
+            batch.notify = deals
+        yield batch
+
+def persist_stage(batches: Iterable[ItemBatch], store: ItemStore) -> Iterator[ItemBatch]:
+    """Index the approved listings for relist checks, then write each batch in one transaction.
+
+    Indexed here, after the photo check, are exactly the rows RelistIndex.load
+    reads back on restart: approved and not a relist, notified or not.
+    """
+    for batch in batches:
+        by_id = {item.id: item for item in batch.items}
+        relists = {}
+        for row in batch.rows:
+            if row[5] != "approved" or row[12] is not None:
+                continue
+            # Checked again while indexing: an earlier listing of this batch may be the original
+            item = by_id[row[0]]
+            item.duplicate_of = store.relists.check(item)
+            if item.duplicate_of:
+                relists[item.id] = item
+                RELISTS.inc()
+                logger.info(f"♻️ {item.id} | {item.title} | relist of {item.duplicate_of}, not notifying")
+        if relists:
+            batch.rows = [relists[row[0]].to_row("approved") if row[0] in relists else row for row in batch.rows]
+            batch.notify = [notification for notification in batch.notify if notification.item_id not in relists]
+        with METRICS.span("store"):
+            store.save_items_batch(batch.rows)
+        ITEMS_NEW.inc(batch.new)
+        yield batch
+
+def notify_stage(batches: Iterable[ItemBatch], dispatcher: NotificationDispatcher) -> Iterator[ItemBatch]:
+    """Hand approved listings to the dispatcher, whose bounded queues absorb slow channels"""
+    for batch in batches:
+        for notification in batch.notify:
+            dispatcher.submit(notification)
+        ITEMS_APPROVED.inc(len(batch.notify))
+        yield batch
+
+def process_stream(batches: Iterable[ItemBatch], store: Optional[ItemStore] = None,
+                   dispatcher: Optional[NotificationDispatcher] = None, seen: Optional[SharedSeenStore] = None,
+                   owner: str = "", verifier: Optional[ImageVerifier] = None) -> Iterator[ItemBatch]:
+    """Chain parse -> dedup -> (claim) -> validate -> (image) -> deal -> persist -> notify; each batch is pulled through every stage in turn"""
+    store = store or get_store()
+    verifier = verifier or get_image_verifier()
+    stream = dedup_stage(parse_stage(batches), store)
+    if seen is not None:
+        stream = claim_stage(stream, seen, owner)
+    stream = validate_stage(stream, store)
+    if verifier is not None:
+        stream = image_stage(stream, verifier)
+    stream = persist_stage(deal_stage(stream, store), store)
+    return notify_stage(stream, dispatcher or get_dispatcher())
+
+def process_items(items: List[Item]) -> Tuple[int, int]:
+    """Dedup, validate and store a batch of items, notifying only approved listings that pass the deal check; return (new, notified)"""
+    batch = next(process_stream([ItemBatch(list(items))]))
+    return batch.new, len(batch.notify)
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
 def monitor_vinted():
     """Main monitoring loop"""
-    logger.info("🚀 Starting Vinted Bot (Selenium Edition)...")
+    logger.info("🚀 Starting Vinted Bot...")
     logger.info(f"Discord: {'✅' if CONFIG['DISCORD_WEBHOOK_URL'] else '❌'}")
     logger.info(f"Telegram: {'✅' if CONFIG['TELEGRAM_BOT_TOKEN'] else '❌'}")
     
     init_database()
-    cycle = 0
+    fetcher = create_fetcher()
+    scheduler = SearchScheduler(fetcher, load_searches(), store=get_store())
+    poller = AdaptivePoller()
+    retention = Retention(get_store())
+    verifier = get_image_verifier()
+    metrics_server = start_metrics_server() if CONFIG["METRICS_PORT"] else None
+    watcher = RulesWatcher(CONFIG["RULES_FILE"]).start() if CONFIG["RULES_FILE"] else None
+    by_key = {query.key: query for query in scheduler.searches}
+    logger.info(f"Backend: {fetcher.name} | Searches: {len(scheduler.searches)}")
+    checkpoint = Checkpoint() if CONFIG["CHECKPOINT_FILE"] else None
+    cycle = checkpoint.restore(scheduler, poller, get_dispatcher()) if checkpoint else 0
+    if threading.current_thread() is threading.main_thread():
+        # CI runners and service managers stop the bot with SIGTERM: shut down as on Ctrl+C
+        signal.signal(signal.SIGTERM, _interrupt)
     
     while True:
         try:
+            due = [by_key[key] for key in poller.due(list(by_key), time.monotonic())]
+            if not due:
+                time.sleep(poller.seconds_until_due(list(by_key), time.monotonic()))
+                continue
+            
             cycle += 1
-            logger.info(f"\n🔍 Cycle #{cycle} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            logger.info(f"\n🔍 Cycle #{cycle} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {len(due)} search(es) due")
             
-            items = fetch_vinted_items()
+            with METRICS.span("cycle"):
+                started = time.perf_counter()
+                found = 0
+                total_new = 0
+                total_approved = 0
+                for result, items in scheduler.stream_cycle(due):
+                    if items is not None:
+                        # Processed while the searches keep extracting: alerts go out mid-page
+                        batch = next(process_stream([ItemBatch(items)]))
+                        if batch.notify and not total_approved:
+                            METRICS.stage_seconds.observe(time.perf_counter() - started, stage="first_alert")
+                        result.new += batch.new
+                        result.approved += len(batch.notify)
+                        total_new += batch.new
+                        total_approved += len(batch.notify)
+                        continue
+                    
+                    scheduler.commit(result)
+                    if result.error:
+                        interval = poller.record_error(result.query.key, time.monotonic())
+                    else:
+                        interval = poller.record_success(result.query.key, result.new, time.monotonic())
+                    found += result.unique
+                    logger.info(
+                        f"📈 {result.query.key} | {result.latency:.2f}s | {result.pages} page(s) | "
+                        f"found {result.unique} | new {result.new} | approved {result.approved} | next in {interval:.0f}s"
+                        + (f" | error: {result.error}" if result.error else "")
+                    )
             
-            if not items:
+            if not found:
                 logger.warning("⚠️ No items found")
-                logger.info(f"⏳ Next check in {CONFIG['CHECK_INTERVAL']}s\n")
-                time.sleep(CONFIG['CHECK_INTERVAL'])
-                continue
             
-            total_approved = 0
-            for item in items:
-                item_id = str(item.get("id", ""))
-                title = item.get("title", "")
-                price = item.get("price", "N/A")
-                url = item.get("url", "")
-                
-                if not item_id or not title:
-                    continue
-                
-                if item_exists(item_id):
-                    logger.debug(f"Already processed: {item_id}")
-                    continue
-                
-                is_valid, reason = is_valid_tracksuit(title)
-                
-                if is_valid:
-                    team = check_team(title)
-                    total_approved += 1
-                    save_item(item_id, title, price, url, "approved", team)
-                    logger.info(f"✅ {item_id} | {title} | {team}")
-                    send_discord(item_id, title, price, team)
-                    send_telegram(item_id, title, price, team)
-                else:
-                    save_item(item_id, title, price, url, "rejected", reason=reason)
-                    logger.debug(f"❌ {item_id} | {reason}")
-            
-            logger.info(f"📊 Found: {len(items)} | Approved: {total_approved}")
-            logger.info(f"⏳ Next check in {CONFIG['CHECK_INTERVAL']}s\n")
-            
-            time.sleep(CONFIG['CHECK_INTERVAL'])
+            logger.info(f"📊 Found: {found} | New: {total_new} | Approved: {total_approved}")
+            logger.debug(f"🧠 Seen cache: {get_store().seen.stats()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                busiest = sorted(
+                    ((hits, f"{category}:{keyword}") for category, keywords in rule_hit_report().items()
+                     for keyword, hits in keywords.items() if hits),
+                    reverse=True,
+                )[:10]
+                logger.debug(f"📜 Rule hits: {', '.join(f'{name}={hits}' for hits, name in busiest)}")
+            logger.debug(f"📨 Notifications: {get_dispatcher().stats}")
+            if PAGE_STATS:
+                logger.debug(f"📦 Page cost: {page_stats_summary()}")
+            if CONFIG["METRICS_FILE"]:
+                METRICS.write_jsonl(CONFIG["METRICS_FILE"], cycle=cycle)
+            with METRICS.span("retention"):
+                retention.run_due()
+            if checkpoint:
+                with METRICS.span("checkpoint"):
+                    checkpoint.save(cycle, scheduler, poller, get_dispatcher())
+            logger.info(f"⏳ Next check in {poller.seconds_until_due(list(by_key), time.monotonic()):.0f}s\n")
         
         except KeyboardInterrupt:
             logger.info("\n🛑 Bot stopped")
+            scheduler.close()
+            fetcher.close()
+            get_dispatcher().close()
+            if checkpoint:
+                # Whatever the dispatcher could not send before closing is retried on the next start
+                checkpoint.save(cycle, scheduler, poller, get_dispatcher())
+            get_store().close()
+            if verifier:
+                verifier.close()
+            if metrics_server:
+                metrics_server.shutdown()
+            if watcher:
+                watcher.stop()
             break
         except Exception as e:
             logger.error(f"💥 Error: {e}")
@@ -435,9 +3836,656 @@ def monitor_vinted():
             logger.error(traceback.format_exc())
             time.sleep(CONFIG['CHECK_INTERVAL'])
 
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+def default_worker_id() -> str:
+    import socket
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_job(lease: Lease, broker: JobBroker, scheduler: SearchScheduler, poller: AdaptivePoller,
+            seen: SharedSeenStore, store: Optional[ItemStore] = None,
+            dispatcher: Optional[NotificationDispatcher] = None) -> Optional[SearchResult]:
+    """Run one leased search through the pipeline and complete the job; None if the lease was lost"""
+    key = lease.query.key
+    scheduler.high_water.pop(key, None)
+    if lease.high_water is not None:
+        scheduler.high_water[key] = lease.high_water
+    poller.states.pop(key, None)
+    if lease.state is not None:
+        poller.states[key] = lease.state
+    
+    outcome = None
+    stream = scheduler.stream_cycle([lease.query])
+    try:
+        for result, items in stream:
+            if items is None:
+                outcome = result
+            elif broker.renew(lease, CONFIG["LEASE_SECONDS"], time.time()):
+                batch = next(process_stream([ItemBatch(items)], store, dispatcher, seen, lease.owner))
+                result.new += batch.new
+                result.approved += len(batch.notify)
+            else:
+                break
+    finally:
+        stream.close()
+    if outcome is None:
+        logger.warning(f"⌛ {key}: lease lost, dropping the rest of the job")
+        return None
+    
+    scheduler.commit(outcome)
+    if outcome.error:
+        poller.record_error(key, time.time())
+    else:
+        poller.record_success(key, outcome.new, time.time())
+    if not broker.complete(lease, poller.state(key), scheduler.high_water.get(key)):
+        logger.warning(f"⌛ {key}: lease expired before the job was completed")
+        return None
+    return outcome
+
+def run_worker(broker: JobBroker, seen: SharedSeenStore, worker_id: Optional[str] = None,
+               fetcher: Optional[Fetcher] = None, store: Optional[ItemStore] = None,
+               dispatcher: Optional[NotificationDispatcher] = None, max_jobs: Optional[int] = None,
+               stop: Optional[threading.Event] = None) -> int:
+    """Lease due searches from the broker until stopped (or ``max_jobs`` are done); return the jobs completed"""
+    worker_id = worker_id or default_worker_id()
+    stop = stop or threading.Event()
+    owned_fetcher = fetcher is None
+    fetcher = fetcher or create_fetcher()
+    scheduler = SearchScheduler(fetcher, [], max_workers=1)
+    poller = AdaptivePoller()
+    logger.info(f"👷 Worker {worker_id} started | Backend: {fetcher.name} | Broker: {broker.name}")
+    done = 0
+    
+    try:
+        while not stop.is_set() and (max_jobs is None or done < max_jobs):
+            lease = broker.lease(worker_id, CONFIG["LEASE_SECONDS"], time.time())
+            if lease is None:
+                stop.wait(CONFIG["WORKER_IDLE_WAIT"])
+                continue
+            result = run_job(lease, broker, scheduler, poller, seen, store, dispatcher)
+            if result is None:
+                continue
+            done += 1
+            logger.info(
+                f"📈 [{worker_id}] {result.query.key} | {result.latency:.2f}s | {result.pages} page(s) | "
+                f"found {result.unique} | new {result.new} | approved {result.approved} | "
+                f"next in {poller.state(result.query.key).next_due - time.time():.0f}s"
+                + (f" | error: {result.error}" if result.error else "")
+            )
+    finally:
+        scheduler.close()
+        if owned_fetcher:
+            fetcher.close()
+    return done
+
+def run_coordinator(broker: JobBroker, seen: SharedSeenStore, interval: Optional[float] = None,
+                    stop: Optional[threading.Event] = None, max_rounds: Optional[int] = None) -> int:
+    """Keep the job queue in line with CONFIG["SEARCHES"], free expired leases and prune old claims"""
+    stop = stop or threading.Event()
+    interval = CONFIG["COORDINATOR_INTERVAL"] if interval is None else interval
+    rounds = 0
+    while max_rounds is None or rounds < max_rounds:
+        rounds += 1
+        now = time.time()
+        broker.publish(load_searches())  # re-read every round: the rules file may change the searches
+        for key, owner in broker.reap(now):
+            logger.warning(f"⌛ Lease on {key} held by {owner} expired, job is free again")
+        pruned = seen.prune(now - CONFIG["SEEN_RETENTION_DAYS"] * 86400)
+        status = broker.status(now)
+        logger.info(f"🗂️ Jobs: {status['jobs']} | leased: {status['leased']} | due: {status['due']}"
+                    + (f" | pruned {pruned} old claims" if pruned else ""))
+        if stop.wait(interval):
+            break
+    return rounds
+
+def serve_shared(command: str, path: Optional[str] = None, worker_id: Optional[str] = None):
+    """Run the coordinator or a worker against the shared queue until interrupted"""
+    broker, seen = create_shared_state(path=path)
+    metrics_server = start_metrics_server() if CONFIG["METRICS_PORT"] else None
+    watcher = RulesWatcher(CONFIG["RULES_FILE"]).start() if CONFIG["RULES_FILE"] else None
+    try:
+        if command == "coordinator":
+            logger.info(f"🗂️ Coordinator on {getattr(broker, 'path', broker.name)}")
+            run_coordinator(broker, seen)
+        else:
+            init_database()
+            run_worker(broker, seen, worker_id)
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Stopped")
+    finally:
+        if command != "coordinator":
+            get_dispatcher().close()
+            get_store().close()
+        if metrics_server:
+            metrics_server.shutdown()
+        if watcher:
+            watcher.stop()
+        broker.close()
+        seen.close()
+
+# ============================================================================
+# RESCORE
+# ============================================================================
+
+# (item_id, title, size, status, team, brand, reason) as read from the table
+RescoreRow = Tuple[str, str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+def _init_rescore_worker(snapshot: Dict):
+    """Use the parent's rules in pool workers, whatever the start method"""
+    restore_rules(snapshot)
+
+def rescore_chunk(rows: List[RescoreRow]) -> List[Tuple[str, Optional[str], Optional[str], Optional[str], str]]:
+    """Re-validate rows; return UPDATE parameters for the ones whose verdict changed"""
+    updates = []
+    for item_id, title, size, status, team, brand, reason in rows:
+        verdict, new_reason = validate_item(Item(item_id, title, size=size))
+        if new_reason == "Valid" and reason == PHOTO_REJECTED:
+            # The title still passes, so the photo verdict stands
+            new = ("rejected", verdict.team, verdict.brand or brand, reason)
+        elif new_reason == "Valid":
+            new = ("approved", verdict.team, verdict.brand or brand, None)
+        else:
+            new = ("rejected", None, verdict.brand or brand, new_reason)
+        if new != (status, team, brand, reason):
+            updates.append(new + (item_id,))
+    return updates
+
+def iter_item_chunks(conn: sqlite3.Connection, chunk_size: int):
+    """Stream the items table in primary-key order, one chunk per query"""
+    last = ""
+    while True:
+        rows = conn.execute(
+            f"SELECT item_id, title, size, status, team, brand, {REASON_SQL} FROM items "
+            "WHERE item_id > ? ORDER BY item_id LIMIT ?",
+            (last, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+def rescore_items(path: Optional[str] = None, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Re-run validation over every stored item after the keyword lists change.
+
+    Chunks are read by keyset pagination and validated across a process
+    pool, with at most two chunks per worker in flight so memory stays flat
+    on multi-million-row tables. Only rows whose verdict changed are
+    written back, one transaction per chunk. Returns row counts.
+    """
+    workers = workers or CONFIG["RESCORE_WORKERS"] or os.cpu_count() or 1
+    chunk_size = chunk_size or CONFIG["RESCORE_CHUNK_SIZE"]
+    conn = connect_database(path)
+    total = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    stats = {"rows": 0, "changed": 0}
+    started = time.perf_counter()
+    
+    def apply(rows: List[RescoreRow], updates):
+        with conn:
+            conn.executemany(
+                "UPDATE items SET status = ?, team = ?, brand = ?, reason_code = ?, reason_rejected = ? WHERE item_id = ?",
+                [(status, team, brand) + encode_reason(reason) + (item_id,) for status, team, brand, reason, item_id in updates],
+            )
+        stats["rows"] += len(rows)
+        stats["changed"] += len(updates)
+        if progress:
+            progress(stats["rows"], total)
+        else:
+            rate = stats["rows"] / max(time.perf_counter() - started, 1e-9)
+            logger.info(f"🔁 Rescored {stats['rows']}/{total} | changed {stats['changed']} | {rate:,.0f} rows/s")
+    
+    logger.info(f"🔁 Rescoring {total} items with {workers} worker(s)...")
+    try:
+        if workers == 1:
+            for rows in iter_item_chunks(conn, chunk_size):
+                apply(rows, rescore_chunk(rows))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_rescore_worker,
+                                     initargs=(rule_snapshot(),)) as pool:
+                pending = deque()
+                for rows in iter_item_chunks(conn, chunk_size):
+                    pending.append((rows, pool.submit(rescore_chunk, rows)))
+                    if len(pending) >= workers * 2:
+                        rows, future = pending.popleft()
+                        apply(rows, future.result())
+                while pending:
+                    rows, future = pending.popleft()
+                    apply(rows, future.result())
+        
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status"))
+    finally:
+        conn.close()
+    stats["approved"] = counts.get("approved", 0)
+    stats["rejected"] = counts.get("rejected", 0)
+    stats["seconds"] = time.perf_counter() - started
+    logger.info(f"✅ Rescore done: {stats['changed']} of {stats['rows']} items changed in {stats['seconds']:.1f}s")
+    return stats
+
+# ============================================================================
+# REPORTS
+# ============================================================================
+
+LISTING_COLUMNS = (
+    "item_id", "timestamp", "status", "team", "brand", "size", "price", "price_cents",
+    "currency", "seller", "reason_rejected", "duplicate_of", "title", "vinted_url",
+)
+
+def enable_fts(conn: sqlite3.Connection) -> bool:
+    """Create the FTS5 title index kept in sync by triggers; False if SQLite lacks FTS5"""
+    if has_fts(conn):
+        return True
+    try:
+        with conn:
+            conn.execute("CREATE VIRTUAL TABLE items_fts USING fts5(title, content='items', content_rowid='rowid')")
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+                    INSERT INTO items_fts(rowid, title) VALUES (new.rowid, new.title);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+                    INSERT INTO items_fts(items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF title ON items BEGIN
+                    INSERT INTO items_fts(items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+                    INSERT INTO items_fts(rowid, title) VALUES (new.rowid, new.title);
+                END
+            """)
+            conn.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"⚠️ Full-text search unavailable: {e}")
+        return False
+    logger.info("🔎 Full-text title index built")
+    return True
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone() is not None
+
+def _time_filter(since: Optional[str], until: Optional[str], clauses: List[str], params: List):
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+
+def _where(clauses: List[str]) -> str:
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+def query_items(conn: sqlite3.Connection, team: Optional[str] = None, brand: Optional[str] = None,
+                status: Optional[str] = None, size: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None, text: Optional[str] = None, max_price_cents: Optional[int] = None,
+                limit: int = 50) -> List[Dict]:
+    """Newest listings matching every given filter; ``until`` is exclusive"""
+    clauses, params = [], []
+    for column, value in (("team", team), ("brand", brand), ("status", status), ("size", size)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value.lower() if column in ("team", "brand") else value)
+    _time_filter(since, until, clauses, params)
+    if max_price_cents is not None:
+        clauses.append("price_cents <= ?")
+        params.append(max_price_cents)
+    if text:
+        if has_fts(conn):
+            clauses.append("rowid IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)")
+            params.append(" ".join('"' + word.replace('"', '""') + '"' for word in text.split()))
+        else:
+            clauses.append("title LIKE ?")
+            params.append(f"%{text}%")
+    columns = ", ".join(f"{REASON_SQL} AS reason_rejected" if c == "reason_rejected" else c for c in LISTING_COLUMNS)
+    sql = f"SELECT {columns} FROM items{_where(clauses)} ORDER BY timestamp DESC, item_id DESC LIMIT ?"
+    return [dict(zip(LISTING_COLUMNS, row)) for row in conn.execute(sql, params + [limit])]
+
+def rejection_report(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None) -> Dict:
+    """Approval rate and the share of listings lost to each rejection reason"""
+    clauses, params = [], []
+    _time_filter(since, until, clauses, params)
+    counts = conn.execute(
+        f"SELECT status, reason_code, reason_rejected, COUNT(*) FROM items{_where(clauses)} "
+        "GROUP BY status, reason_code, reason_rejected",
+        params,
+    ).fetchall()
+    # Compacted rejections only keep their day
+    days, day_params = [], []
+    for bound, op in ((since, ">="), (until, "<")):
+        if bound:
+            days.append(f"day {op} CAST(julianday(?) - 2440587.5 AS INTEGER)")
+            day_params.append(bound)
+    counts += conn.execute(
+        f"SELECT 'rejected', reason_code, NULL, COUNT(*) FROM compact_items{_where(days)} GROUP BY reason_code",
+        day_params,
+    ).fetchall()
+    total = sum(count for *_, count in counts)
+    approved = sum(count for status, *_, count in counts if status == "approved")
+    by_reason = {}
+    for status, code, text, count in counts:
+        if status != "approved":
+            reason = decode_reason(code, text) or "(none)"
+            by_reason[reason] = by_reason.get(reason, 0) + count
+    reasons = sorted(
+        ({"reason": reason, "count": count, "share": count / total} for reason, count in by_reason.items()),
+        key=lambda entry: -entry["count"],
+    )
+    return {"total": total, "approved": approved, "approval_rate": approved / total if total else 0.0, "reasons": reasons}
+
+def price_report(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+    """Price statistics in cents per team and currency (teams are only set on approved listings)"""
+    clauses, params = ["team IS NOT NULL", "price_cents IS NOT NULL"], []
+    _time_filter(since, until, clauses, params)
+    where = _where(clauses)
+    report = []
+    for team, currency, count, low, mean, high in conn.execute(
+        f"SELECT team, currency, COUNT(*), MIN(price_cents), AVG(price_cents), MAX(price_cents) FROM items{where} "
+        "GROUP BY team, currency ORDER BY COUNT(*) DESC",
+        params,
+    ).fetchall():
+        # Median straight off the (team, currency, price_cents) index
+        median = conn.execute(
+            f"SELECT price_cents FROM items{where} AND team = ? AND currency IS ? ORDER BY price_cents LIMIT 1 OFFSET ?",
+            params + [team, currency, (count - 1) // 2],
+        ).fetchone()[0]
+        report.append({"team": team, "currency": currency, "count": count, "min": low, "median": median,
+                       "avg": round(mean), "max": high})
+    return report
+
+def format_table(rows: List[Dict], columns: Optional[List[str]] = None) -> str:
+    """Plain-text table for the report command"""
+    if not rows:
+        return "(no rows)"
+    columns = columns or list(rows[0])
+    cells = [[("" if row.get(c) is None else str(row.get(c)))[:60] for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths)), "  ".join("-" * w for w in widths)]
+    lines.extend("  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells)
+    return "\n".join(lines)
+
+def run_report(args) -> str:
+    """Render the report chosen on the command line"""
+    since = args.since
+    if args.days:
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - args.days * 86400))
+    conn = connect_database(args.db)
+    try:
+        if args.fts:
+            enable_fts(conn)
+        if args.view == "reasons":
+            result = rejection_report(conn, since, args.until)
+            if args.json:
+                return json.dumps(result, indent=2)
+            rows = [dict(entry, share=f"{entry['share']:.1%}") for entry in result["reasons"]]
+            return (f"{result['total']} listings | approved {result['approved']} ({result['approval_rate']:.1%})\n\n"
+                    + format_table(rows, ["reason", "count", "share"]))
+        if args.view == "market":
+            stats = PriceStats()
+            stats.load(conn)
+            result = stats.query(team=args.team, brand=args.brand, size=args.size)[:args.limit]
+            if args.json:
+                return json.dumps(result, indent=2)
+            rows = [{k: (f"{v / 100:.2f}" if k in ("p25", "p50", "p75") else v) for k, v in r.items()} for r in result]
+            return format_table(rows, ["team", "brand", "size", "currency", "count", "p25", "p50", "p75"])
+        if args.view == "prices":
+            result = price_report(conn, since, args.until)
+            if args.json:
+                return json.dumps(result, indent=2)
+            rows = [{k: (f"{v / 100:.2f}" if k in ("min", "median", "avg", "max") else v) for k, v in r.items()} for r in result]
+            return format_table(rows, ["team", "currency", "count", "min", "median", "avg", "max"])
+        result = query_items(
+            conn, team=args.team, brand=args.brand, status=args.status, size=args.size, since=since,
+            until=args.until, text=args.search,
+            max_price_cents=round(args.max_price * 100) if args.max_price is not None else None, limit=args.limit,
+        )
+        if args.json:
+            return json.dumps(result, indent=2, ensure_ascii=False)
+        return format_table(result, ["item_id", "timestamp", "status", "team", "brand", "size", "price", "title"])
+    finally:
+        conn.close()
+
+# ============================================================================
+# RETENTION
+# ============================================================================
+
+ARCHIVE_COLUMNS = (
+    "item_id", "timestamp", "status", "team", "brand", "size", "price", "price_cents", "currency",
+    "seller", "reason_code", "reason_rejected", "duplicate_of", "title", "vinted_url",
+)
+
+def _cutoff(days: float, now: Optional[float] = None) -> str:
+    """Timestamp ``days`` ago, in the format of the items table (UTC)"""
+    now = time.time() if now is None else now
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - days * 86400))
+
+def compact_rejected(conn: sqlite3.Connection, days: Optional[float] = None, now: Optional[float] = None,
+                     batch_size: Optional[int] = None) -> int:
+    """Move rejected rows older than ``days`` into compact_items (id, reason code, day); return rows moved.
+
+    Rows leave the items table in rowid (insertion) order, so whole pages
+    empty out for the incremental vacuum instead of being left half full.
+    """
+    days = CONFIG["COMPACT_AFTER_DAYS"] if days is None else days
+    batch_size = batch_size or CONFIG["RETENTION_BATCH_SIZE"]
+    if not days:
+        return 0
+    cutoff = _cutoff(days, now)
+    moved = 0
+    while True:
+        with conn:
+            rows = conn.execute(
+                "SELECT rowid, item_id, reason_code, CAST(julianday(timestamp) - 2440587.5 AS INTEGER) FROM items "
+                "WHERE status = 'rejected' AND timestamp < ? ORDER BY rowid LIMIT ?",
+                (cutoff, batch_size),
+            ).fetchall()
+            conn.executemany(
+                "INSERT OR IGNORE INTO compact_items (item_id, reason_code, day) VALUES (?, ?, ?)",
+                [row[1:] for row in rows],
+            )
+            conn.executemany("DELETE FROM items WHERE rowid = ?", [(row[0],) for row in rows])
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+
+def _write_segment(path: str, records: List[Dict], fmt: str):
+    """Write one archive segment next to its final name, then move it into place"""
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError("Parquet archives need pyarrow (pip install pyarrow); ARCHIVE_FORMAT=jsonl works without it") from e
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(records), tmp, compression="zstd")
+    else:
+        import gzip
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+def archive_items(conn: sqlite3.Connection, days: Optional[float] = None, directory: Optional[str] = None,
+                  fmt: Optional[str] = None, now: Optional[float] = None, batch_size: Optional[int] = None) -> List[str]:
+    """Move every row older than ``days`` out of the database into compressed segments; return their paths.
+
+    A segment is written completely before its rows are deleted, so an
+    interrupted run can only leave rows in both places, never in neither.
+    Archived ids no longer take part in dedup: they are far below every
+    search's high-water mark by then.
+    """
+    days = CONFIG["ARCHIVE_AFTER_DAYS"] if days is None else days
+    directory = directory or CONFIG["ARCHIVE_DIR"]
+    fmt = fmt or CONFIG["ARCHIVE_FORMAT"]
+    batch_size = batch_size or CONFIG["RETENTION_BATCH_SIZE"]
+    if not days:
+        return []
+    cutoff = _cutoff(days, now)
+    cutoff_day = int((time.time() if now is None else now) // 86400 - days)
+    extension = "parquet" if fmt == "parquet" else "jsonl.gz"
+    segments = []
+    
+    def flush(name: str, records: List[Dict], delete: Callable):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.{extension}")
+        _write_segment(path, records, fmt)
+        with conn:
+            delete()
+        segments.append(path)
+        logger.info(f"📦 Archived {len(records)} rows to {path}")
+    
+    while True:
+        rows = conn.execute(
+            f"SELECT rowid, {', '.join(ARCHIVE_COLUMNS)} FROM items WHERE timestamp < ? ORDER BY rowid LIMIT ?",
+            (cutoff, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        records = []
+        for row in rows:
+            record = dict(zip(ARCHIVE_COLUMNS, row[1:]))
+            record["reason_rejected"] = decode_reason(record.pop("reason_code"), record["reason_rejected"])
+            records.append(record)
+        stamps = sorted(record["timestamp"] or "" for record in records)
+        name = f"items-{re.sub(r'[^0-9]', '', stamps[0])}-{re.sub(r'[^0-9]', '', stamps[-1])}-{rows[0][0]}"
+        flush(name, records, lambda: conn.executemany("DELETE FROM items WHERE rowid = ?", [(row[0],) for row in rows]))
+    
+    while True:
+        rows = conn.execute(
+            "SELECT item_id, reason_code, day FROM compact_items WHERE day < ? ORDER BY day, reason_code LIMIT ?",
+            (cutoff_day, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        records = [
+            {"item_id": item_id, "status": "rejected", "reason_rejected": decode_reason(code),
+             "timestamp": time.strftime("%Y-%m-%d", time.gmtime(day * 86400))}
+            for item_id, code, day in rows
+        ]
+        name = f"compact-{records[0]['timestamp']}-{records[-1]['timestamp']}-{rows[0][0]}"
+        flush(name, records, lambda: conn.executemany("DELETE FROM compact_items WHERE item_id = ?", [(row[0],) for row in rows]))
+    return segments
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: Optional[int] = None) -> int:
+    """Return up to ``pages`` free pages (0 = all) to the filesystem; return how many were released"""
+    pages = CONFIG["VACUUM_PAGES"] if pages is None else pages
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if before:
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+class Retention:
+    """Keep the database bounded from inside the monitor loop.
+
+    Every cycle releases at most VACUUM_PAGES free pages, which takes a few
+    milliseconds. Every RETENTION_INTERVAL seconds old rejected rows are
+    compacted and rows past ARCHIVE_AFTER_DAYS are archived.
+    """
+
+    def __init__(self, store: ItemStore, interval: Optional[float] = None):
+        self.store = store
+        self.interval = CONFIG["RETENTION_INTERVAL"] if interval is None else interval
+        self.next_run = 0.0
+
+    def run_due(self, now: Optional[float] = None) -> Dict[str, int]:
+        now = time.time() if now is None else now
+        stats = {"compacted": 0, "archived": 0, "pages_freed": 0}
+        with self.store.lock:
+            if self.interval and now >= self.next_run:
+                self.next_run = now + self.interval
+                stats["compacted"] = compact_rejected(self.store.conn, now=now)
+                stats["archived"] = len(archive_items(self.store.conn, now=now))
+            stats["pages_freed"] = incremental_vacuum(self.store.conn)
+        if stats["compacted"] or stats["archived"]:
+            logger.info(f"🧹 Retention: compacted {stats['compacted']} rows, wrote {stats['archived']} archive segment(s)")
+        return stats
+
+def run_maintenance(path: Optional[str] = None, full_vacuum: bool = False) -> Dict[str, int]:
+    """Compact, archive and vacuum the database once; ``full_vacuum`` rewrites the whole file (the maintain command)"""
+    conn = connect_database(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(path or CONFIG["DB_NAME"])
+        stats = {"compacted": compact_rejected(conn), "archived": len(archive_items(conn))}
+        if full_vacuum:
+            # Also converts databases created before incremental vacuum was enabled
+            stats["pages_freed"] = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            stats["pages_freed"] = incremental_vacuum(conn, pages=0)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    stats["bytes_before"] = size
+    stats["bytes_after"] = os.path.getsize(path or CONFIG["DB_NAME"])
+    return stats
+
 # ============================================================================
 # ENTRY POINT
 # ============================================================================
 
+def main(argv: Optional[List[str]] = None):
+    """Command line: monitor (default), coordinator/worker, rescore, maintain, classify or report on the stored items"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Vinted football tracksuit bot")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("monitor", help="run the monitoring loop (default)")
+    rescore = commands.add_parser("rescore", help="re-validate every stored item with the current keyword lists")
+    rescore.add_argument("--db", default=None, help="database file (default: CONFIG['DB_NAME'])")
+    rescore.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    rescore.add_argument("--chunk-size", type=int, default=None, help="rows per chunk")
+    coordinator = commands.add_parser("coordinator", help="publish the searches as jobs for workers to lease")
+    coordinator.add_argument("--shared-db", default=None, help="shared queue file (default: CONFIG['SHARED_DB'])")
+    worker = commands.add_parser("worker", help="lease search jobs from the shared queue and process them")
+    worker.add_argument("--shared-db", default=None, help="shared queue file (default: CONFIG['SHARED_DB'])")
+    worker.add_argument("--id", default=None, help="worker name in leases and logs (default: host-pid)")
+    maintain = commands.add_parser("maintain", help="compact, archive and vacuum the database now")
+    maintain.add_argument("--db", default=None, help="database file (default: CONFIG['DB_NAME'])")
+    maintain.add_argument("--full-vacuum", action="store_true", help="rewrite the whole file (also enables incremental vacuum)")
+    classify = commands.add_parser("classify", help="score photos with the image model, e.g. fixtures/images/*.png")
+    classify.add_argument("photos", nargs="+")
+    classify.add_argument("--model", default=None, help="ONNX model file (default: CONFIG['IMAGE_MODEL'])")
+    report = commands.add_parser("report", help="query the stored listings")
+    report.add_argument("view", nargs="?", choices=("listings", "reasons", "prices", "market"), default="listings")
+    report.add_argument("--db", default=None, help="database file (default: CONFIG['DB_NAME'])")
+    report.add_argument("--since", help="start date, e.g. 2026-01-01 (UTC)")
+    report.add_argument("--until", help="end date, exclusive")
+    report.add_argument("--days", type=int, help="only the last N days")
+    report.add_argument("--team")
+    report.add_argument("--brand")
+    report.add_argument("--status", choices=("approved", "rejected"))
+    report.add_argument("--size")
+    report.add_argument("--search", help="words in the title")
+    report.add_argument("--max-price", type=float, help="maximum price in the listing currency")
+    report.add_argument("--limit", type=int, default=50)
+    report.add_argument("--fts", action="store_true", help="build the FTS5 title index first (once)")
+    report.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    
+    load_settings()
+    if args.command == "report":
+        print(run_report(args))
+        return
+    setup_logging()
+    if args.command == "rescore":
+        rescore_items(args.db, args.workers, args.chunk_size)
+    elif args.command == "maintain":
+        stats = run_maintenance(args.db, args.full_vacuum)
+        logger.info(f"🧹 Compacted {stats['compacted']} rows, {stats['archived']} archive segment(s), "
+                    f"{stats['pages_freed']} pages freed: {stats['bytes_before'] / 2**20:.1f} MiB -> "
+                    f"{stats['bytes_after'] / 2**20:.1f} MiB")
+    elif args.command == "classify":
+        print(run_classify(args.photos, OnnxClassifier(args.model)))
+    elif args.command in ("coordinator", "worker"):
+        serve_shared(args.command, args.shared_db, getattr(args, "id", None))
+    else:
+        monitor_vinted()
+
 if __name__ == "__main__":
-    monitor_vinted()
+    main()